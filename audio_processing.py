@@ -0,0 +1,303 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# numpy is only needed by streaming capture and preprocessing, so it is
+# imported on first use
+np = None
+
+def _require_numpy():
+
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("Streaming capture and audio preprocessing require numpy (pip install numpy)")
+        np = numpy
+    return np
+
+def frame_features(pcm, frame_length):
+
+    # RMS energy and zero-crossing rate of each whole frame of 16-bit mono
+    # PCM; a trailing partial frame is ignored
+    _require_numpy()
+    samples = np.frombuffer(pcm, dtype='<i2')
+    frames = samples[:len(samples) - len(samples) % frame_length].reshape(-1, frame_length).astype(np.float32)
+    energy = np.sqrt(np.mean(frames * frames, axis=1))
+    signs = np.signbit(frames)
+    zero_crossings = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_length - 1)
+    return energy, zero_crossings
+
+class VoiceActivityDetector:
+    """Frame-level speech/non-speech decision from energy and zero crossings.
+
+    A frame is speech when its RMS energy is energy_ratio times above the
+    running noise floor and it crosses zero less often than zcr_max. Frames
+    that cross zero more often sound like hiss, fans or clicks, so they can't
+    start an utterance; inside one they count as speech (fricatives such as
+    's'). The noise floor follows the non-speech frames; learning can be
+    switched off while the assistant itself is talking.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, energy_ratio=3.0, min_energy=100.0, zcr_max=0.35,
+                 noise_floor=None, floor_rate=0.05):
+
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+        self.zcr_max = zcr_max
+        self.noise_floor = noise_floor
+        self.floor_rate = floor_rate
+
+    @property
+    def threshold(self):
+
+        return max(self.min_energy, (self.noise_floor or 0.0) * self.energy_ratio)
+
+    def classify(self, pcm, learn=True, in_speech=False):
+
+        energy, zero_crossings = frame_features(pcm, self.frame_length)
+        decisions = []
+        for frame_energy, frame_zcr in zip(energy.tolist(), zero_crossings.tolist()):
+            if self.noise_floor is None:
+                # The first frame of a session sets the floor
+                self.noise_floor = frame_energy
+            threshold = self.threshold
+            speech = frame_energy > threshold and (in_speech or frame_zcr <= self.zcr_max)
+            if learn and not speech:
+                # Falls quickly (the room got quieter) and rises slowly, so a
+                # run of near-threshold frames can't drag the floor up into speech
+                rate = self.floor_rate if frame_energy > self.noise_floor else 4 * self.floor_rate
+                self.noise_floor += rate * (frame_energy - self.noise_floor)
+            decisions.append(speech)
+        return decisions
+
+class Endpointer:
+    """Cuts a stream of classified frames into utterances.
+
+    Speech starts after start_frames speech frames in a row and keeps the
+    pre_roll of audio before them. It ends after a run of silence whose
+    length adapts to the speaker: it is 1.5 times the typical pause inside
+    their utterances, kept between min_silence and max_silence. An
+    utterance only gets cut short at max_utterance, which is there for a
+    stuck-open microphone rather than for long requests.
+
+    Only frame numbers are kept, not audio: push() is called once per frame
+    and returns the (first, end) frame numbers of a finished utterance, for
+    the caller to slice out of wherever it keeps the audio (the capture ring
+    buffer). Frame numbers count every push since the endpointer was made.
+    """
+
+    def __init__(self, frame_ms=20, min_silence=0.2, max_silence=0.8, start_frames=3, pre_roll=0.3,
+                 min_speech=0.15, max_utterance=30.0):
+
+        self.frame_ms = frame_ms
+        self.min_silence_frames = max(1, round(min_silence * 1000 / frame_ms))
+        self.max_silence_frames = max(self.min_silence_frames, round(max_silence * 1000 / frame_ms))
+        self.start_frames = start_frames
+        self.min_speech_frames = round(min_speech * 1000 / frame_ms)
+        self.max_utterance_frames = round(max_utterance * 1000 / frame_ms)
+        self.pre_roll_frames = max(start_frames, round(pre_roll * 1000 / frame_ms))
+
+        # Typical pause inside an utterance, in frames; starts where the
+        # endpoint is min_silence
+        self.pause_frames = self.min_silence_frames / 1.5
+        self.frames = 0
+        self.reset()
+
+    def reset(self):
+
+        # The pre-roll of the next utterance doesn't reach back past here
+        self._earliest = self.frames
+        self._first = 0
+        self._onset = 0
+        self._speech_frames = 0
+        self._silence = 0
+        self.in_speech = False
+
+    @property
+    def endpoint_frames(self):
+
+        return max(self.min_silence_frames, min(self.max_silence_frames, round(1.5 * self.pause_frames)))
+
+    def push(self, speech):
+
+        # Returns (first, end) frame numbers when this frame ends an utterance, else None
+        self.frames += 1
+        if not self.in_speech:
+            self._onset = self._onset + 1 if speech else 0
+            if self._onset >= self.start_frames:
+                self.in_speech = True
+                self._first = max(self._earliest, self.frames - self.pre_roll_frames)
+                self._speech_frames = self._onset
+                self._silence = 0
+            return None
+
+        if speech:
+            if self._silence >= 3:
+                # A pause the speaker came back from: learn how long theirs are
+                self.pause_frames += 0.2 * (self._silence - self.pause_frames)
+            self._speech_frames += 1
+            self._silence = 0
+        else:
+            self._silence += 1
+
+        length = self.frames - self._first
+        if self._silence >= self.endpoint_frames or length >= self.max_utterance_frames:
+            if length >= self.max_utterance_frames:
+                logger.warning("Utterance reached the %.0f s limit and was cut",
+                               self.max_utterance_frames * self.frame_ms / 1000)
+            first, speech_frames = self._first, self._speech_frames
+            self.reset()
+            if speech_frames < self.min_speech_frames:
+                return None
+            return first, self.frames
+        return None
+
+class AudioPreprocessor:
+    """Prepares captured audio for recognition, on the raw frame buffer.
+
+    Leading and trailing silence is trimmed down to keep_silence on each
+    side, judged by 20 ms frame energy against the quietest frames of the
+    clip. The clip is mixed down to mono and resampled to target_rate; when
+    downsampling, a windowed-sinc low-pass at target_rate / 2 removes what
+    would otherwise alias into the recognizer's band first. Its peak is then
+    scaled to target_peak of full scale, but never amplified by more than
+    max_gain. The output is 16-bit PCM. All of it is vectorized, and the
+    totals (bytes in and out, time spent) are kept for stats().
+    """
+
+    def __init__(self, target_rate=16000, trim=True, normalize=True, keep_silence=0.15, energy_ratio=3.0,
+                 min_energy=100.0, target_peak=0.9, max_gain=8.0):
+
+        self.target_rate = target_rate
+        self.trim = trim
+        self.normalize = normalize
+        self.keep_silence = keep_silence
+        self.energy_ratio = energy_ratio
+        self.min_level = min_energy / 32768
+        self.target_peak = target_peak
+        self.max_gain = max_gain
+        self._kernels = {}
+        self._stats = {'clips': 0, 'bytes_in': 0, 'bytes_out': 0, 'encoded_bytes': 0, 'trimmed_seconds': 0.0,
+                       'seconds': 0.0}
+        self._stats_lock = threading.Lock()
+
+    def _to_float(self, pcm, sample_width, channels):
+
+        # Little-endian PCM of any width to float32 in [-1, 1), mono. 8-bit
+        # PCM (as in WAV and sr.AudioData) is unsigned, centred on 128
+        if sample_width == 1:
+            samples = np.frombuffer(pcm, dtype=np.uint8).astype(np.float32) - np.float32(128)
+            scale = 2.0 ** 7
+        elif sample_width == 3:
+            raw = np.frombuffer(pcm, dtype=np.uint8)
+            raw = raw[:len(raw) - len(raw) % 3].reshape(-1, 3)
+            samples = np.pad(raw, ((0, 0), (1, 0))).view('<i4').ravel()
+            scale = 2.0 ** 31
+        else:
+            dtype = {2: '<i2', 4: '<i4'}[sample_width]
+            samples = np.frombuffer(pcm[:len(pcm) - len(pcm) % sample_width], dtype=dtype)
+            scale = 2.0 ** (8 * sample_width - 1)
+        samples = samples.astype(np.float32) / np.float32(scale)
+        if channels > 1:
+            samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+        return samples
+
+    def _trim(self, samples, sample_rate):
+
+        frame_length = max(1, sample_rate // 50)
+        count = len(samples) // frame_length
+        if count < 3:
+            return samples
+        frames = samples[:count * frame_length].reshape(count, frame_length)
+        energy = np.sqrt(np.mean(frames * frames, axis=1))
+
+        # Above the quietest tenth of the clip, but never so high that the
+        # soft end of a word (20 dB under the loudest frame) counts as silence
+        threshold = max(self.min_level, min(self.energy_ratio * np.percentile(energy, 10), 0.1 * energy.max()))
+        loud = np.flatnonzero(energy > threshold)
+        if not len(loud):
+            return samples
+        keep = int(self.keep_silence * sample_rate)
+        start = max(0, loud[0] * frame_length - keep)
+        end = min(len(samples), (loud[-1] + 1) * frame_length + keep)
+        return samples[start:end]
+
+    def _resample(self, samples, sample_rate):
+
+        if sample_rate == self.target_rate or not len(samples):
+            return samples
+        if sample_rate > self.target_rate:
+            samples = np.convolve(samples, self._lowpass_kernel(sample_rate), mode='same')
+        length = int(len(samples) * self.target_rate / sample_rate)
+        positions = np.arange(length, dtype=np.float64) * (sample_rate / self.target_rate)
+        return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+    def _lowpass_kernel(self, sample_rate):
+
+        # Blackman-windowed sinc with its cutoff at target_rate / 2, 32 zero
+        # crossings each side: a transition band of about 1.4 kHz and 70 dB
+        # or more of stopband attenuation. Built once per input rate
+        kernel = self._kernels.get(sample_rate)
+        if kernel is None:
+            cutoff = self.target_rate / 2 / sample_rate
+            half = int(np.ceil(32 * sample_rate / self.target_rate))
+            taps = np.arange(-half, half + 1)
+            kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.blackman(len(taps))
+            kernel = (kernel / kernel.sum()).astype(np.float32)
+            self._kernels[sample_rate] = kernel
+        return kernel
+
+    def process(self, pcm, sample_rate, sample_width, channels=1):
+
+        # Returns (16-bit mono PCM at target_rate, target_rate)
+        _require_numpy()
+        start = time.perf_counter()
+        samples = self._to_float(pcm, sample_width, channels)
+        original_seconds = len(samples) / sample_rate
+        if self.trim:
+            samples = self._trim(samples, sample_rate)
+        trimmed_seconds = original_seconds - len(samples) / sample_rate
+        samples = self._resample(samples, sample_rate)
+        if self.normalize and len(samples):
+            peak = float(np.abs(samples).max())
+            if peak > 0:
+                samples = samples * np.float32(min(self.max_gain, self.target_peak / peak))
+        output = (np.clip(samples, -1.0, 32767 / 32768) * 32768).astype('<i2').tobytes()
+
+        with self._stats_lock:
+            self._stats['clips'] += 1
+            self._stats['bytes_in'] += len(pcm)
+            self._stats['bytes_out'] += len(output)
+            self._stats['trimmed_seconds'] += trimmed_seconds
+            self._stats['seconds'] += time.perf_counter() - start
+        return output, self.target_rate
+
+    def count_encoded(self, nbytes, seconds):
+
+        # Encoding (FLAC) happens outside, where speech_recognition is available
+        with self._stats_lock:
+            self._stats['encoded_bytes'] += nbytes
+            self._stats['seconds'] += seconds
+
+    def stats(self):
+
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def format_stats(self):
+
+        stats = self.stats()
+        if not stats['clips']:
+            return "No audio preprocessed yet"
+        saved = stats['bytes_in'] - stats['bytes_out']
+        line = (f"{stats['clips']} clips, {stats['bytes_in'] / 1024:.0f} KiB -> {stats['bytes_out'] / 1024:.0f} KiB "
+                f"({saved / max(1, stats['bytes_in']):.0%} saved), {stats['trimmed_seconds']:.1f} s of silence trimmed")
+        if stats['encoded_bytes']:
+            line += f", {stats['encoded_bytes'] / 1024:.0f} KiB as FLAC"
+        return line + f", {stats['seconds'] * 1000 / stats['clips']:.1f} ms per clip"
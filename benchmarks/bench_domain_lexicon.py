@@ -0,0 +1,77 @@
+"""Time DomainLexicon build and lookups with a large synthetic lexicon.
+
+Usage: python benchmarks/bench_domain_lexicon.py [--domains N]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain_lexicon import DomainLexicon, DEFAULT_LEXICON_PATH
+
+QUERIES = ['gmial', 'out look', 'company dot co dot uk', 'yahoo dot co dot in', 'hotmial.com', 'g mail', 'nosuchdomain']
+
+
+def synthetic_domains(count, seed=42):
+
+    rng = random.Random(seed)
+    suffixes = ['com', 'net', 'org', 'co.uk', 'co.in', 'io']
+    domains = set()
+    while len(domains) < count:
+        name = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 14)))
+        domains.add(f"{name}.{rng.choice(suffixes)}")
+    return sorted(domains)
+
+
+def linear_resolve(domains, spoken):
+
+    # What a plain scan over the list costs for the same fuzzy question
+    name = spoken.replace(' dot ', '.').replace(' ', '').split('.')[0]
+    for domain in domains:
+        candidate = domain.split('.')[0]
+        if candidate == name or (abs(len(candidate) - len(name)) <= 1 and sum(a != b for a, b in zip(candidate, name)) <= 2):
+            return domain
+    return None
+
+
+def time_lookup(func, queries, rounds):
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            func(query)
+    return (time.perf_counter() - start) / (rounds * len(queries)) * 1e6
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--domains', type=int, default=100000)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    with open(DEFAULT_LEXICON_PATH, encoding='utf-8') as lexicon_file:
+        shipped = [line.split('#', 1)[0].strip() for line in lexicon_file]
+    domains = [domain for domain in shipped if domain] + synthetic_domains(args.domains) + ['company.co.uk']
+
+    start = time.perf_counter()
+    lexicon = DomainLexicon(domains)
+    build_s = time.perf_counter() - start
+
+    print(f"{len(lexicon)} domains, built in {build_s:.2f}s")
+    for query in QUERIES:
+        print(f"  {query!r:28} -> {lexicon.resolve(query)}")
+
+    lexicon_us = time_lookup(lexicon.resolve, QUERIES, args.rounds)
+    prefix_us = time_lookup(lexicon.has_name_prefix, ['outl', 'gma', 'zzzz'], args.rounds)
+    linear_us = time_lookup(lambda query: linear_resolve(domains, query), QUERIES, 1)
+
+    print(f"resolve: {lexicon_us:.1f} us/query, prefix: {prefix_us:.2f} us/query, linear scan: {linear_us:.0f} us/query")
+
+
+if __name__ == '__main__':
+    main()
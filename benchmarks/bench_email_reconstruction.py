@@ -0,0 +1,88 @@
+"""Score SpokenEmailParser against the old reconstruction cascade.
+
+Both engines run over benchmarks/data/spoken_emails.tsv; the script fails
+if the parser gets any utterance wrong that the cascade got right.
+
+Usage: python benchmarks/bench_email_reconstruction.py [--rounds N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from nlu import IntentClassifier
+from legacy_email import LegacyEmailReconstructor
+
+CORPUS_PATH = os.path.join(BENCH_DIR, 'data', 'spoken_emails.tsv')
+
+
+def load_corpus(path=CORPUS_PATH):
+
+    corpus = []
+    with open(path, encoding='utf-8') as corpus_file:
+        for line in corpus_file:
+            line = line.rstrip('\n')
+            if not line or line.startswith('#'):
+                continue
+            utterance, _, expected = line.partition('\t')
+            corpus.append((utterance, expected or None))
+    return corpus
+
+
+def time_per_utterance(func, texts, rounds):
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        samples.append((time.perf_counter() - start) / len(texts))
+    return statistics.median(samples) * 1e6
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--verbose', action='store_true', help='print every utterance')
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    legacy = LegacyEmailReconstructor()._reconstruct_email_from_speech
+    current = IntentClassifier().email_parser.parse
+
+    legacy_correct = current_correct = 0
+    regressions = []
+    for utterance, expected in corpus:
+        legacy_result = legacy(utterance)
+        current_result = current(utterance)
+        legacy_correct += legacy_result == expected
+        current_correct += current_result == expected
+        if legacy_result == expected and current_result != expected:
+            regressions.append((utterance, expected, current_result))
+        if args.verbose or current_result != expected:
+            print(f"{utterance!r}: expected={expected} legacy={legacy_result} parser={current_result}")
+
+    texts = [utterance for utterance, _ in corpus]
+    legacy_us = time_per_utterance(legacy, texts, args.rounds)
+    current_us = time_per_utterance(current, texts, args.rounds)
+
+    print(f"\n{len(corpus)} utterances")
+    print(f"{'':14}{'correct':>10}{'us/utt':>10}")
+    print(f"{'cascade':14}{legacy_correct:10}{legacy_us:10.1f}")
+    print(f"{'parser':14}{current_correct:10}{current_us:10.1f}")
+    print(f"speedup: {legacy_us / current_us:.1f}x")
+
+    if regressions:
+        print("\nRegressions against the cascade:")
+        for utterance, expected, result in regressions:
+            print(f"  {utterance!r}: expected {expected}, got {result}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
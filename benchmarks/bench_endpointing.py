@@ -0,0 +1,180 @@
+"""Voice-activity endpointing: hand-off delay, truncation and frame cost.
+
+Feeds a synthetic recording through the streaming capture's ring buffer,
+VoiceActivityDetector and Endpointer in 20 ms chunks, the way the
+microphone thread does. The recording alternates room noise with
+utterances of voiced "syllables" separated by short pauses (1 s to 25 s
+long), plus bursts of loud hiss that must not count as speech. For each
+utterance it reports how long after the speaker stopped it was handed to
+recognition, and whether it came out in one piece. --memory also traces
+allocations and reports how much memory capture still holds at the end
+compared with after the first utterance; it should not grow with the
+length of the recording.
+
+Usage: python benchmarks/bench_endpointing.py [--utterances 40] [--max-delay-ms 250] [--memory]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import numpy as np
+
+from audio_processing import Endpointer, VoiceActivityDetector
+from recognizer import AudioRingBuffer
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+FRAME = SAMPLE_RATE * FRAME_MS // 1000
+
+
+def syllable(rng, seconds):
+
+    # A voiced sound: a few harmonics of a 100-250 Hz pitch under an envelope
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = rng.uniform(100, 250)
+    wave = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 5))
+    return wave * np.hanning(len(t)) ** 0.3 * rng.uniform(1500, 4000) / 1.2
+
+
+def build_recording(utterances, seed):
+
+    rng = np.random.default_rng(seed)
+    pieces = []
+    spans = []
+    position = 0
+
+    def add(samples):
+        nonlocal position
+        pieces.append(samples)
+        position += len(samples)
+
+    add(np.zeros(SAMPLE_RATE))
+    for index in range(utterances):
+        # Every fifth utterance is a long one, to check nothing is cut
+        length = rng.uniform(12, 25) if index % 5 == 4 else rng.uniform(1, 4)
+        gap = rng.uniform(1.0, 2.0)
+        if index % 7 == 3:
+            # Hiss: as loud as quiet speech but crossing zero constantly
+            add(np.zeros(int(0.5 * SAMPLE_RATE)))
+            add(rng.normal(0, 500, int(0.4 * SAMPLE_RATE)) * np.tile([1, -1], int(0.2 * SAMPLE_RATE)))
+        add(np.zeros(int(gap * SAMPLE_RATE)))
+
+        start = position
+        spoken = 0.0
+        while spoken < length:
+            duration = rng.uniform(0.12, 0.35)
+            add(syllable(rng, duration))
+            spoken += duration
+            if spoken < length:
+                pause = rng.uniform(0.02, 0.15)
+                add(np.zeros(int(pause * SAMPLE_RATE)))
+                spoken += pause
+        spans.append((start, position))
+    add(np.zeros(2 * SAMPLE_RATE))
+
+    signal = np.concatenate(pieces)
+    signal += rng.normal(0, 40, len(signal))
+    return np.clip(signal, -32768, 32767).astype('<i2').tobytes(), spans
+
+
+def capture_memory():
+
+    # Bytes still allocated from the capture code, not this script's bookkeeping
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(True, '*audio_processing.py'), tracemalloc.Filter(True, '*recognizer.py')])
+    return sum(stat.size for stat in snapshot.statistics('filename'))
+
+
+def run(pcm, spans, endpoint_silence, memory=False):
+
+    detector = VoiceActivityDetector(sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS)
+    endpointer = Endpointer(frame_ms=FRAME_MS, min_silence=endpoint_silence)
+    ring = AudioRingBuffer(60 * SAMPLE_RATE * 2)
+    frame_bytes = FRAME * 2
+
+    emitted = []
+    frame_costs = []
+    held = []
+    if memory:
+        tracemalloc.start()
+    for offset in range(0, len(pcm) - frame_bytes + 1, frame_bytes):
+        # A new bytes object per read, as PyAudio returns them
+        chunk = pcm[offset:offset + frame_bytes]
+        start = time.perf_counter()
+        position = ring.write(chunk)
+        speech = detector.classify(ring.view(position, position + frame_bytes), in_speech=endpointer.in_speech)[0]
+        utterance = endpointer.push(speech)
+        if utterance is not None:
+            audio = ring.view(utterance[0] * frame_bytes, utterance[1] * frame_bytes)
+        frame_costs.append(time.perf_counter() - start)
+        if utterance is not None:
+            # Sample positions the utterance spans
+            emitted.append((utterance[0] * FRAME, utterance[1] * FRAME))
+            if memory:
+                # Only the latest utterance is kept, as a listener would
+                held[:] = [audio]
+                if len(emitted) == 1:
+                    baseline = capture_memory()
+    if memory:
+        growth = capture_memory() - baseline
+        tracemalloc.stop()
+        print(f"memory held by capture since the first utterance: {growth / 1024:+.1f} KiB")
+
+    return emitted, sorted(frame_costs)
+
+
+def score(emitted, spans):
+
+    delays = []
+    problems = []
+    for start, end in spans:
+        covering = [(a, b) for a, b in emitted if b > start and a < end]
+        if len(covering) != 1:
+            problems.append(f"utterance at {start / SAMPLE_RATE:.1f}s came out in {len(covering)} pieces")
+            continue
+        a, b = covering[0]
+        if a > start or b < end:
+            problems.append(f"utterance at {start / SAMPLE_RATE:.1f}s was truncated")
+            continue
+        delays.append((b - end) / SAMPLE_RATE * 1000)
+
+    false_starts = [(a, b) for a, b in emitted if not any(b > start and a < end for start, end in spans)]
+    return sorted(delays), problems, false_starts
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--utterances', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--endpoint-silence', type=float, default=0.2)
+    parser.add_argument('--max-delay-ms', type=float, default=250, help='fail if the p95 hand-off delay is above this')
+    parser.add_argument('--memory', action='store_true', help='trace allocations (slows the frame timings)')
+    args = parser.parse_args()
+
+    pcm, spans = build_recording(args.utterances, args.seed)
+    emitted, frame_costs = run(pcm, spans, args.endpoint_silence, args.memory)
+    delays, problems, false_starts = score(emitted, spans)
+
+    seconds = len(pcm) / 2 / SAMPLE_RATE
+    print(f"{len(spans)} utterances in {seconds:.0f}s of audio, {len(emitted)} emitted, {len(false_starts)} false starts")
+    if delays:
+        print(f"hand-off after end of speech: p50 {delays[len(delays) // 2]:.0f} ms, "
+              f"p95 {delays[int(0.95 * (len(delays) - 1))]:.0f} ms, max {delays[-1]:.0f} ms")
+    print(f"per {FRAME_MS} ms frame: p50 {frame_costs[len(frame_costs) // 2] * 1e6:.1f} us, "
+          f"p99 {frame_costs[int(0.99 * (len(frame_costs) - 1))] * 1e6:.1f} us")
+    for problem in problems:
+        print(f"  {problem}")
+
+    p95 = delays[int(0.95 * (len(delays) - 1))] if delays else float('inf')
+    if problems or false_starts or p95 > args.max_delay_ms:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Hedged recognition against a long-tailed backend: latency and extra load.
+
+Two simulated backends stand in for the real ones, with fixed per-utterance
+latencies drawn from a seeded generator, so every mode sees the same
+utterances:
+
+    google  median about 600 ms, with --tail of calls taking 2-6 s; can't be
+            cancelled once sent (the request just runs out)
+    vosk    0.8-1.3 s with lower confidence; stops within 50 ms of a cancel
+
+Each utterance is recognized through HedgedBackend.transcribe (or the first
+backend alone), one after another, in three modes: google alone, hedged
+after google's p90, and both at once. For each mode it reports the
+latency percentiles, the extra requests per utterance and which backend
+won. Times are scaled by --time-scale to keep the run short and reported
+unscaled.
+
+A last mode checks an outage: google never answers and only gives up at
+--google-timeout (SPEECH_TIMEOUT), as sr's operation_timeout makes it.
+Every recognition must still be answered by vosk within the initial hedge
+delay plus vosk's latency; the run fails if one has to wait for stuck
+google requests.
+
+Usage: python benchmarks/bench_hedging.py [--utterances 300] [--tail 0.08] [--time-scale 0.05]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import CancelledError
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from recognizer import HedgedBackend
+
+
+class SimulatedBackend:
+
+    def __init__(self, name, latencies, confidence, scale, cancellable, timeout=None):
+
+        self.name = name
+        self.latencies = latencies
+        self.confidence = confidence
+        self.scale = scale
+        self.cancellable = cancellable
+        self.timeout = timeout
+
+    def lazy_models(self):
+
+        return []
+
+    def transcribe(self, utterance, cancelled=None):
+
+        latency = self.latencies[utterance]
+        timed_out = self.timeout is not None and latency > self.timeout
+        remaining = (self.timeout if timed_out else latency) * self.scale
+        if not self.cancellable or cancelled is None:
+            time.sleep(remaining)
+        elif cancelled.wait(remaining):
+            raise CancelledError()
+        if timed_out:
+            raise TimeoutError(f"{self.name} timed out")
+        return f"utterance {utterance}", self.confidence
+
+    def close(self):
+
+        pass
+
+
+def draw_latencies(count, tail, seed):
+
+    rng = random.Random(seed)
+    google = [rng.uniform(2.0, 6.0) if rng.random() < tail else rng.lognormvariate(-0.5, 0.25)
+              for _ in range(count)]
+    vosk = [rng.uniform(0.8, 1.3) for _ in range(count)]
+    return google, vosk
+
+
+def run_mode(backends, percentile, utterances, scale):
+
+    hedged = None
+    if percentile is not None:
+        hedged = HedgedBackend(backends, hedge_percentile=percentile,
+                               initial_hedge_after=HedgedBackend.initial_hedge_after * scale)
+    latencies = []
+    try:
+        for utterance in range(utterances):
+            start = time.perf_counter()
+            if hedged is None:
+                backends[0].transcribe(utterance)
+            else:
+                hedged.transcribe(utterance)
+            latencies.append((time.perf_counter() - start) / scale)
+        stats = hedged.stats() if hedged else None
+    finally:
+        if hedged:
+            hedged.close()
+    latencies.sort()
+    return latencies, stats
+
+
+def hung_primary(utterances, scale, timeout, seed):
+
+    # google never answers; each call holds its thread until the timeout
+    _, vosk_latencies = draw_latencies(utterances, 0, seed)
+    backends = [SimulatedBackend('google', [600.0] * utterances, 0.92, scale, cancellable=False, timeout=timeout),
+                SimulatedBackend('vosk', vosk_latencies, 0.75, scale, cancellable=True)]
+    latencies, stats = run_mode(backends, 90, utterances, scale)
+    return latencies, stats, HedgedBackend.initial_hedge_after + max(vosk_latencies)
+
+
+def percentile(values, fraction):
+
+    return values[min(len(values) - 1, int(fraction * len(values)))] * 1000
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--utterances', type=int, default=300)
+    parser.add_argument('--tail', type=float, default=0.08, help='fraction of slow google calls')
+    parser.add_argument('--time-scale', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=11)
+    parser.add_argument('--google-timeout', type=float, default=4.0, help='seconds before a google call gives up')
+    args = parser.parse_args()
+
+    google_latencies, vosk_latencies = draw_latencies(args.utterances, args.tail, args.seed)
+    backends = [SimulatedBackend('google', google_latencies, 0.92, args.time_scale, cancellable=False),
+                SimulatedBackend('vosk', vosk_latencies, 0.75, args.time_scale, cancellable=True)]
+
+    print(f"{'mode':<16}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}{'extra req':>11}  wins")
+    for label, mode in (('google alone', None), ('hedged at p90', 90), ('both at once', 0), ('google hung', 90)):
+        if label == 'google hung':
+            # More utterances than the backends have threads, so stuck
+            # requests would pile up if they could hold up the hedge
+            latencies, stats, limit = hung_primary(min(args.utterances, 40), args.time_scale, args.google_timeout,
+                                                   args.seed)
+        else:
+            latencies, stats = run_mode(backends, mode, args.utterances, args.time_scale)
+        extra = wins = ''
+        if stats:
+            requests = sum(counts['requests'] for counts in stats['backends'].values())
+            extra = f"{requests / stats['recognitions'] - 1:.2f}"
+            wins = ', '.join(f"{name} {counts['wins']}" for name, counts in stats['backends'].items())
+        print(f"{label:<16}{percentile(latencies, 0.5):>6.0f}ms{percentile(latencies, 0.9):>6.0f}ms"
+              f"{percentile(latencies, 0.99):>6.0f}ms{latencies[-1] * 1000:>6.0f}ms{extra:>11}  {wins}")
+
+    # Scheduling slack on top of the limit, in unscaled seconds
+    if latencies[-1] > limit + 0.5:
+        print(f"\nFAILED: with google hung, a recognition took {latencies[-1]:.1f} s "
+              f"(limit {limit + 0.5:.1f} s): stuck requests held up the hedge")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
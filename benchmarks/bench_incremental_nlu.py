@@ -0,0 +1,70 @@
+"""Simulate streaming partial transcripts through IncrementalIntentTracker.
+
+Each corpus utterance is revealed one word at a time (with an occasional
+revised last word, as streaming recognizers do). The script checks that the
+incremental matcher agrees with classify_intent on every partial and
+reports how much earlier than the final transcript the intent was stable.
+
+Usage: python benchmarks/bench_incremental_nlu.py [--word-ms 250] [--endpoint-ms 500]
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from nlu import IntentClassifier, IncrementalIntentTracker
+from corpus import generate_corpus
+
+
+def partial_hypotheses(text, rng):
+
+    words = text.split()
+    for i in range(1, len(words) + 1):
+        # Sometimes the recognizer first hears only part of the newest word
+        if len(words[i - 1]) > 4 and rng.random() < 0.3:
+            yield ' '.join(words[:i - 1] + [words[i - 1][:3]])
+        yield ' '.join(words[:i])
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--per-intent', type=int, default=200)
+    parser.add_argument('--word-ms', type=float, default=250.0, help='time between partial results')
+    parser.add_argument('--endpoint-ms', type=float, default=500.0, help='silence before the final transcript')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(3)
+    classifier = IntentClassifier()
+    tracker = IncrementalIntentTracker(classifier)
+
+    leads = {}
+    mismatches = 0
+    for text, _ in generate_corpus(args.per_intent):
+        now = 0.0
+        for partial in partial_hypotheses(text, rng):
+            guess = tracker.update(partial, timestamp=now)
+            if guess['intent'] != classifier.classify_intent(partial)[0]:
+                mismatches += 1
+            now += args.word_ms / 1000
+
+        report = tracker.finalize(text, timestamp=now + args.endpoint_ms / 1000)
+        leads.setdefault(report['intent'], []).append(report['lead_ms'])
+
+    print(f"partials disagreeing with classify_intent: {mismatches}")
+    print(f"{'intent':12}{'utts':>6}{'mean lead ms':>14}{'p50 lead ms':>13}")
+    for intent, values in sorted(leads.items()):
+        print(f"{intent:12}{len(values):6}{statistics.mean(values):14.0f}{statistics.median(values):13.0f}")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
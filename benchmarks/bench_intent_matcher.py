@@ -0,0 +1,120 @@
+"""Compare IntentMatcher with the original per-pattern search loop.
+
+Usage: python benchmarks/bench_intent_matcher.py [--rounds N]
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nlu import IntentClassifier
+
+UTTERANCES = [
+    "remind me to call mom in 10 minutes",
+    "set alarm for 6 am",
+    "send email to john at gmail dot com about the meeting",
+    "compose email to alice at yahoo.com regarding lunch",
+    "what's the weather in chennai",
+    "temperature in london",
+    "is it 30 degrees outside",
+    "open notepad",
+    "play despacito song",
+    "search for python tutorials",
+    "google latest news",
+    "exit",
+    "turn off the assistant",
+    "good morning",
+    "hello there",
+    "what's up",
+    "who is the president of india",
+    "what time is it",
+    "tell me about the eiffel tower",
+    "how tall is mount everest",
+    "what is the capital of france",
+    "explain quantum computing in simple words",
+]
+
+
+def legacy_first_match(classifier, text_lower):
+
+    # The loop classify_intent used before IntentMatcher
+    for intent, patterns in classifier.compiled_patterns.items():
+        for pattern in patterns:
+            match = pattern.search(text_lower)
+            if match:
+                return intent, match
+    return None, None
+
+
+def legacy_all_intents(classifier, text_lower):
+
+    intents = []
+    for intent, patterns in classifier.compiled_patterns.items():
+        if any(pattern.search(text_lower) for pattern in patterns):
+            intents.append(intent)
+    return intents
+
+
+def random_utterances(count, seed=1234):
+
+    # Shuffle words from the fixed utterances to reach odd combinations
+    rng = random.Random(seed)
+    words = ' '.join(UTTERANCES).split() + ["what's", 'degree', 'Turn', 'OFF', 'ſearch', 'hı']
+    return [' '.join(rng.choice(words) for _ in range(rng.randint(1, 12))) for _ in range(count)]
+
+
+def check_equivalence(classifier, texts):
+
+    for text in texts:
+        text_lower = text.lower()
+        old_intent, old_match = legacy_first_match(classifier, text_lower)
+        new_intent, new_match = classifier.matcher.first_match(text_lower)
+        if old_intent != new_intent or (old_match and old_match.span() != new_match.span()):
+            raise AssertionError(f"first match differs for {text!r}: {old_intent} != {new_intent}")
+
+        new_all = [intent for intent, match in classifier.matcher.match(text_lower)]
+        if new_all != legacy_all_intents(classifier, text_lower):
+            raise AssertionError(f"matched intents differ for {text!r}")
+
+
+def time_per_utterance(func, texts, rounds):
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        samples.append((time.perf_counter() - start) / len(texts))
+    return statistics.median(samples) * 1e6
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    classifier = IntentClassifier()
+
+    check_equivalence(classifier, UTTERANCES + random_utterances(20000))
+    print("Results identical to the per-pattern loop")
+
+    texts = [text.lower() for text in UTTERANCES]
+    legacy_us = time_per_utterance(lambda t: legacy_first_match(classifier, t), texts, args.rounds)
+    matcher_us = time_per_utterance(classifier.matcher.first_match, texts, args.rounds)
+    legacy_all_us = time_per_utterance(lambda t: legacy_all_intents(classifier, t), texts, args.rounds)
+    matcher_all_us = time_per_utterance(classifier.matcher.match, texts, args.rounds)
+
+    print(f"{'':24}{'loop':>10}{'matcher':>10}{'speedup':>10}")
+    print(f"{'first match (us/utt)':24}{legacy_us:10.2f}{matcher_us:10.2f}{legacy_us / matcher_us:9.1f}x")
+    print(f"{'all intents (us/utt)':24}{legacy_all_us:10.2f}{matcher_all_us:10.2f}{legacy_all_us / matcher_all_us:9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""NLU latency, allocation and output regression suite.
+
+Runs classify_intent over the generated labeled corpus (every intent and
+extraction branch, plus the spoken email edge cases), then times each
+_extract_* method and the email reconstruction on the utterances of its
+intent. Outputs are compared with benchmarks/data/nlu_baseline.json: any
+changed output or more allocation per call than the baseline fails the
+run. Latency is the median of --repeat passes, rescaled by how fast a
+fixed regex and string calibration loop runs in this process compared
+with the baseline's run, so a slower machine doesn't read as a
+regression. A p50/p99 above the rescaled baseline times --tolerance is
+reported, and fails the run only with --strict-latency.
+
+Usage:
+    python benchmarks/bench_nlu.py                    # compare with baseline
+    python benchmarks/bench_nlu.py --update-baseline  # accept current results
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from nlu import IntentClassifier
+from corpus import generate_corpus, load_spoken_emails
+
+BASELINE_PATH = os.path.join(BENCH_DIR, 'data', 'nlu_baseline.json')
+
+EXTRACTORS = {
+    '_extract_system_info': 'system',
+    '_extract_email_info': 'email',
+    '_extract_reminder_info': 'reminder',
+    '_extract_weather_info': 'weather',
+    '_reconstruct_email_from_speech': 'email',
+}
+
+
+def build_corpus(per_intent):
+
+    corpus = generate_corpus(per_intent)
+    corpus += [(text, 'email') for text in load_spoken_emails()]
+    return corpus
+
+
+def percentile(sorted_values, fraction):
+
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+CALIBRATION_PATTERN = re.compile(r"\b(?:remind|email|weather) (?:me )?(?:to |in )?(\w+)")
+CALIBRATION_TEXTS = [f"please remind me to call person {i} about the weather in city {i % 7}" for i in range(2000)]
+
+
+def calibration_pass():
+
+    # A fixed workload of the kind the NLU does (regex search, lowercasing,
+    # splitting); its time measures the speed of this machine and moment
+    start = time.perf_counter_ns()
+    for text in CALIBRATION_TEXTS:
+        CALIBRATION_PATTERN.search(text)
+        text.lower().split()
+    return time.perf_counter_ns() - start
+
+
+def measure(func, texts, repeat, calibration):
+
+    # Percentiles are taken per pass and the median pass is kept, so a
+    # burst of scheduler noise during one pass doesn't read as a
+    # regression. A calibration pass runs before each timed pass, so both
+    # see the same machine load
+    passes = []
+    for _ in range(repeat):
+        calibration.append(calibration_pass())
+        samples = []
+        for text in texts:
+            start = time.perf_counter_ns()
+            func(text)
+            samples.append(time.perf_counter_ns() - start)
+        samples.sort()
+        passes.append(samples)
+
+    # Allocation is measured in a separate pass, tracing slows every call
+    tracemalloc.start()
+    allocated = 0
+    for text in texts:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        func(text)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    return {
+        'calls': len(texts) * repeat,
+        'p50_us': statistics.median(percentile(samples, 0.50) for samples in passes) / 1000,
+        'p99_us': statistics.median(percentile(samples, 0.99) for samples in passes) / 1000,
+        'max_us': max(samples[-1] for samples in passes) / 1000,
+        'alloc_bytes': allocated / len(texts)
+    }
+
+
+def run(per_intent, repeat):
+
+    classifier = IntentClassifier()
+    corpus = build_corpus(per_intent)
+    texts = [text for text, _ in corpus]
+
+    outputs = {}
+    correct = 0
+    for text, label in corpus:
+        intent, confidence, extracted_info = classifier.classify_intent(text)
+        outputs[text] = [intent, confidence, extracted_info]
+        correct += intent == label
+
+    calibration = []
+    stats = {'classify_intent': measure(classifier.classify_intent, texts, repeat, calibration)}
+    for name, intent in EXTRACTORS.items():
+        intent_texts = [text.lower() for text, label in corpus if label == intent]
+        stats[name] = measure(getattr(classifier, name), intent_texts, repeat, calibration)
+
+    return {
+        'calibration_us': statistics.median(calibration) / 1000,
+        'corpus_size': len(corpus),
+        'accuracy': correct / len(corpus),
+        'stats': stats,
+        'outputs': outputs
+    }
+
+
+def compare(result, baseline, tolerance, alloc_tolerance, slack_us):
+
+    # Returns (failures, latency regressions)
+    failures = []
+    slower = []
+
+    changed = [text for text, output in result['outputs'].items()
+               if text in baseline['outputs'] and baseline['outputs'][text] != output]
+    for text in changed[:20]:
+        failures.append(f"output changed for {text!r}: {baseline['outputs'][text]} -> {result['outputs'][text]}")
+    if len(changed) > 20:
+        failures.append(f"... and {len(changed) - 20} more changed outputs")
+
+    missing = set(baseline['outputs']) ^ set(result['outputs'])
+    if missing:
+        failures.append(f"{len(missing)} utterances differ between corpus and baseline; regenerate the baseline")
+
+    if result['accuracy'] < baseline['accuracy']:
+        failures.append(f"accuracy dropped: {baseline['accuracy']:.4f} -> {result['accuracy']:.4f}")
+
+    # Baseline latencies in this run's machine speed
+    speed = result['calibration_us'] / baseline['calibration_us'] if baseline.get('calibration_us') else 1.0
+    for name, stats in result['stats'].items():
+        base = baseline['stats'].get(name)
+        if not base:
+            continue
+        for key in ('p50_us', 'p99_us'):
+            # The slack keeps microsecond-scale timer noise from counting
+            expected = base[key] * speed
+            if stats[key] > expected * tolerance + slack_us:
+                slower.append(f"{name} {key} regressed: {expected:.1f} -> {stats[key]:.1f}")
+        if stats['alloc_bytes'] > base['alloc_bytes'] * alloc_tolerance + 64:
+            failures.append(f"{name} allocates more: {base['alloc_bytes']:.0f} -> {stats['alloc_bytes']:.0f} bytes/call")
+
+    return failures, slower
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--per-intent', type=int, default=600)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=1.5, help='allowed latency ratio over baseline')
+    parser.add_argument('--slack-us', type=float, default=2.0, help='absolute latency slack added to the ratio')
+    parser.add_argument('--alloc-tolerance', type=float, default=1.2, help='allowed allocation ratio over baseline')
+    parser.add_argument('--strict-latency', action='store_true', help='fail on latency regressions too')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    result = run(args.per_intent, args.repeat)
+
+    print(f"{result['corpus_size']} utterances, accuracy {result['accuracy']:.3f}, "
+          f"calibration loop {result['calibration_us'] / 1000:.2f} ms")
+    print(f"{'':34}{'p50 us':>9}{'p99 us':>9}{'max us':>9}{'alloc B':>9}")
+    for name, stats in result['stats'].items():
+        print(f"{name:34}{stats['p50_us']:9.1f}{stats['p99_us']:9.1f}{stats['max_us']:9.1f}{stats['alloc_bytes']:9.0f}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump(result, baseline_file, indent=1, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline first")
+        sys.exit(2)
+
+    with open(args.baseline, encoding='utf-8') as baseline_file:
+        baseline = json.load(baseline_file)
+
+    failures, slower = compare(result, baseline, args.tolerance, args.alloc_tolerance, args.slack_us)
+    if slower:
+        print(f"\nLatency above tolerance of the baseline (rescaled by calibration, "
+              f"{'failing' if args.strict_latency else 'advisory'}):")
+        for regression in slower:
+            print(f"  {regression}")
+        if args.strict_latency:
+            failures += slower
+    if failures:
+        print("\nFAILED against baseline:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+    print("\nOK: outputs identical, allocation within tolerance of baseline")
+
+
+if __name__ == '__main__':
+    main()
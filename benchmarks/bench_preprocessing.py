@@ -0,0 +1,131 @@
+"""Audio preprocessing before recognition: bytes saved and time spent.
+
+Builds captured-looking clips: half a second to a second of room noise,
+1-4 s of voiced "syllables" at a low recording level, then the 0.8 s of
+silence listen() waits for before it ends a phrase. The clips are made at
+common microphone rates and run through AudioPreprocessor. For each rate it
+reports input and output bytes, the lowest output peak level and the time
+per clip, and fails if trimming cut into the speech of any clip. --flac
+also encodes the raw and the processed clips as FLAC, as the Google backend
+uploads them; that needs speech_recognition and its flac encoder.
+
+It also checks the anti-alias filter: a 10 kHz tone at 48 kHz is above the
+8 kHz the 16 kHz output can carry and must come out at least 40 dB down
+rather than folding back as a 6 kHz tone, while a 1 kHz tone must keep
+its level to within 1 dB.
+
+Usage: python benchmarks/bench_preprocessing.py [--clips 50] [--rates 16000,44100,48000] [--flac]
+"""
+import argparse
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import numpy as np
+
+from audio_processing import AudioPreprocessor
+
+
+def build_clip(rng, sample_rate):
+
+    # Returns 16-bit PCM and the (start, end) seconds of its speech
+    def silence(seconds):
+        return np.zeros(int(seconds * sample_rate))
+
+    pieces = [silence(rng.uniform(0.5, 1.0))]
+    speech_start = len(pieces[0]) / sample_rate
+    spoken = 0.0
+    length = rng.uniform(1, 4)
+    level = rng.uniform(600, 2500)
+    while spoken < length:
+        duration = rng.uniform(0.12, 0.35)
+        t = np.arange(int(duration * sample_rate)) / sample_rate
+        pitch = rng.uniform(100, 250)
+        wave = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 5))
+        pieces.append(wave * np.hanning(len(t)) ** 0.3 * level)
+        pieces.append(silence(rng.uniform(0.02, 0.15)))
+        spoken += duration
+    speech_end = speech_start + sum(len(piece) for piece in pieces[1:]) / sample_rate
+    pieces.append(silence(0.8))
+
+    signal = np.concatenate(pieces)
+    signal += rng.normal(0, 30, len(signal))
+    return np.clip(signal, -32768, 32767).astype('<i2').tobytes(), speech_start, speech_end
+
+
+def tone_level_db(frequency, sample_rate=48000, seconds=1.0):
+
+    # Output level of a half-scale tone relative to its input level, in dB;
+    # trimming and normalizing are off so only resampling acts on it
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = 0.5 * np.sin(2 * np.pi * frequency * t)
+    output, _ = AudioPreprocessor(trim=False, normalize=False).process(
+        (tone * 32767).astype('<i2').tobytes(), sample_rate, 2)
+    samples = np.frombuffer(output, dtype='<i2')[500:-500] / 32768
+    rms = max(np.sqrt(np.mean(samples * samples)), 1e-9)
+    return 20 * np.log10(rms / (0.5 / np.sqrt(2)))
+
+
+def flac_size(pcm, sample_rate):
+
+    import speech_recognition as sr
+    return len(sr.AudioData(pcm, sample_rate, 2).get_flac_data())
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clips', type=int, default=50)
+    parser.add_argument('--rates', default='16000,44100,48000')
+    parser.add_argument('--seed', type=int, default=3)
+    parser.add_argument('--flac', action='store_true', help='also compare FLAC upload sizes')
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'rate':>7}{'in KiB':>10}{'out KiB':>10}{'saved':>8}{'min peak':>10}{'ms/clip':>9}{'x realtime':>12}"
+          + (f"{'FLAC in':>10}{'FLAC out':>10}" if args.flac else ''))
+    for sample_rate in (int(rate) for rate in args.rates.split(',')):
+        rng = np.random.default_rng(args.seed)
+        preprocessor = AudioPreprocessor()
+        audio_seconds = 0.0
+        peaks = []
+        flac_in = flac_out = 0
+        for _ in range(args.clips):
+            pcm, speech_start, speech_end = build_clip(rng, sample_rate)
+            audio_seconds += len(pcm) / 2 / sample_rate
+            output, output_rate = preprocessor.process(pcm, sample_rate, 2)
+
+            # Trimming keeps keep_silence around the speech; less than the
+            # speech itself means a word was cut
+            samples = np.frombuffer(output, dtype='<i2')
+            if len(samples) / output_rate < speech_end - speech_start:
+                failures += 1
+            peaks.append(np.abs(samples).max() / 32768)
+            if args.flac:
+                flac_in += flac_size(pcm, sample_rate)
+                flac_out += flac_size(output, output_rate)
+
+        stats = preprocessor.stats()
+        line = (f"{sample_rate:>7}{stats['bytes_in'] / 1024:>10.0f}{stats['bytes_out'] / 1024:>10.0f}"
+                f"{1 - stats['bytes_out'] / stats['bytes_in']:>8.0%}{min(peaks):>10.2f}"
+                f"{stats['seconds'] * 1000 / args.clips:>9.2f}{audio_seconds / stats['seconds']:>12.0f}")
+        if args.flac:
+            line += f"{flac_in / 1024:>10.0f}{flac_out / 1024:>10.0f}"
+        print(line)
+
+    passband, stopband = tone_level_db(1000), tone_level_db(10000)
+    print(f"\n48 kHz -> 16 kHz: 1 kHz tone {passband:+.1f} dB, 10 kHz tone {stopband:+.1f} dB")
+    aliasing = stopband > -40 or abs(passband) > 1
+
+    if failures:
+        print(f"{failures} clips lost speech to trimming")
+    if aliasing:
+        print("Anti-alias filter out of spec: 10 kHz must be 40 dB down and 1 kHz within 1 dB")
+    if failures or aliasing:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Compare speech-to-text backends on recorded commands: speed and accuracy.
+
+Each turn of benchmarks/data/replay_session.json that has a recording in
+--audio-dir (and a transcript) is decoded by every backend given with
+--backends, through VoiceRecognizer.recognize_speech as the assistant does.
+For each backend it reports:
+
+    load     time to load its model (0 for the Google web API)
+    RTF      real-time factor: decoding time / audio duration (< 1 is
+             faster than the speaker)
+    latency  p50/p95 per utterance, from end of audio to transcript
+    WER      word error rate against the session's transcripts; an
+             utterance that isn't recognized counts all its words as missed
+
+The Google backend needs network access; vosk needs the vosk package and a
+model directory (--model-path, default SPEECH_MODEL_PATH).
+
+No recordings are committed: there are none licensed for redistribution
+yet, so the script can't run from a plain checkout. Record the session's
+turns yourself (each turn names its WAV file and gives the transcript to
+read out; 16 kHz mono 16-bit WAV) into a directory and pass it as
+--audio-dir. bench_replay.py, which synthesizes missing turns, covers
+the rest of the pipeline without them.
+
+Usage:
+    python benchmarks/bench_recognizers.py --audio-dir recordings/
+    python benchmarks/bench_recognizers.py --audio-dir recordings/ --backends vosk --repeat 3
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from config import SPEECH_MODEL_PATH
+from recognizer import SPEECH_BACKENDS, VoiceRecognizer
+
+SESSION_PATH = os.path.join(BENCH_DIR, 'data', 'replay_session.json')
+
+
+def load_recordings(session_path, audio_dir):
+
+    with open(session_path, encoding='utf-8') as session_file:
+        turns = json.load(session_file)['turns']
+
+    recordings = []
+    for turn in turns:
+        path = os.path.join(audio_dir, turn['audio'])
+        if turn['transcript'] and os.path.exists(path):
+            with open(path, 'rb') as wav_file:
+                recordings.append((turn['audio'], wav_file.read(), turn['transcript']))
+    return recordings
+
+
+def words(text):
+
+    return re.findall(r"[a-z0-9']+", (text or '').lower())
+
+
+def word_errors(reference, hypothesis):
+
+    # Word-level edit distance (substitutions + insertions + deletions)
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1]
+
+
+def run_backend(name, recordings, model_path, repeat):
+
+    recognizer = VoiceRecognizer(adaptive=False, backend=name, model_path=model_path)
+    try:
+        load_start = time.perf_counter()
+        for model in recognizer.lazy_models():
+            model.get()
+        load_time = time.perf_counter() - load_start
+
+        audio = [(label, recognizer.audio_from_wav(wav_data), transcript) for label, wav_data, transcript in recordings]
+        audio_seconds = 0.0
+        decode_seconds = 0.0
+        latencies = []
+        errors = 0
+        reference_words = 0
+        misses = []
+        for _ in range(repeat):
+            for label, data, transcript in audio:
+                start = time.perf_counter()
+                text = recognizer.recognize_speech(data)
+                elapsed = time.perf_counter() - start
+
+                audio_seconds += len(data.get_raw_data()) / (data.sample_rate * data.sample_width)
+                decode_seconds += elapsed
+                latencies.append(elapsed)
+                reference = words(transcript)
+                errors += word_errors(reference, words(text))
+                reference_words += len(reference)
+                if text is None:
+                    misses.append(label)
+    finally:
+        recognizer.close()
+
+    latencies.sort()
+    return {
+        'backend': name,
+        'load': load_time,
+        'rtf': decode_seconds / audio_seconds if audio_seconds else float('nan'),
+        'p50': latencies[len(latencies) // 2],
+        'p95': latencies[int(0.95 * (len(latencies) - 1))],
+        'wer': errors / reference_words if reference_words else float('nan'),
+        'misses': misses
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--audio-dir', required=True, help='directory with the session\'s recorded WAV files')
+    parser.add_argument('--session', default=SESSION_PATH)
+    parser.add_argument('--backends', default=','.join(SPEECH_BACKENDS),
+                        help=f"comma-separated, from: {', '.join(SPEECH_BACKENDS)}")
+    parser.add_argument('--model-path', default=SPEECH_MODEL_PATH, help='model directory for offline backends')
+    parser.add_argument('--repeat', type=int, default=1, help='decode every recording this many times')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    recordings = load_recordings(args.session, args.audio_dir)
+    if not recordings:
+        sys.exit(f"No recordings of {os.path.basename(args.session)}'s turns found in {args.audio_dir}; "
+                 f"record the turns it lists (none are shipped, see --help)")
+    print(f"{len(recordings)} recordings x {args.repeat}")
+
+    print(f"{'backend':<10}{'load':>10}{'RTF':>8}{'p50':>10}{'p95':>10}{'WER':>8}")
+    for name in args.backends.split(','):
+        name = name.strip()
+        try:
+            result = run_backend(name, recordings, args.model_path, max(1, args.repeat))
+        except Exception as e:
+            print(f"{name:<10}failed: {e}")
+            continue
+        print(f"{result['backend']:<10}{result['load'] * 1000:>8.0f}ms{result['rtf']:>8.3f}"
+              f"{result['p50'] * 1000:>8.0f}ms{result['p95'] * 1000:>8.0f}ms{result['wer']:>8.1%}")
+        if result['misses']:
+            print(f"  not recognized: {', '.join(sorted(set(result['misses'])))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,503 @@
+"""End-to-end replay of a scripted voice session, fully offline.
+
+Each turn of benchmarks/data/replay_session.json goes through
+VoiceAssistant._process_voice_command with recorded audio in place of the
+microphone: the turn's WAV file is decoded by VoiceRecognizer.audio_from_wav
+inside the capture span, and the Google recognizer is replaced by a lookup
+of the session's transcripts keyed by the decoded audio. Weather requests go
+to a local HTTP server, Q&A to an in-process Wikipedia stand-in and email to
+a fake SMTP connection, all with fixed answers and a fixed --backend-ms delay.
+Turns whose WAV file isn't in --audio-dir are synthesized from the file name,
+so a clean checkout runs without recordings.
+
+The session is played once to load everything, then --repeat more times
+with tracing on. Every pass must produce the same transcripts, intents and
+spoken replies (clock times masked); those and the per-stage p50/p99 are
+compared with benchmarks/data/replay_baseline.json like bench_nlu.py does.
+
+Usage:
+    python benchmarks/bench_replay.py                    # compare with baseline
+    python benchmarks/bench_replay.py --update-baseline  # accept current results
+    python benchmarks/bench_replay.py --audio-dir recordings/
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import logging
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import wave
+import zlib
+from array import array
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+SESSION_PATH = os.path.join(BENCH_DIR, 'data', 'replay_session.json')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'data', 'replay_baseline.json')
+
+STAGES = ('capture', 'recognition', 'classify', 'skill', 'tts', 'command')
+
+# Reminder replies carry the wall-clock time they are due
+CLOCK_TIME = re.compile(r'\b\d{1,2}:\d{2} [AP]M\b')
+
+WIKIPEDIA_ARTICLES = {
+    'Photosynthesis': "Photosynthesis is the process plants use to turn light into chemical energy. "
+                      "It takes place in the chloroplasts. Oxygen is released as a by-product.",
+    'Telephone': "The telephone converts sound into electrical signals and back. "
+                 "Alexander Graham Bell was granted the first patent for it in 1876. "
+                 "Early telephones were connected by operators at exchanges.",
+    'Eiffel Tower': "The Eiffel Tower is a wrought-iron lattice tower in Paris. "
+                    "It was designed by Gustave Eiffel's company and finished in 1889. "
+                    "It is 330 metres tall.",
+}
+
+# Cities the fake weather service knows; anything else is a 404 like OpenWeatherMap's
+WEATHER_CITIES = {
+    'london': ('London', 'GB', 14.2, 'light rain'),
+    'paris': ('Paris', 'FR', 18.5, 'clear sky'),
+}
+
+
+class FakeWikipedia:
+    """Offline stand-in for the wikipedia package with the calls QASkill makes."""
+
+    class exceptions:
+
+        class WikipediaException(Exception):
+            pass
+
+        class PageError(WikipediaException):
+            pass
+
+        class DisambiguationError(WikipediaException):
+
+            def __init__(self, title, options):
+                super().__init__(title)
+                self.options = options
+
+    def __init__(self, articles, delay=0.0):
+
+        self.articles = articles
+        self.delay = delay
+
+    def set_lang(self, language):
+        pass
+
+    def search(self, query, results=10):
+
+        time.sleep(self.delay)
+        words = {word for word in re.findall(r'[a-z]+', query.lower()) if len(word) > 3}
+        scored = [(-len(words & set(title.lower().split())), title) for title in self.articles]
+        return [title for score, title in sorted(scored) if score < 0][:results]
+
+    def summary(self, title, sentences=0):
+
+        time.sleep(self.delay)
+        if title not in self.articles:
+            raise self.exceptions.PageError(title)
+        text = self.articles[title]
+        return ' '.join(re.split(r'(?<=\.) ', text)[:sentences]) if sentences else text
+
+    def random(self, pages=1):
+
+        return sorted(self.articles)[:pages]
+
+
+class FakeSMTP:
+    """Accepts every message into an outbox, with the SMTP calls EmailSkill makes."""
+
+    def __init__(self, outbox, delay=0.0):
+
+        self.outbox = outbox
+        self.delay = delay
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+
+        return False
+
+    def starttls(self):
+
+        time.sleep(self.delay)
+
+    def login(self, user, password):
+        pass
+
+    def sendmail(self, sender, recipient, message):
+
+        self.outbox.append((sender, recipient, len(message)))
+
+    def quit(self):
+        pass
+
+
+class FakeWeatherHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+
+        time.sleep(self.server.delay)
+        city = parse_qs(urlparse(self.path).query).get('q', [''])[0].strip().lower()
+        if city in WEATHER_CITIES:
+            name, country, temperature, description = WEATHER_CITIES[city]
+            status, payload = 200, {
+                'cod': 200, 'name': name, 'sys': {'country': country},
+                'main': {'temp': temperature, 'feels_like': temperature - 1.5, 'humidity': 70, 'pressure': 1012},
+                'weather': [{'description': description}], 'wind': {'speed': 4.1}
+            }
+        else:
+            status, payload = 404, {'cod': '404', 'message': 'city not found'}
+
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_weather_server(delay):
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeWeatherHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, name='fake-weather', daemon=True).start()
+    return server
+
+
+def synthesize_wav(seed, words, sample_rate=16000):
+
+    # A tone per word, pitched from the seed, so every turn has distinct audio
+    # that comes out byte-identical on every run
+    rng = random.Random(zlib.crc32(seed.encode('utf-8')))
+    samples = array('h')
+    for _ in range(max(1, words)):
+        frequency = rng.uniform(150, 900)
+        samples.extend(int(6000 * math.sin(2 * math.pi * frequency * i / sample_rate))
+                       for i in range(sample_rate // 4))
+        samples.extend([0] * (sample_rate // 20))
+    if sys.byteorder == 'big':
+        samples.byteswap()
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def load_turns(session_path, audio_dir):
+
+    with open(session_path, encoding='utf-8') as session_file:
+        turns = json.load(session_file)['turns']
+
+    loaded = []
+    recorded = 0
+    for turn in turns:
+        path = os.path.join(audio_dir, turn['audio']) if audio_dir else None
+        if path and os.path.exists(path):
+            with open(path, 'rb') as wav_file:
+                wav_data = wav_file.read()
+            recorded += 1
+        else:
+            wav_data = synthesize_wav(turn['audio'], len((turn['transcript'] or '').split()) or 3)
+        loaded.append((turn['audio'], wav_data, turn['transcript']))
+    return loaded, recorded
+
+
+def audio_key(audio):
+
+    return hashlib.sha1(audio.get_raw_data()).hexdigest()
+
+
+def build_replay_classes():
+
+    # Imported here, after main() has moved into the scratch directory
+    from recognizer import VoiceRecognizer, _require_speech_recognition
+    from tts import NullTextToSpeech
+
+    sr = _require_speech_recognition()
+
+    class TranscriptLookup:
+        """Takes the place of sr.Recognizer: decodes WAVs, 'recognizes' by lookup."""
+
+        def __init__(self, delay=0.0):
+
+            self.transcripts = {}
+            self.delay = delay
+            self.last_transcript = None
+            self._recognizer = sr.Recognizer()
+
+        def record(self, source, duration=None, offset=None):
+
+            return self._recognizer.record(source, duration=duration, offset=offset)
+
+        def recognize_google(self, audio, show_all=False, **kwargs):
+
+            time.sleep(self.delay)
+            text = self.last_transcript = self.transcripts.get(audio_key(audio))
+            if show_all:
+                # Google's raw response, as GoogleBackend asks for it
+                return {'alternative': [{'transcript': text, 'confidence': 0.95}], 'final': True} if text else []
+            if text is None:
+                raise sr.UnknownValueError()
+            return text
+
+    class ReplayRecognizer(VoiceRecognizer):
+        """VoiceRecognizer that 'listens' to queued WAV files instead of a microphone."""
+
+        def __init__(self, tracer, recognition_delay=0.0):
+
+            super().__init__(tracer=tracer, adaptive=False)
+            self.recognizer = TranscriptLookup(recognition_delay)
+            self.pending = deque()
+
+        def open(self, calibrate=True):
+
+            return None
+
+        def add_transcript(self, wav_data, transcript):
+
+            if transcript is not None:
+                self.recognizer.transcripts[audio_key(self.audio_from_wav(wav_data))] = transcript
+
+        def listen_for_audio(self, timeout=5, phrase_time_limit=10):
+
+            with self.tracer.span('capture'):
+                return self.audio_from_wav(self.pending.popleft())
+
+    class RecordingTextToSpeech(NullTextToSpeech):
+
+        def __init__(self):
+
+            super().__init__()
+            self.said = []
+
+        def speak(self, text):
+
+            self.said.append(text)
+            return super().speak(text)
+
+    return ReplayRecognizer, RecordingTextToSpeech
+
+
+def build_assistant(recognition_delay, backend_delay):
+
+    from main import VoiceAssistant
+    from tracing import Tracer
+    from skills import qa_skill
+    from skills.email_skill import EmailSkill
+    from skills.weather_skill import WeatherSkill
+
+    ReplayRecognizer, RecordingTextToSpeech = build_replay_classes()
+
+    assistant = VoiceAssistant(tts=RecordingTextToSpeech())
+    assistant.tracer = Tracer(enabled=False, capacity=100000)
+    assistant.recognizer = ReplayRecognizer(assistant.tracer, recognition_delay)
+
+    weather_server = start_weather_server(backend_delay)
+    outbox = []
+
+    def weather_factory():
+        skill = WeatherSkill()
+        skill.base_url = f"http://127.0.0.1:{weather_server.server_address[1]}/data/2.5/weather"
+        return skill
+
+    def email_factory():
+        skill = EmailSkill()
+        skill._connect = lambda: FakeSMTP(outbox, backend_delay)
+        return skill
+
+    qa_skill.wikipedia = FakeWikipedia(WIKIPEDIA_ARTICLES, backend_delay)
+    assistant.skills.add_skill('weather_skill', weather_factory)
+    assistant.skills.add_skill('email_skill', email_factory)
+    return assistant, weather_server, outbox
+
+
+def play_session(assistant, turns, seed):
+
+    # Greetings pick a reply at random; the same seed makes every pass say the same
+    random.seed(seed)
+    outputs = []
+    for name, wav_data, transcript in turns:
+        assistant.recognizer.pending.append(wav_data)
+        said_before = len(assistant.tts.said)
+        assistant.recognizer.recognizer.last_transcript = None
+        with contextlib.redirect_stdout(io.StringIO()):
+            assistant._process_voice_command()
+
+        command = next((span for span in reversed(assistant.tracer.spans) if span.stage == 'command'), None)
+        outputs.append({
+            'audio': name,
+            'transcript': assistant.recognizer.recognizer.last_transcript,
+            'intent': command.intent if command else None,
+            'skill': command.skill if command else None,
+            'outcome': command.outcome if command else None,
+            'said': [CLOCK_TIME.sub('<time>', text) for text in assistant.tts.said[said_before:]]
+        })
+    return outputs
+
+
+def run(turns, repeat, recognition_delay, backend_delay, verbose):
+
+    assistant, weather_server, outbox = build_assistant(recognition_delay, backend_delay)
+    for name, wav_data, transcript in turns:
+        assistant.recognizer.add_transcript(wav_data, transcript)
+
+    try:
+        # The first pass builds the classifier and skills; only later passes are timed
+        assistant.tracer.enabled = True
+        start = time.perf_counter()
+        first = play_session(assistant, turns, seed=0)
+        cold_seconds = time.perf_counter() - start
+        assistant.tracer.clear()
+
+        passes = []
+        start = time.perf_counter()
+        for _ in range(repeat):
+            passes.append(play_session(assistant, turns, seed=0))
+        warm_seconds = (time.perf_counter() - start) / max(1, repeat)
+
+        summary = assistant.tracer.summary()
+        if verbose:
+            print(assistant.tracer.format_summary())
+    finally:
+        assistant.stop()
+        assistant.recognizer.close()
+        weather_server.shutdown()
+
+    return {
+        'turns': len(turns),
+        'repeat': repeat,
+        'cold_session_ms': cold_seconds * 1000,
+        'warm_session_ms': warm_seconds * 1000,
+        'emails_sent': len(outbox),
+        'stages': {stage: {key: summary[stage][key] for key in ('count', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms')}
+                   for stage in STAGES if stage in summary},
+        'outputs': first,
+        'deterministic': all(outputs == first for outputs in passes)
+    }
+
+
+def compare(result, baseline, tolerance, slack_ms):
+
+    failures = []
+
+    if not result['deterministic']:
+        failures.append("outputs differ between passes of the same run")
+
+    baseline_outputs = {output['audio']: output for output in baseline['outputs']}
+    for output in result['outputs']:
+        base = baseline_outputs.get(output['audio'])
+        if base is None:
+            failures.append(f"{output['audio']} is not in the baseline; regenerate it")
+        elif base != output:
+            failures.append(f"{output['audio']} changed: {base} -> {output}")
+    if len(baseline_outputs) != len(result['outputs']):
+        failures.append("session and baseline have different turns; regenerate the baseline")
+
+    for stage, stats in result['stages'].items():
+        base = baseline['stages'].get(stage)
+        if not base:
+            continue
+        for key in ('p50_ms', 'p99_ms'):
+            # The slack keeps sub-millisecond scheduler noise from failing the run
+            if stats[key] > base[key] * tolerance + slack_ms:
+                failures.append(f"{stage} {key} regressed: {base[key]:.2f} -> {stats[key]:.2f}")
+
+    return failures
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--session', default=SESSION_PATH)
+    parser.add_argument('--audio-dir', help='directory with the recorded WAV files the session names')
+    parser.add_argument('--repeat', type=int, default=5, help='timed passes over the session')
+    parser.add_argument('--recognition-ms', type=float, default=0.0, help='fixed delay of the recognizer stub')
+    parser.add_argument('--backend-ms', type=float, default=0.0, help='fixed delay of each fake backend call')
+    parser.add_argument('--tolerance', type=float, default=1.5, help='allowed latency ratio over baseline')
+    parser.add_argument('--slack-ms', type=float, default=1.0, help='absolute latency slack added to the ratio')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--verbose', action='store_true', help='keep INFO logging and print the histograms')
+    args = parser.parse_args()
+
+    session_path = os.path.abspath(args.session)
+    audio_dir = os.path.abspath(args.audio_dir) if args.audio_dir else None
+    baseline_path = os.path.abspath(args.baseline)
+    turns, recorded = load_turns(session_path, audio_dir)
+
+    # Reminders, the log file and anything else the assistant writes to the
+    # working directory land in a scratch directory. Credentials only need to
+    # pass validation; every backend is fake
+    for name in ('SMTP_USER', 'SMTP_PASS', 'OPENWEATHER_API_KEY'):
+        os.environ.setdefault(name, 'replay')
+    os.environ['NO_PROXY'] = '127.0.0.1,localhost'
+
+    with tempfile.TemporaryDirectory(prefix='replay-') as scratch:
+        os.chdir(scratch)
+        import main as assistant_main  # noqa: F401  (configures logging in the scratch directory)
+        # The script fails some commands on purpose (unintelligible audio, an
+        # unknown city); their outcome is checked through the outputs instead
+        if not args.verbose:
+            logging.getLogger().setLevel(logging.CRITICAL)
+        result = run(turns, args.repeat, args.recognition_ms / 1000, args.backend_ms / 1000, args.verbose)
+        os.chdir(REPO_DIR)
+
+    print(f"{result['turns']} turns ({recorded} recorded, {result['turns'] - recorded} synthesized), "
+          f"{result['repeat']} timed passes; session {result['cold_session_ms']:.0f} ms cold, "
+          f"{result['warm_session_ms']:.1f} ms warm")
+    print(f"{'':14}{'count':>7}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for stage, stats in result['stages'].items():
+        print(f"{stage:14}{stats['count']:7}{stats['p50_ms']:9.2f}{stats['p90_ms']:9.2f}"
+              f"{stats['p99_ms']:9.2f}{stats['max_ms']:9.2f}")
+
+    if args.update_baseline:
+        if not result['deterministic']:
+            print("\nOutputs differ between passes; not writing a baseline")
+            sys.exit(1)
+        with open(baseline_path, 'w', encoding='utf-8') as baseline_file:
+            json.dump(result, baseline_file, indent=1, sort_keys=True)
+        print(f"\nBaseline written to {baseline_path}")
+        return
+
+    if not os.path.exists(baseline_path):
+        print(f"\nNo baseline at {baseline_path}; run with --update-baseline first")
+        sys.exit(2)
+
+    with open(baseline_path, encoding='utf-8') as baseline_file:
+        baseline = json.load(baseline_file)
+
+    failures = compare(result, baseline, args.tolerance, args.slack_ms)
+    if failures:
+        print("\nFAILED against baseline:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+    print("\nOK: outputs identical, stage latency within tolerance of baseline")
+
+
+if __name__ == '__main__':
+    main()
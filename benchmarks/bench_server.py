@@ -0,0 +1,152 @@
+"""Load generator for server.py: many concurrent sessions sending commands.
+
+Each simulated client opens its own connection (one session) and sends its
+share of the corpus one command at a time, waiting for each reply, the way
+a kiosk would. Reports request latency percentiles and throughput at that
+concurrency. Pass --spawn to start a server for the run.
+
+Usage:
+    python benchmarks/bench_server.py --sessions 200 --commands 20 [--spawn]
+    python benchmarks/bench_server.py --unix /tmp/vishnu.sock
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from corpus import generate_corpus
+
+# Commands with side effects outside the process (launching programs, opening
+# the browser, sending mail) or that end the session are left out
+SAFE_INTENTS = ('greeting', 'reminder', 'qa', 'weather')
+
+
+async def open_connection(args):
+
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix, limit=2 ** 20)
+    return await asyncio.open_connection(args.host, args.port, limit=2 ** 20)
+
+
+async def run_session(args, commands, latencies, errors, start_gate):
+
+    await start_gate.wait()
+    try:
+        reader, writer = await open_connection(args)
+    except OSError as e:
+        errors.append(f"connect: {e}")
+        return
+
+    try:
+        welcome = json.loads(await reader.readline())
+        if 'error' in welcome:
+            errors.append(welcome['error'])
+            return
+
+        for number, text in enumerate(commands):
+            start = time.perf_counter()
+            writer.write(json.dumps({'id': number, 'text': text}).encode('utf-8') + b'\n')
+            await writer.drain()
+            line = await reader.readline()
+            if not line:
+                errors.append("connection closed")
+                return
+            reply = json.loads(line)
+            latencies.append(time.perf_counter() - start)
+            if 'error' in reply:
+                errors.append(reply['error'])
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def wait_for_server(args, timeout=30):
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await open_connection(args)
+            await reader.readline()
+            writer.close()
+            await writer.wait_closed()
+            return True
+        except OSError:
+            await asyncio.sleep(0.2)
+    return False
+
+
+async def run(args):
+
+    corpus = [text for text, intent in generate_corpus(args.sessions * args.commands // len(SAFE_INTENTS) + 1)
+              if intent in SAFE_INTENTS]
+    plans = [corpus[i * args.commands:(i + 1) * args.commands] for i in range(args.sessions)]
+
+    latencies = []
+    errors = []
+    start_gate = asyncio.Event()
+    tasks = [asyncio.create_task(run_session(args, plan, latencies, errors, start_gate)) for plan in plans]
+
+    start = time.perf_counter()
+    start_gate.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    if not latencies:
+        print("No replies received")
+        for error in errors[:5]:
+            print(f"  {error}")
+        return False
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    print(f"{args.sessions} sessions x {args.commands} commands: {len(latencies)} replies in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.0f} req/s), {len(errors)} errors")
+    print(f"latency ms: mean {statistics.mean(ms):.1f}, p50 {ms[len(ms) // 2]:.1f}, "
+          f"p95 {ms[int(0.95 * (len(ms) - 1))]:.1f}, p99 {ms[int(0.99 * (len(ms) - 1))]:.1f}, max {ms[-1]:.1f}")
+    for error in sorted(set(errors))[:5]:
+        print(f"  error: {error}")
+    return not errors
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH')
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--commands', type=int, default=20, help='commands per session')
+    parser.add_argument('--spawn', action='store_true', help='start server.py for the duration of the run')
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        command = [sys.executable, os.path.join(REPO_DIR, 'server.py'), '--log-level', 'WARNING',
+                   '--max-sessions', str(args.sessions + 10)]
+        command += ['--unix', args.unix] if args.unix else ['--host', args.host, '--port', str(args.port)]
+        server = subprocess.Popen(command, cwd=REPO_DIR)
+
+    try:
+        if server and not asyncio.run(wait_for_server(args)):
+            print("Server did not start")
+            sys.exit(1)
+        ok = asyncio.run(run(args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
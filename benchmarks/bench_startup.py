@@ -0,0 +1,99 @@
+"""Measure assistant startup: import cost per module and time to first listen.
+
+Each run starts a fresh interpreter. The import breakdown comes from
+`python -X importtime -c "import main"`. The first-listen runs build a
+VoiceAssistant and call start(), which speaks the welcome message and stops
+the moment the microphone is ready for the first command. Runs need the full
+environment (microphone, TTS voice, .env) and will speak the welcome out loud.
+
+Usage: python benchmarks/bench_startup.py [--runs 3] [--top 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_LISTEN_SCRIPT = r'''
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+assistant = main.VoiceAssistant()
+built = time.perf_counter()
+
+def first_listen(*args, **kwargs):
+    # Same wait a real listen has: the microphone may still be opening
+    assistant._log_first_listen()
+    assistant.stop()
+    return None
+
+assistant.recognizer.listen_for_audio = first_listen
+assistant.start()
+
+timings = {'import': imported - start, 'init': built - imported}
+timings.update({f"assistant_{stage}": seconds for stage, seconds in assistant.startup_timings.items()})
+print("STARTUP " + json.dumps(timings))
+'''
+
+
+def import_breakdown(top):
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                            cwd=REPO_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stderr.strip().splitlines()[-1])
+        return None
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+    # Top-level imports of main (two-space indent) add up to the total
+    total = sum(cumulative for cumulative, _, name in modules if name == ' main')
+    print(f"import main: {total / 1000:.1f} ms")
+    print(f"{'cumulative ms':>14}{'self ms':>9}  module")
+    for cumulative, self_us, name in sorted(modules, reverse=True)[:top]:
+        print(f"{cumulative / 1000:14.1f}{self_us / 1000:9.1f}  {name}")
+    return total
+
+
+def first_listen_run():
+
+    result = subprocess.run([sys.executable, '-c', FIRST_LISTEN_SCRIPT], cwd=REPO_DIR, capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        if line.startswith('STARTUP '):
+            return json.loads(line[len('STARTUP '):])
+
+    print(result.stderr.strip()[-2000:])
+    return None
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15, help='slowest imports to list')
+    args = parser.parse_args()
+
+    if import_breakdown(args.top) is None:
+        sys.exit(1)
+
+    runs = [timings for timings in (first_listen_run() for _ in range(args.runs)) if timings]
+    if not runs:
+        sys.exit(1)
+
+    print(f"\nMedian of {len(runs)} runs:")
+    for stage in runs[0]:
+        print(f"  {stage:28}{statistics.median(run[stage] for run in runs) * 1000:9.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
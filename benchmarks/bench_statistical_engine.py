@@ -0,0 +1,96 @@
+"""Train StatisticalIntentEngine and compare it with the regex engine.
+
+Both engines classify a test set generated from templates the statistical
+engine never trained on (and its temperature is fitted on templates held
+out of the counts), so the scores measure how it handles new phrasings.
+The script reports accuracy, throughput, calibration and model load time.
+Pass --save to keep the trained model; the one NLU_ENGINE=statistical uses
+is trained with python -m nlu train.
+
+Usage: python benchmarks/bench_statistical_engine.py [--per-intent N] [--save PATH]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import numpy as np
+
+from nlu import IntentClassifier, StatisticalIntentEngine
+from corpus import generate_split
+
+
+def expected_calibration_error(confidences, correct, bins=10):
+
+    confidences = np.asarray(confidences)
+    correct = np.asarray(correct, dtype=float)
+    edges = np.linspace(0, 1, bins + 1)
+    error = 0.0
+    for low, high in zip(edges[:-1], edges[1:]):
+        in_bin = (confidences > low) & (confidences <= high)
+        if in_bin.any():
+            error += in_bin.mean() * abs(confidences[in_bin].mean() - correct[in_bin].mean())
+    return error
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--per-intent', type=int, default=1000)
+    parser.add_argument('--save', help='where to write the trained .npz model')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    train, test = generate_split(args.per_intent)
+    texts = [text for text, _, _ in test]
+    labels = [label for _, label, _ in test]
+
+    start = time.perf_counter()
+    engine = StatisticalIntentEngine().fit([text for text, _, _ in train], [label for _, label, _ in train],
+                                           groups=[template for _, _, template in train])
+    fit_s = time.perf_counter() - start
+
+    path = args.save or os.path.join(tempfile.mkdtemp(), 'intent_model.npz')
+    engine.save(path)
+    start = time.perf_counter()
+    engine = StatisticalIntentEngine.load(path)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    regex = IntentClassifier()
+    start = time.perf_counter()
+    regex_results = [regex.matcher.first_match(text.lower())[0] or 'qa' for text in texts]
+    regex_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions = engine.predict(texts)
+    statistical_s = time.perf_counter() - start
+
+    regex_correct = [result == label for result, label in zip(regex_results, labels)]
+    statistical_correct = [intent == label for (intent, _), label in zip(predictions, labels)]
+    ece = expected_calibration_error([confidence for _, confidence in predictions], statistical_correct)
+
+    print(f"{len(train)} training / {len(test)} test utterances, fit {fit_s:.2f}s, "
+          f"model {os.path.getsize(path) / 1024:.0f} KiB loads in {load_ms:.1f} ms (T={engine.temperature:.2f})")
+    print(f"{'':14}{'accuracy':>10}{'utt/s':>12}")
+    print(f"{'regex':14}{np.mean(regex_correct):10.3f}{len(texts) / regex_s:12.0f}")
+    print(f"{'statistical':14}{np.mean(statistical_correct):10.3f}{len(texts) / statistical_s:12.0f}")
+    print(f"statistical expected calibration error: {ece:.3f}")
+
+    misses = [(text, label, result) for text, label, result in zip(texts, labels, regex_results) if result != label]
+    if misses:
+        print("\nSample regex misses:")
+        for text, label, result in sorted(set(misses))[:8]:
+            print(f"  {text!r}: expected {label}, regex says {result}")
+
+    if args.save:
+        print(f"\nSaved model to {path}")
+
+
+if __name__ == '__main__':
+    main()
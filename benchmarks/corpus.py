@@ -0,0 +1,194 @@
+"""Deterministic labeled utterance corpus for the NLU benchmarks.
+
+Utterances are generated from templates with slot fillers, so the corpus
+is reproducible from a seed and labels are the intent the speaker meant,
+not whatever the regex engine happens to answer.
+"""
+import os
+import random
+
+SLOTS = {
+    'name': ['john', 'priya', 'arun', 'alice', 'bob', 'ravi', 'sara', 'mike', 'anna', 'kumar'],
+    'provider': ['gmail', 'yahoo', 'hotmail', 'outlook', 'icloud', 'live'],
+    'topic': ['the meeting', 'lunch tomorrow', 'the project deadline', 'my leave request',
+              'the weekend trip', 'the invoice', 'dinner plans', 'the quarterly report'],
+    'task': ['call mom', 'take my medicine', 'join the standup', 'buy milk', 'water the plants',
+             'check the oven', 'submit the report', 'pick up the kids', 'stretch'],
+    'number': ['2', '5', '10', '15', '20', '30', '45'],
+    'unit': ['minutes', 'minute', 'mins', 'hours', 'hour', 'hrs'],
+    'city': ['chennai', 'london', 'paris', 'new york', 'tokyo', 'mumbai', 'bangalore', 'delhi', 'sydney'],
+    'app': ['notepad', 'chrome', 'calculator', 'paint', 'firefox', 'task manager', 'settings', 'vscode'],
+    'song': ['despacito', 'shape of you', 'believer', 'perfect', 'bohemian rhapsody', 'kesariya'],
+    'video': ['cat videos', 'cooking tutorials', 'python lessons', 'cricket highlights'],
+    'query': ['python tutorials', 'latest news', 'best pizza near me', 'flight status', 'stock prices'],
+    'thing': ['the eiffel tower', 'black holes', 'photosynthesis', 'the roman empire',
+              'machine learning', 'mount everest', 'the great wall of china', 'gravity'],
+    'person': ['albert einstein', 'the president of india', 'isaac newton', 'marie curie', 'sachin tendulkar'],
+    'hour': ['5', '7', '9', '11', '12'],
+    'company': ['infosys', 'acme', 'example', 'contoso', 'globex'],
+    'typo': ['gmial', 'out look', 'hotmial', 'g mail', 'yaho'],
+}
+
+TEMPLATES = {
+    'reminder': [
+        'remind me to {task} in {number} {unit}',
+        'set a reminder to {task} in {number} {unit}',
+        'remind me in {number} {unit} to {task}',
+        '{task} reminder in {number} {unit}',
+        'set alarm for {number} {unit} from now',
+        'create reminder {task} {number} {unit} from now',
+        'can you remind me to {task}',
+        'alert me in {number} {unit} to {task}',
+        'notify me to {task} in {number} {unit}',
+        'remind me at {hour} pm to {task}',
+        'set alarm at {hour}:30 am',
+        'remind me to {task}',
+        'set reminder',
+    ],
+    'email': [
+        'send email to {name} at {provider} dot com about {topic}',
+        'send email to {name} at {provider}.com regarding {topic}',
+        'compose email to {name} add {provider} dot com about {topic}',
+        'write email to {name} and {provider} dot com subject {topic}',
+        'email to {name} at {provider} dot com about {topic}',
+        'send email to {name}@{provider}.com about {topic}',
+        'mail to {name} at {provider} dot com about {topic}',
+        'message to {name} at the rate {provider} dot com regarding {topic}',
+        'send email to {name} dot {name} at {provider} dot com about {topic}',
+        'send email to {name} {name} at {provider} dot com about {topic}',
+        'send email to {name} at {company} dot co dot uk regarding {topic}',
+        'send email to {name} at {typo} dot com about {topic}',
+        'send email to {name} underscore {name} at {provider} dot com with subject {topic}',
+        'compose email to {name} about {topic}',
+        'send email to the team',
+        'email to {name} at {provider} dot com message {topic}',
+        'write email to {name} at {provider}.com body please call me back',
+    ],
+    'weather': [
+        "what's the weather in {city}",
+        'weather in {city}',
+        'what is the temperature in {city}',
+        'tell me the forecast for {city}',
+        'how many degrees is it in {city}',
+        'weather for {city} today',
+        'climate in {city} this week',
+        'weather at {city}',
+        'what is the weather like',
+        'temperature',
+    ],
+    'system': [
+        'open {app}',
+        'launch {app}',
+        'start {app}',
+        'play {song} song',
+        'play {video}',
+        'play videos in youtube {video}',
+        'watch {video}',
+        'search for {query}',
+        'google {query}',
+        'listen to {song}',
+        'exit',
+        'quit',
+        'stop listening',
+        'shutdown the assistant',
+        'turn off',
+        'run {app}',
+        'play youtube {video}',
+        'watch youtube {video}',
+        'play song {song}',
+        'google {query} and close it',
+        'close the window',
+        'stop',
+        'search',
+        'open',
+        'bye, exit now',
+    ],
+    'greeting': [
+        'good morning',
+        'good afternoon',
+        'good evening',
+        'good night',
+        'hello',
+        'hello there',
+        'hi',
+        'hi there',
+        'hey',
+        'howdy',
+        'greetings',
+        'namaste',
+        "what's up",
+    ],
+    'qa': [
+        'who is {person}',
+        'what is {thing}',
+        'tell me about {thing}',
+        'how tall is {thing}',
+        'explain {thing}',
+        'what time is it',
+        'what is your name',
+        'who made you',
+        'what is the date today',
+        'who invented the alarm clock',
+        'how does a search engine work',
+        'what causes climate change',
+        'who wrote the play hamlet',
+        'why do we say good morning',
+    ],
+}
+
+
+def load_spoken_emails(path=None):
+
+    # Misrecognized addresses used by bench_email_reconstruction.py
+    path = path or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'spoken_emails.tsv')
+    utterances = []
+    with open(path, encoding='utf-8') as corpus_file:
+        for line in corpus_file:
+            if line.strip() and not line.startswith('#'):
+                utterances.append(line.split('\t', 1)[0])
+    return utterances
+
+
+def fill(template, rng):
+
+    text = template
+    while '{' in text:
+        start = text.index('{')
+        end = text.index('}', start)
+        slot = text[start + 1:end]
+        text = text[:start] + rng.choice(SLOTS[slot]) + text[end + 1:]
+    return text
+
+
+def generate_corpus(per_intent=500, seed=7):
+
+    rng = random.Random(seed)
+    corpus = []
+    for intent, templates in TEMPLATES.items():
+        for _ in range(per_intent):
+            corpus.append((fill(rng.choice(templates), rng), intent))
+    rng.shuffle(corpus)
+    return corpus
+
+
+def generate_split(per_intent=500, seed=7, test_fraction=0.2):
+
+    # Train and test sets that share no template: test_fraction of each
+    # intent's templates (at least one, none for 0) only ever appear in the
+    # test set, so a model is scored on phrasings it never saw. Items are
+    # (text, intent, template) where template names the template the text
+    # came from
+    rng = random.Random(seed)
+    train, test = [], []
+    for intent, templates in TEMPLATES.items():
+        order = list(range(len(templates)))
+        rng.shuffle(order)
+        held_out = max(1, round(len(templates) * test_fraction)) if test_fraction else 0
+        for part, indices, count in ((test, order[:held_out], round(per_intent * test_fraction)),
+                                     (train, order[held_out:], per_intent - round(per_intent * test_fraction))):
+            for _ in range(count):
+                index = rng.choice(indices)
+                part.append((fill(templates[index], rng), intent, f"{intent}:{index}"))
+    rng.shuffle(train)
+    rng.shuffle(test)
+    return train, test
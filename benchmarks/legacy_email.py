@@ -0,0 +1,329 @@
+"""Frozen copy of the eight-method email reconstruction cascade.
+
+Kept only so bench_email_reconstruction.py can compare SpokenEmailParser
+against the behaviour and cost of the code it replaced.
+"""
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LegacyEmailReconstructor:
+
+    def _reconstruct_email_from_speech(self, text):
+       
+        text_lower = text.lower()
+        logger.info(f"Attempting to reconstruct email from: '{text}'")
+
+        # Common speech recognition errors for @ symbol
+        at_replacements = [' at ', ' add ', ' and ', ' et ', ' @ ', ' at', ' add', ' and', ' et', ' @']
+
+        # Common email domains that might be mentioned separately
+        common_domains = [
+            'gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'aol.com',
+            'icloud.com', 'protonmail.com', 'mail.com', 'yandex.com', 'zoho.com',
+            'inbox.com', 'live.com', 'msn.com', 'me.com', 'mac.com'
+        ]
+
+        # Method 1: Handle "username at domain" patterns
+        for replacement in at_replacements:
+            if replacement in text_lower:
+                parts = text_lower.split(replacement, 1)
+                if len(parts) == 2:
+                    username_part = parts[0].strip()
+                    domain_part = parts[1].strip()
+
+                    # Extract username from the end of the first part (most likely the actual username)
+                    username_words = username_part.split()
+                    if username_words:
+                        # Skip command words and take the last meaningful word as username
+                        command_words = ['email', 'send', 'compose', 'write', 'mail', 'message', 'to']
+                        meaningful_words = [word for word in username_words if word not in command_words]
+
+                        if meaningful_words:
+                            # Take the last meaningful word as the username
+                            potential_username = meaningful_words[-1]
+                            # Clean up the username
+                            username = re.sub(r'[^\w.]', '', potential_username).strip('.')
+
+                            # Try to extract domain from domain part
+                            domain = self._extract_domain_from_text(domain_part, common_domains)
+
+                            if username and domain:
+                                reconstructed = f"{username}@{domain}"
+                                logger.info(f"Reconstructed email: {username}@{domain} from '{username_part}' + '{replacement}' + '{domain_part}'")
+                                return reconstructed
+
+                        # If no meaningful words found, try to reconstruct from the entire username part
+                        # This handles cases like "john doe" where we need to combine words
+                        if len(username_words) >= 2:
+                            # Look for patterns like "firstname lastname" and combine them
+                            # Skip command words and combine the remaining words
+                            non_command_words = [word for word in username_words if word not in command_words]
+                            if len(non_command_words) >= 2:
+                                # Combine the last two non-command words (e.g., "john doe" -> "johndoe")
+                                combined_username = ''.join(non_command_words[-2:])
+                                username = re.sub(r'[^\w.]', '', combined_username).strip('.')
+
+                                domain = self._extract_domain_from_text(domain_part, common_domains)
+
+                                if username and domain:
+                                    reconstructed = f"{username}@{domain}"
+                                    logger.info(f"Reconstructed email from combined words: {username}@{domain}")
+                                    return reconstructed
+
+        # Method 2: Handle "username domain" patterns (missing @)
+        words = text_lower.split()
+        for i, word in enumerate(words):
+            # Look for potential username followed by domain parts
+            if i < len(words) - 1:
+                # Skip common email command words
+                skip_words = ['email', 'send', 'compose', 'write', 'mail', 'message', 'to']
+                if word in skip_words:
+                    continue
+
+                potential_username = re.sub(r'[^\w.]', '', word).strip('.')
+                remaining_text = ' '.join(words[i+1:])
+
+                # Check if remaining text contains domain-like words
+                for domain in common_domains:
+                    domain_parts = domain.split('.')
+                    if len(domain_parts) >= 2:
+                        # Check if domain parts appear in remaining text
+                        domain_found = True
+                        for part in domain_parts:
+                            if part not in remaining_text:
+                                domain_found = False
+                                break
+
+                        if domain_found and potential_username:
+                            reconstructed = f"{potential_username}@{domain}"
+                            logger.info(f"Reconstructed email from word pattern: {reconstructed}")
+                            return reconstructed
+
+        # Method 3: Handle cases where domain appears before username
+        # Look for domain patterns first, then find username before it
+        for domain in common_domains:
+            domain_parts = domain.split('.')
+            if len(domain_parts) >= 2:
+                # Check if domain parts appear in the text
+                domain_found = True
+                for part in domain_parts:
+                    if part not in text_lower:
+                        domain_found = False
+                        break
+
+                if domain_found:
+                    # Find the word before the domain
+                    domain_pos = text_lower.find(domain_parts[0])
+                    if domain_pos > 0:
+                        # Get text before domain
+                        before_domain = text_lower[:domain_pos].strip()
+                        before_words = before_domain.split()
+
+                        if before_words:
+                            # Take the last word before domain as username
+                            potential_username = before_words[-1]
+                            username = re.sub(r'[^\w.]', '', potential_username).strip('.')
+
+                            if username:
+                                reconstructed = f"{username}@{domain}"
+                                logger.info(f"Reconstructed email from domain-first pattern: {reconstructed}")
+                                return reconstructed
+
+        # Method 4: Enhanced pattern matching for complex cases
+        # Look for patterns like "to X at Y" where X is the username
+        patterns = [
+            r'\bto\s+([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+at\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+            r'\bto\s+([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+add\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+            r'\bto\s+([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+and\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
+        ]
+
+        for pattern in patterns:
+            match = re.search(pattern, text_lower, re.IGNORECASE)
+            if match:
+                username_part = match.group(1).strip()
+                domain_part = match.group(2).strip()
+
+                # Clean username (remove spaces and special chars)
+                username = re.sub(r'[^\w.]', '', username_part.replace(' ', '')).strip('.')
+
+                # Check if domain is in our common domains list
+                domain = None
+                for common_domain in common_domains:
+                    if common_domain in domain_part:
+                        domain = common_domain
+                        break
+
+                if not domain:
+                    domain = domain_part  # Use as-is if not in common list
+
+                if username and domain:
+                    reconstructed = f"{username}@{domain}"
+                    logger.info(f"Reconstructed email from enhanced pattern: {reconstructed}")
+                    return reconstructed
+
+        # Method 5: More flexible pattern matching for edge cases
+        # Handle cases where the command words are interfering
+        flexible_patterns = [
+            r'\b([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+at\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+            r'\b([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+add\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+            r'\b([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+and\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
+        ]
+
+        for pattern in flexible_patterns:
+            match = re.search(pattern, text_lower, re.IGNORECASE)
+            if match:
+                username_part = match.group(1).strip()
+                domain_part = match.group(2).strip()
+
+                # Skip if this looks like a command word
+                command_indicators = ['email', 'send', 'compose', 'write', 'mail', 'message']
+                if username_part in command_indicators:
+                    continue
+
+                # Clean username (remove spaces and special chars)
+                username = re.sub(r'[^\w.]', '', username_part.replace(' ', '')).strip('.')
+
+                # Check if domain is in our common domains list
+                domain = None
+                for common_domain in common_domains:
+                    if common_domain in domain_part:
+                        domain = common_domain
+                        break
+
+                if not domain:
+                    domain = domain_part  # Use as-is if not in common list
+
+                if username and domain and len(username) > 1:
+                    reconstructed = f"{username}@{domain}"
+                    logger.info(f"Reconstructed email from flexible pattern: {reconstructed}")
+                    return reconstructed
+
+        # Method 6: Last resort - try to find any word + domain pattern
+        # This is a fallback for cases where other methods fail
+        logger.info("Trying last resort method...")
+        words = text_lower.split()
+        for i, word in enumerate(words):
+            # Skip command words
+            if word in ['email', 'send', 'compose', 'write', 'mail', 'message', 'to']:
+                continue
+
+            # Check if this word could be a username (not a domain part)
+            if not any(domain_part in word for domain_part in ['.com', '.org', '.net', '.edu', '.gov']):
+                # Look ahead for domain-like words
+                for j in range(i + 1, min(i + 3, len(words))):  # Look at next 2 words
+                    potential_domain = words[j]
+                    # Check if it looks like a domain
+                    if '.' in potential_domain and len(potential_domain) > 3:
+                        # Check if domain is in our common domains list
+                        domain = None
+                        for common_domain in common_domains:
+                            if common_domain in potential_domain:
+                                domain = common_domain
+                                break
+
+                        if not domain:
+                            domain = potential_domain  # Use as-is if not in common list
+
+                        if domain:
+                            username = re.sub(r'[^\w.]', '', word).strip('.')
+                            if username and len(username) > 1:
+                                reconstructed = f"{username}@{domain}"
+                                logger.info(f"Reconstructed email from last resort pattern: {reconstructed}")
+                                return reconstructed
+
+        # Method 7: Ultimate fallback - look for any pattern that might work
+        logger.info("Trying ultimate fallback method...")
+        # Try to find patterns like "X at Y" or "X add Y" anywhere in the text
+        ultimate_patterns = [
+            r'(\w+)\s+at\s+(\w+\.\w+)',
+            r'(\w+)\s+add\s+(\w+\.\w+)',
+            r'(\w+)\s+and\s+(\w+\.\w+)'
+        ]
+
+        for pattern in ultimate_patterns:
+            match = re.search(pattern, text_lower, re.IGNORECASE)
+            if match:
+                username = match.group(1).strip()
+                domain = match.group(2).strip()
+
+                # Skip if username looks like a command word
+                if username not in ['email', 'send', 'compose', 'write', 'mail', 'message', 'to']:
+                    # Check if domain is in our common domains list
+                    actual_domain = None
+                    for common_domain in common_domains:
+                        if common_domain in domain:
+                            actual_domain = common_domain
+                            break
+
+                    if not actual_domain:
+                        actual_domain = domain  # Use as-is if not in common list
+
+                    if username and actual_domain and len(username) > 1:
+                        reconstructed = f"{username}@{actual_domain}"
+                        logger.info(f"Reconstructed email from ultimate fallback: {reconstructed}")
+                        return reconstructed
+
+        # Method 8: Debug the specific failing cases
+        logger.info("Trying debug method for specific failing cases...")
+        # For "send email to john doe at company.com" - the issue is "john doe" should become "johndoe"
+        # Let's try a more specific approach for multi-word usernames
+        debug_patterns = [
+            r'\bto\s+([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+at\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+            r'\bto\s+([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+add\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+            r'\bto\s+([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+and\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
+        ]
+
+        for pattern in debug_patterns:
+            match = re.search(pattern, text_lower, re.IGNORECASE)
+            if match:
+                username_part = match.group(1).strip()
+                domain_part = match.group(2).strip()
+
+                logger.info(f"Debug pattern matched: username_part='{username_part}', domain_part='{domain_part}'")
+
+                # Clean username (remove spaces and special chars)
+                username = re.sub(r'[^\w.]', '', username_part.replace(' ', '')).strip('.')
+
+                # Check if domain is in our common domains list
+                domain = None
+                for common_domain in common_domains:
+                    if common_domain in domain_part:
+                        domain = common_domain
+                        break
+
+                if not domain:
+                    domain = domain_part  # Use as-is if not in common list
+
+                if username and domain and len(username) > 1:
+                    reconstructed = f"{username}@{domain}"
+                    logger.info(f"Reconstructed email from debug pattern: {reconstructed}")
+                    return reconstructed
+
+        return None
+
+    def _extract_domain_from_text(self, text, common_domains):
+    
+        text_lower = text.lower()
+
+        # First try exact matches
+        for domain in common_domains:
+            if domain in text_lower:
+                return domain
+
+        # Try partial matches (e.g., "gmail" -> "gmail.com")
+        domain_starters = {}
+        for domain in common_domains:
+            main_part = domain.split('.')[0]
+            if main_part in domain_starters:
+                domain_starters[main_part].append(domain)
+            else:
+                domain_starters[main_part] = [domain]
+
+        for starter, domains in domain_starters.items():
+            if starter in text_lower:
+                # Return the most common domain for this starter
+                return domains[0]  # Usually gmail.com, yahoo.com, etc.
+
+        return None
@@ -13,6 +13,96 @@ SMTP_PASS = os.getenv('SMTP_PASS')
 # OpenWeatherMap API configuration
 OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY')
 
+# Email domain lexicon (one domain per line); defaults to data/domains.txt
+DOMAIN_LEXICON_PATH = os.getenv('DOMAIN_LEXICON_PATH')
+
+# Number of recent utterances whose NLU results are memoized (0 disables)
+NLU_CACHE_SIZE = int(os.getenv('NLU_CACHE_SIZE', 256))
+
+# Intent engine: 'regex' or 'statistical' (needs numpy and a trained .npz
+# model). A model trained on the benchmark corpus ships as
+# data/intent_model.npz; retrain it, or train one on your own "text<TAB>intent"
+# file, with: python -m nlu train [--data TSV] [--out PATH]. NLU_MODEL_PATH
+# defaults to data/intent_model.npz
+NLU_ENGINE = os.getenv('NLU_ENGINE', 'regex')
+NLU_MODEL_PATH = os.getenv('NLU_MODEL_PATH')
+
+# Logging runs on a background thread (see logging_setup.py). The file rotates
+# at LOG_MAX_BYTES; LOG_JSON writes it as JSON lines; LOG_SAMPLING keeps only a
+# fraction of the INFO records of chatty loggers, e.g. "nlu=0.1,recognizer=0.5"
+LOG_PATH = os.getenv('LOG_PATH', 'voice_assistant.log')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 5 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 3))
+LOG_JSON = os.getenv('LOG_JSON', 'false').lower() in ('1', 'true', 'yes')
+LOG_SAMPLING = os.getenv('LOG_SAMPLING', 'nlu=0.1')
+
+# Per-stage timing spans (capture, recognition, classify, skill, tts) kept in memory
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE', 2000))
+
+# Microphone calibration is measured once, saved here and reused on the next
+# start; the threshold then adapts to the room between utterances
+MIC_CALIBRATION_PATH = os.getenv('MIC_CALIBRATION_PATH', 'mic_calibration.json')
+MIC_ADAPTIVE_CALIBRATION = os.getenv('MIC_ADAPTIVE_CALIBRATION', 'true').lower() in ('1', 'true', 'yes')
+MIC_ADAPT_INTERVAL = float(os.getenv('MIC_ADAPT_INTERVAL', 2.0))
+
+# Streaming capture: the microphone is read continuously and utterances end
+# on voice activity (needs numpy). MIC_ENDPOINT_SILENCE is the shortest pause
+# that ends one; it lengthens for speakers who pause more. Utterances are
+# only cut at MIC_MAX_UTTERANCE seconds. The last MIC_RING_SECONDS of audio
+# (at least twice MIC_MAX_UTTERANCE) are kept in a fixed buffer (about 32 KB
+# per second, twice over)
+MIC_STREAMING = os.getenv('MIC_STREAMING', 'false').lower() in ('1', 'true', 'yes')
+MIC_ENDPOINT_SILENCE = float(os.getenv('MIC_ENDPOINT_SILENCE', 0.2))
+MIC_MAX_UTTERANCE = float(os.getenv('MIC_MAX_UTTERANCE', 30))
+MIC_RING_SECONDS = float(os.getenv('MIC_RING_SECONDS', 60))
+
+# Speech-to-text backend: 'google' (web API) or 'vosk', which decodes offline
+# on SPEECH_DECODE_WORKERS threads with the model directory in SPEECH_MODEL_PATH
+# (needs vosk and a downloaded model, e.g. vosk-model-small-en-us-0.15)
+SPEECH_BACKEND = os.getenv('SPEECH_BACKEND', 'google')
+SPEECH_MODEL_PATH = os.getenv('SPEECH_MODEL_PATH', 'models/vosk-model-small-en-us-0.15')
+SPEECH_DECODE_WORKERS = int(os.getenv('SPEECH_DECODE_WORKERS', 2))
+# Seconds a Google request may take before it is given up on (0 waits
+# forever); a hung request otherwise holds its thread for good. Keep it a
+# little above the hedge threshold, which starts at 1.5 s
+SPEECH_TIMEOUT = float(os.getenv('SPEECH_TIMEOUT', 4.0))
+
+# Hedged recognition, with several backends in SPEECH_BACKEND ("google,vosk"):
+# the first one goes alone until it is slower than SPEECH_HEDGE_PERCENTILE of
+# its recent calls (0 asks all at once), and the first answer with at least
+# SPEECH_MIN_CONFIDENCE wins
+SPEECH_HEDGE_PERCENTILE = float(os.getenv('SPEECH_HEDGE_PERCENTILE', 90))
+SPEECH_MIN_CONFIDENCE = float(os.getenv('SPEECH_MIN_CONFIDENCE', 0.6))
+
+# Audio preprocessing before recognition (needs numpy): trims silence,
+# normalizes the level and resamples to AUDIO_TARGET_RATE mono. AUDIO_FLAC
+# also encodes the result, to report the upload size
+AUDIO_PREPROCESS = os.getenv('AUDIO_PREPROCESS', 'false').lower() in ('1', 'true', 'yes')
+AUDIO_TARGET_RATE = int(os.getenv('AUDIO_TARGET_RATE', 16000))
+AUDIO_FLAC = os.getenv('AUDIO_FLAC', 'false').lower() in ('1', 'true', 'yes')
+
+# Shared thread pool for blocking skills (email, weather, Q&A) and the default
+# number of seconds one may take before the assistant gives up on it. Past
+# SKILL_INTERIM_AFTER seconds the assistant says it is working on the answer
+SKILL_WORKERS = int(os.getenv('SKILL_WORKERS', 4))
+SKILL_DEADLINE = float(os.getenv('SKILL_DEADLINE', 15))
+SKILL_INTERIM_AFTER = float(os.getenv('SKILL_INTERIM_AFTER', 3))
+
+# Multi-session server (server.py): address, session cap and command threads
+SERVER_HOST = os.getenv('SERVER_HOST', '127.0.0.1')
+SERVER_PORT = int(os.getenv('SERVER_PORT', 8765))
+SERVER_MAX_SESSIONS = int(os.getenv('SERVER_MAX_SESSIONS', 500))
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', 32))
+
+# Pipelined runtime: keep listening while commands are recognized, handled and
+# spoken. Best with headphones, since the microphone stays open during replies.
+PIPELINE_ENABLED = os.getenv('PIPELINE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+PIPELINE_RECOGNITION_WORKERS = int(os.getenv('PIPELINE_RECOGNITION_WORKERS', 2))
+PIPELINE_HANDLER_WORKERS = int(os.getenv('PIPELINE_HANDLER_WORKERS', 1))
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', 4))
+
 # Validate required environment variables
 def validate_config():
    
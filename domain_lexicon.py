@@ -0,0 +1,170 @@
+import bisect
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'domains.txt')
+
+def edit_distance(a, b):
+    """Optimal string alignment distance (Levenshtein plus adjacent swaps)."""
+    if a == b:
+        return 0
+
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        previous2, previous = previous, current
+
+    return previous[len(b)]
+
+class DomainLexicon:
+    """Known email domains with prefix and typo-tolerant lookup by name.
+
+    A domain's name is its first label ("gmail" for gmail.com). Names are kept
+    in a sorted array so prefix queries are a bisect, and in a one-deletion
+    index (symmetric delete) so names within edit distance 1 are found with a
+    handful of dict lookups instead of a scan. Earlier lines of the lexicon
+    file win when a name has several domains (gmail.com before gmail.co.uk).
+    """
+
+    min_fuzzy_length = 4
+
+    def __init__(self, domains=()):
+
+        self.domains = set()
+        self.domains_by_name = {}
+        self._name_rank = {}
+        self._deletes = {}
+
+        for domain in domains:
+            domain = domain.strip().lower()
+            if not domain or '.' not in domain or domain in self.domains:
+                continue
+
+            self.domains.add(domain)
+            name = domain.split('.', 1)[0]
+            if name not in self.domains_by_name:
+                self.domains_by_name[name] = []
+                self._name_rank[name] = len(self._name_rank)
+                self._index_deletes(name)
+            self.domains_by_name[name].append(domain)
+
+        self._sorted_names = sorted(self.domains_by_name)
+
+    @classmethod
+    def load(cls, path=DEFAULT_LEXICON_PATH):
+
+        with open(path, encoding='utf-8') as lexicon_file:
+            domains = [line.split('#', 1)[0] for line in lexicon_file]
+
+        lexicon = cls(domains)
+        logger.info("Loaded %s email domains from %s", len(lexicon), path)
+        return lexicon
+
+    def __len__(self):
+
+        return len(self.domains)
+
+    def __contains__(self, domain):
+
+        return domain in self.domains
+
+    def _index_deletes(self, name):
+
+        if len(name) < self.min_fuzzy_length:
+            return
+
+        for i in range(len(name)):
+            variant = name[:i] + name[i + 1:]
+            existing = self._deletes.get(variant)
+            # Most variants belong to a single name, so skip the list for those
+            if existing is None:
+                self._deletes[variant] = name
+            elif isinstance(existing, str):
+                self._deletes[variant] = (existing, name)
+            else:
+                self._deletes[variant] = existing + (name,)
+
+    def has_name(self, name):
+
+        return name in self.domains_by_name
+
+    def has_name_prefix(self, prefix):
+
+        i = bisect.bisect_left(self._sorted_names, prefix)
+        return i < len(self._sorted_names) and self._sorted_names[i].startswith(prefix)
+
+    def complete(self, prefix, limit=10):
+
+        names = []
+        i = bisect.bisect_left(self._sorted_names, prefix)
+        while i < len(self._sorted_names) and len(names) < limit:
+            name = self._sorted_names[i]
+            if not name.startswith(prefix):
+                break
+            names.append(name)
+            i += 1
+        return names
+
+    def default_domain(self, name):
+
+        domains = self.domains_by_name.get(name)
+        return domains[0] if domains else None
+
+    def closest_name(self, name):
+
+        if name in self.domains_by_name:
+            return name
+        if len(name) < self.min_fuzzy_length:
+            return None
+
+        # Symmetric delete: a typo within distance 1 shares a one-deletion
+        # variant with the real name (or is one of its variants)
+        candidates = set()
+        variants = [name] + [name[:i] + name[i + 1:] for i in range(len(name))]
+        for variant in variants:
+            if variant in self.domains_by_name:
+                candidates.add(variant)
+            existing = self._deletes.get(variant)
+            if isinstance(existing, str):
+                candidates.add(existing)
+            elif existing:
+                candidates.update(existing)
+
+        matches = [candidate for candidate in candidates if edit_distance(name, candidate) <= 1]
+        if not matches:
+            return None
+        return min(matches, key=self._name_rank.get)
+
+    def resolve(self, spoken):
+
+        # "company dot co dot uk" -> company.co.uk, "out look" -> outlook
+        text = spoken.lower().strip()
+        if text in self.domains:
+            return text
+
+        words = text.replace('.', ' dot ').split()
+        joined = ''.join('.' if word == 'dot' else word for word in words).strip('.')
+        if not joined:
+            return None
+        if joined in self.domains:
+            return joined
+
+        name, _, suffix = joined.partition('.')
+        closest = self.closest_name(name)
+        if not closest:
+            return None
+
+        if not suffix:
+            return self.default_domain(closest)
+
+        domain = f"{closest}.{suffix}"
+        return domain if domain in self.domains else None
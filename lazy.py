@@ -0,0 +1,69 @@
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class Lazy:
+    """A value built on first use, at most once, from any thread.
+
+    warm() builds it ahead of time (typically from warm_up's thread) so the
+    first real use doesn't pay for it; get() waits for a build already in
+    progress instead of starting a second one.
+    """
+
+    def __init__(self, factory, name=None):
+
+        self.factory = factory
+        self.name = name or getattr(factory, '__name__', 'value')
+        self.build_time = None
+        self._value = None
+        self._built = False
+        self._lock = threading.Lock()
+
+    @property
+    def built(self):
+
+        return self._built
+
+    def get(self):
+
+        if self._built:
+            return self._value
+
+        with self._lock:
+            if not self._built:
+                start = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                finally:
+                    self.build_time = time.perf_counter() - start
+                self._built = True
+                logger.info("Loaded %s in %.0f ms", self.name, self.build_time * 1000)
+        return self._value
+
+    def warm(self):
+
+        try:
+            self.get()
+            return True
+        except Exception as e:
+            # Left unbuilt, so the first real use retries and reports the error
+            logger.error("Warm-up of %s failed: %s", self.name, e)
+            return False
+
+def lazy_import(name):
+
+    return Lazy(lambda: importlib.import_module(name), name=name)
+
+def warm_up(*lazies, name='warm-up'):
+
+    # One daemon thread, in order, so the most urgent item comes first
+    def run():
+        for lazy in lazies:
+            lazy.warm()
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
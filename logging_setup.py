@@ -0,0 +1,141 @@
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# The listener of the current configuration, stopped (and its queue drained)
+# when logging is configured again or the process exits
+_listener = None
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in N records below WARNING from the configured loggers.
+
+    rates maps a logger name to the fraction of its records to keep (0.1
+    keeps every tenth); the name covers its child loggers too. Warnings and
+    errors always pass.
+    """
+
+    def __init__(self, rates):
+
+        super().__init__()
+        self.every = {name: (round(1 / rate) if rate > 0 else None) for name, rate in rates.items()}
+        self._counters = {name: itertools.count() for name in rates}
+
+    def filter(self, record):
+
+        if record.levelno >= logging.WARNING or not self.every:
+            return True
+
+        name = record.name
+        while name:
+            if name in self.every:
+                every = self.every[name]
+                return every is not None and next(self._counters[name]) % every == 0
+            name = name.rpartition('.')[0]
+        return True
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record, for log shippers and jq."""
+
+    def format(self, record):
+
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() renders the message (and any traceback) on the
+    calling thread. The queue never leaves the process, so the record is
+    passed on as is; only container arguments are copied, since the caller
+    may change them before the listener gets to the record.
+    """
+
+    def prepare(self, record):
+
+        args = record.args
+        if isinstance(args, dict):
+            record.args = dict(args)
+        elif args and any(isinstance(arg, (dict, list, set)) for arg in args):
+            record.args = tuple(arg.copy() if isinstance(arg, (dict, list, set)) else arg for arg in args)
+        return record
+
+def parse_sampling(spec):
+
+    # "nlu=0.1,recognizer=0.5" -> {'nlu': 0.1, 'recognizer': 0.5}
+    rates = {}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        name, _, rate = item.partition('=')
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            raise ValueError(f"Invalid log sampling entry '{item}', expected logger=rate")
+    return rates
+
+def configure_logging(path='voice_assistant.log', level=logging.INFO, max_bytes=5 * 1024 * 1024, backup_count=3,
+                      json_lines=False, sampling=None, console=True):
+
+    # Callers only enqueue records; one listener thread formats them and
+    # writes the rotating file and the console
+    global _listener
+
+    if isinstance(level, str):
+        level = getattr(logging, level.upper(), logging.INFO)
+    if isinstance(sampling, str):
+        sampling = parse_sampling(sampling)
+
+    handlers = []
+    if path:
+        file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                            encoding='utf-8')
+        file_handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(LOG_FORMAT))
+        handlers.append(file_handler)
+    if console:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(stream_handler)
+
+    records = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(records)
+    if sampling:
+        # On the calling side, so dropped records are never queued
+        queue_handler.addFilter(SamplingFilter(sampling))
+
+    if _listener is None:
+        atexit.register(stop_logging)
+    stop_logging()
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def stop_logging():
+
+    # Flushes what is still queued; safe to call more than once (and again at exit)
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -1,40 +1,84 @@
 
+import argparse
 import logging
 import time
+
+# Reference point for the time-to-first-listen figure in the startup log
+PROCESS_START = time.perf_counter()
+
 import signal
 import sys
+import queue
+import threading
+from collections import deque
 from datetime import datetime
 
 # Import core components
 from recognizer import VoiceRecognizer
-from tts import TextToSpeech
-from nlu import IntentClassifier
-from config import validate_config
-
-# Import skills
-from skills.email_skill import EmailSkill
-from skills.reminder_skill import ReminderSkill
-from skills.weather_skill import WeatherSkill
-from skills.qa_skill import QASkill
-from skills.system_skill import SystemSkill
-from skills.greeting_skill import GreetingSkill
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('voice_assistant.log'),
-        logging.StreamHandler()
-    ]
+from tts import TextToSpeech, NullTextToSpeech
+from lazy import Lazy, warm_up
+from tracing import Tracer, NULL_SPAN
+from config import (validate_config, DOMAIN_LEXICON_PATH, NLU_CACHE_SIZE, NLU_ENGINE, NLU_MODEL_PATH,
+                    TRACING_ENABLED, TRACE_BUFFER_SIZE, PIPELINE_ENABLED, PIPELINE_RECOGNITION_WORKERS,
+                    PIPELINE_HANDLER_WORKERS, PIPELINE_QUEUE_SIZE, MIC_CALIBRATION_PATH,
+                    MIC_ADAPTIVE_CALIBRATION, MIC_ADAPT_INTERVAL, SKILL_WORKERS, SKILL_DEADLINE,
+                    SKILL_INTERIM_AFTER, LOG_PATH, LOG_LEVEL, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_JSON,
+                    LOG_SAMPLING, MIC_STREAMING, MIC_ENDPOINT_SILENCE, MIC_MAX_UTTERANCE, SPEECH_BACKEND,
+                    SPEECH_MODEL_PATH, SPEECH_DECODE_WORKERS, AUDIO_PREPROCESS, AUDIO_TARGET_RATE, AUDIO_FLAC,
+                    SPEECH_HEDGE_PERCENTILE, SPEECH_MIN_CONFIDENCE, MIC_RING_SECONDS, SPEECH_TIMEOUT)
+from logging_setup import configure_logging
+
+# Skills register themselves with the registry (see skills/registry.py)
+from skills.registry import SkillRegistry
+
+# Configure logging; records are written by a background thread
+configure_logging(
+    path=LOG_PATH,
+    level=LOG_LEVEL,
+    max_bytes=LOG_MAX_BYTES,
+    backup_count=LOG_BACKUP_COUNT,
+    json_lines=LOG_JSON,
+    sampling=LOG_SAMPLING
 )
 
 logger = logging.getLogger(__name__)
 
+# Spoken (after the wake word) to print the per-stage latency summary
+TRACE_SUMMARY_PHRASES = ('timing summary', 'trace summary', 'show timing summary', 'show trace summary')
+
+# How long pipeline threads block on a queue before rechecking is_running
+QUEUE_POLL_SECONDS = 0.2
+
+class ReorderBuffer:
+    """Releases (sequence, item) pairs in sequence order.
+
+    Recognition workers finish out of order, so results are held here until
+    every earlier command has been released. Stages that drop a command must
+    still push its sequence number (with None) or the buffer stalls.
+    """
+
+    def __init__(self, first_sequence=0):
+
+        self.next_sequence = first_sequence
+        self.pending = {}
+
+    def push(self, sequence, item):
+
+        self.pending[sequence] = item
+        ready = []
+        while self.next_sequence in self.pending:
+            ready.append((self.next_sequence, self.pending.pop(self.next_sequence)))
+            self.next_sequence += 1
+        return ready
+
+    def __len__(self):
+
+        return len(self.pending)
+
 class VoiceAssistant:
    
 
-    def __init__(self):
+    def __init__(self, tts=None):
    
         logger.info("Initializing Mini Voice Assistant...")
 
@@ -43,36 +87,100 @@ class VoiceAssistant:
             validate_config()
             logger.info("Configuration validated successfully")
         except ValueError as e:
-            logger.error(f"Configuration error: {e}")
+            logger.error("Configuration error: %s", e)
             print(f"Configuration error: {e}")
             print("Please check your .env file and ensure all required variables are set.")
             sys.exit(1)
 
         # Initialize core components
-        self.recognizer = VoiceRecognizer()
-        self.tts = TextToSpeech()
-        self.intent_classifier = IntentClassifier()
-
-        # Initialize skills
-        self.email_skill = EmailSkill()
-        self.reminder_skill = ReminderSkill()
-        self.weather_skill = WeatherSkill()
-        self.qa_skill = QASkill()
-        self.system_skill = SystemSkill()
-        self.greeting_skill = GreetingSkill()
+        self.tracer = Tracer(enabled=TRACING_ENABLED, capacity=TRACE_BUFFER_SIZE)
+        self.recognizer = VoiceRecognizer(
+            tracer=self.tracer,
+            calibration_path=MIC_CALIBRATION_PATH,
+            adaptive=MIC_ADAPTIVE_CALIBRATION,
+            adapt_interval=MIC_ADAPT_INTERVAL,
+            streaming=MIC_STREAMING,
+            endpoint_silence=MIC_ENDPOINT_SILENCE,
+            max_utterance=MIC_MAX_UTTERANCE,
+            ring_seconds=MIC_RING_SECONDS,
+            # The pipeline keeps listening while a reply plays
+            mute_while_paused=not PIPELINE_ENABLED,
+            backend=SPEECH_BACKEND,
+            model_path=SPEECH_MODEL_PATH,
+            decode_workers=SPEECH_DECODE_WORKERS,
+            preprocess=AUDIO_PREPROCESS,
+            preprocess_rate=AUDIO_TARGET_RATE,
+            preprocess_flac=AUDIO_FLAC,
+            min_confidence=SPEECH_MIN_CONFIDENCE,
+            hedge_percentile=SPEECH_HEDGE_PERCENTILE,
+            speech_timeout=SPEECH_TIMEOUT or None
+        )
+        self.tts = tts or TextToSpeech()
+
+        # Initialize skills. The exit command goes first so it wins over any
+        # other entity a system command carries, as it always has
+        self.skills = SkillRegistry(max_workers=SKILL_WORKERS, default_deadline=SKILL_DEADLINE,
+                                    interim_after=SKILL_INTERIM_AFTER)
+        self.skills.register('system', self._handle_exit, name='assistant', entity_key='exit')
+        self.skills.load_plugins()
+
+        # Nothing heavy is built here: the microphone, NLU and skills load on
+        # first use, or on the warm-up thread start() runs during the welcome.
+        # An offline speech model is among them
+        self._microphone = Lazy(lambda: self.recognizer.open(calibrate=False), name='microphone')
+        self._intent_classifier = Lazy(self._build_intent_classifier, name='intent classifier')
+        self.startup_timings = {'init': time.perf_counter() - PROCESS_START}
+        self._first_listen_logged = False
 
         # Track running state
         self.is_running = False
 
+        # Pipelined runtime (see _run_pipeline)
+        self.pipeline_enabled = PIPELINE_ENABLED
+        self.recognition_workers = max(1, PIPELINE_RECOGNITION_WORKERS)
+        self.handler_workers = max(1, PIPELINE_HANDLER_WORKERS)
+        self.queue_size = max(1, PIPELINE_QUEUE_SIZE)
+        self._recent_responses = deque(maxlen=3)
+
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
 
         logger.info("Voice Assistant initialized successfully")
 
+    @property
+    def intent_classifier(self):
+
+        return self._intent_classifier.get()
+
+    def _build_intent_classifier(self):
+
+        from nlu import IntentClassifier
+
+        classifier = IntentClassifier(
+            domain_lexicon_path=DOMAIN_LEXICON_PATH,
+            cache_size=NLU_CACHE_SIZE,
+            engine=NLU_ENGINE,
+            model_path=NLU_MODEL_PATH
+        )
+        self.skills.apply_patterns(classifier)
+        return classifier
+
+    def _log_first_listen(self):
+
+        # Called just before listening; the microphone may still be opening
+        # on the warm-up thread, in which case the listen waits for it
+        if self._first_listen_logged:
+            return
+        self._first_listen_logged = True
+        self._microphone.get()
+        self.startup_timings['first_listen'] = time.perf_counter() - PROCESS_START
+        logger.info("Startup: %s", ", ".join(f"{stage} {seconds * 1000:.0f} ms"
+                                             for stage, seconds in self.startup_timings.items()))
+
     def _signal_handler(self, signum, frame):
        
-        logger.info(f"Received signal {signum}. Shutting down...")
+        logger.info("Received signal %s. Shutting down...", signum)
         self.stop()
 
     def start(self):
@@ -80,301 +188,364 @@ class VoiceAssistant:
         logger.info("Starting Voice Assistant...")
         self.is_running = True
 
-        # Welcome message
+        # Load what the first command needs while the welcome plays. The
+        # microphone opens without calibrating, so it doesn't measure the
+        # welcome as room noise; the first listen calibrates if it must
+        warm_up(self._microphone, *self.recognizer.lazy_models(), self._intent_classifier,
+                *self.skills.lazy_skills())
+
+        # Welcome message (the TTS engine starts here, on the main thread)
         welcome_msg = "Hello! I'm Vishnu, your voice assistant. Say 'Hey Vishnu' followed by your command. How can I help you today?"
-        self.tts.speak(welcome_msg)
+        welcome_start = time.perf_counter()
+        with self.recognizer.adaptation_paused():
+            self.tts.speak(welcome_msg)
+        self.startup_timings['welcome'] = time.perf_counter() - welcome_start
         print(f"🤖 {welcome_msg}")
 
         try:
-            while self.is_running:
-                self._process_voice_command()
-                time.sleep(0.5)  # Small delay between listening attempts
+            if self.pipeline_enabled:
+                self._run_pipeline()
+            else:
+                while self.is_running:
+                    self._process_voice_command()
+                    time.sleep(0.5)  # Small delay between listening attempts
 
         except KeyboardInterrupt:
             logger.info("Received keyboard interrupt")
         finally:
             self.stop()
 
+            # Saves the calibration; done here, once the pipeline threads have
+            # let go of the microphone, rather than in stop()
+            self.recognizer.close()
+
+            # Printed here rather than in stop(), which the exit command calls
+            # while the pipeline is still speaking the goodbye
+            if self.tracer.enabled and self.tracer.spans:
+                self.print_trace_summary()
+            logger.info("Skill calls:\n%s", self.skills.format_stats())
+            recognition_stats = self.recognizer.format_stats()
+            if recognition_stats:
+                logger.info("Recognition:\n%s", recognition_stats)
+
     def stop(self):
        
         logger.info("Stopping Voice Assistant...")
         self.is_running = False
 
         # Cleanup skills
-        if hasattr(self, 'reminder_skill'):
-            self.reminder_skill.shutdown()
+        if hasattr(self, 'skills'):
+            self.skills.shutdown()
 
         logger.info("Voice Assistant stopped")
 
-    def _process_voice_command(self):
-       
-        try:
-            # Listen for voice input
-            print("\n🎤 Listening... (say something)")
-            text = self.recognizer.listen_and_recognize(timeout=5, phrase_time_limit=10)
-
-            if not text:
-                return
-
-            print(f"👤 You said: '{text}'")
-
-            # Check if text contains only wake words
-            if self.intent_classifier.is_wake_word_only(text):
-                response = "Yes, I'm hearing. What can I do for you?"
-                self.tts.speak(response)
-                print(f"🤖 Assistant: {response}")
-                return
-
-            # Classify intent
-            intent, confidence, extracted_info = self.intent_classifier.classify_intent(text)
-
-            logger.info(f"Intent classified as: {intent} (confidence: {confidence})")
-            logger.info(f"Extracted info: {extracted_info}")
-
-            # Process the intent
-            response = self._handle_intent(intent, extracted_info, text)
-
-            # Speak the response
-            if response:
-                self.tts.speak(response)
-                print(f"🤖 Assistant: {response}")
-
-        except Exception as e:
-            logger.error(f"Error processing voice command: {e}")
-            error_msg = "Sorry, I encountered an error. Please try again."
-            self.tts.speak(error_msg)
-            print(f"🤖 Assistant: {error_msg}")
-
-    def _handle_intent(self, intent, extracted_info, original_text):
-        
-        try:
-            if intent == 'greeting':
-                return self._handle_greeting_intent(original_text)
-
-            elif intent == 'email':
-                return self._handle_email_intent(extracted_info)
-
-            elif intent == 'reminder':
-                return self._handle_reminder_intent(extracted_info)
+    def print_trace_summary(self):
 
-            elif intent == 'weather':
-                return self._handle_weather_intent(extracted_info)
+        summary = self.tracer.format_summary()
+        print(f"\n📊 Per-stage latency:\n{summary}")
+        print(f"\n⏱️ Skill calls:\n{self.skills.format_stats()}")
+        recognition_stats = self.recognizer.format_stats()
+        if recognition_stats:
+            print(f"\n🎚️ Recognition:\n{recognition_stats}")
+        return summary
 
-            elif intent == 'qa':
-                return self._handle_qa_intent(original_text)
+    def _is_trace_summary_request(self, text):
 
-            elif intent == 'system':
-                return self._handle_system_intent(extracted_info)
+        # Matched on the tail so it works with or without the wake word in front
+        command = text.lower().strip(' .!?')
+        return any(command == phrase or command.endswith(' ' + phrase) for phrase in TRACE_SUMMARY_PHRASES)
 
-            else:
-                return "I'm not sure how to help with that. You can ask me to send emails, set reminders, check weather, open applications, search, or ask questions."
-
-        except Exception as e:
-            logger.error(f"Error handling intent '{intent}': {e}")
-            return f"Sorry, I encountered an error while processing your request: {str(e)}"
-
-    def _handle_email_intent(self, extracted_info):
-       
-        try:
-            recipient = extracted_info.get('recipient')
-            subject = extracted_info.get('subject', 'Voice Assistant Message')
-            body = extracted_info.get('body', 'This message was sent via voice assistant.')
-
-            if not recipient:
-                return "I couldn't find an email address in your message. Please include the recipient's email address."
+    def _speak(self, response, **span_attributes):
 
-            success, message = self.email_skill.send_email(recipient, subject, body)
+        with self.tracer.span('tts', **span_attributes) as span, self.recognizer.adaptation_paused():
+            if not self.tts.speak(response):
+                span.set(outcome='failed')
+        print(f"🤖 Assistant: {response}")
 
-            if success:
-                return f"Email sent successfully to {recipient}."
-            else:
-                return f"Failed to send email: {message}"
-
-        except Exception as e:
-            logger.error(f"Error in email handling: {e}")
-            return "Sorry, I encountered an error while sending the email."
-
-    def _handle_reminder_intent(self, extracted_info):
-       
-        try:
-            reminder_text = extracted_info.get('text')
-            minutes = extracted_info.get('minutes')
-            hours = extracted_info.get('hours')
-
-            if not reminder_text:
-                return "Please tell me what you want to be reminded about."
-
-            if not minutes and not hours:
-                return "Please specify when you want to be reminded (e.g., 'in 10 minutes' or 'in 2 hours')."
-
-            success, message, reminder_id = self.reminder_skill.set_reminder(
-                reminder_text, minutes=minutes, hours=hours
-            )
-
-            if success:
-                return message
-            else:
-                return f"Failed to set reminder: {message}"
-
-        except Exception as e:
-            logger.error(f"Error in reminder handling: {e}")
-            return "Sorry, I encountered an error while setting the reminder."
-
-    def _handle_weather_intent(self, extracted_info):
+    def _process_voice_command(self):
        
-        try:
-            city = extracted_info.get('city')
-
-            if not city:
-                return "Please specify a city name for the weather information."
-
-            success, message = self.weather_skill.get_weather(city)
-
-            if success:
-                return message
-            else:
-                return f"Unable to get weather information: {message}"
+        with self.tracer.command() as command:
+            try:
+                # Listen for voice input
+                self._log_first_listen()
+                print("\n🎤 Listening... (say something)")
+                text = self.recognizer.listen_and_recognize(timeout=5, phrase_time_limit=10)
+
+                if not text:
+                    command.set(outcome='no_speech')
+                    return
+
+                print(f"👤 You said: '{text}'")
+
+                # Speak the response; a slow skill has the assistant say it's
+                # working on it in the meantime
+                response = self._respond(text, command, interim=self._speak)
+                if response:
+                    self._speak(response)
+
+            except Exception as e:
+                command.set(outcome='error')
+                logger.error("Error processing voice command: %s", e)
+                self._speak("Sorry, I encountered an error. Please try again.")
+
+    def _respond(self, text, command=NULL_SPAN, interim=None, **span_attributes):
+
+        if self._is_trace_summary_request(text):
+            command.set(outcome='trace_summary')
+            self.print_trace_summary()
+            return None
+
+        # Check if text contains only wake words
+        if self.intent_classifier.is_wake_word_only(text):
+            command.set(outcome='wake_word')
+            return "Yes, I'm hearing. What can I do for you?"
+
+        # Classify intent
+        with self.tracer.span('classify', **span_attributes):
+            intent, confidence, extracted_info = self.intent_classifier.classify_intent(text)
 
-        except Exception as e:
-            logger.error(f"Error in weather handling: {e}")
-            return "Sorry, I encountered an error while fetching weather information."
+        logger.info("Intent classified as: %s (confidence: %s)", intent, confidence)
+        logger.info("Extracted info: %s", extracted_info)
+
+        # Process the intent
+        handler = self.skills.resolve(intent, extracted_info)
+        skill = handler.name if handler else None
+        command.set(intent=intent, skill=skill)
+        with self.tracer.span('skill', intent=intent, skill=skill, **span_attributes):
+            return self.skills.dispatch(intent, extracted_info, text, entry=handler, interim=interim)
+
+    def _run_pipeline(self):
+
+        # capture -> recognition workers -> handler workers -> speech, joined by
+        # bounded queues so the microphone keeps listening while a reply plays.
+        # Speech stays on this thread, which is the one that created the TTS engine.
+        audio_queue = queue.Queue(maxsize=self.queue_size)
+        transcript_queue = queue.Queue(maxsize=self.queue_size)
+        response_queue = queue.Queue(maxsize=self.queue_size)
+        transcript_order = ReorderBuffer()
+        transcript_order_lock = threading.Lock()
+
+        threads = [threading.Thread(target=self._capture_stage, args=(audio_queue,), name='capture', daemon=True)]
+        threads += [threading.Thread(target=self._recognition_stage, args=(audio_queue, transcript_queue),
+                                     name=f'recognition-{i}', daemon=True)
+                    for i in range(self.recognition_workers)]
+        handlers = [threading.Thread(target=self._handler_stage,
+                                     args=(transcript_queue, response_queue, transcript_order, transcript_order_lock),
+                                     name=f'handler-{i}', daemon=True)
+                    for i in range(self.handler_workers)]
+
+        logger.info("Starting pipeline with %s recognition and %s handler workers (queue size %s)",
+                    self.recognition_workers, self.handler_workers, self.queue_size)
+        for thread in threads + handlers:
+            thread.start()
 
-    def _handle_qa_intent(self, query):
-      
         try:
-            # First check for special questions (identity, time/date)
-            success, answer, is_special = self.qa_skill.answer_special_questions(query)
+            self._speech_stage(response_queue, handlers)
+        finally:
+            self.is_running = False
+            for thread in threads + handlers:
+                thread.join(timeout=1)
 
-            if is_special:
-                if success:
-                    return answer
-                else:
-                    return f"Sorry, I encountered an error: {answer}"
+    def _put(self, target_queue, item):
 
-            # Fall back to Wikipedia search for other questions
-            success, answer = self.qa_skill.answer_question(query)
+        # Block while the next stage is busy, but never past shutdown
+        while self.is_running:
+            try:
+                target_queue.put(item, timeout=QUEUE_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
 
-            if success:
-                return answer
-            else:
-                return f"I couldn't find information about that. {answer}"
+    def _get(self, source_queue):
 
-        except Exception as e:
-            logger.error(f"Error in Q&A handling: {e}")
-            return "Sorry, I encountered an error while searching for information."
-
-    def _handle_system_intent(self, extracted_info):
-     
-        try:
-            # Check for exit command
-            if extracted_info.get('exit'):
-                self.stop()
-                return "Goodbye! Vishnu is shutting down."
-
-            # Handle application opening
-            application = extracted_info.get('application')
-            if application:
-                success, message = self.system_skill.open_application(application)
-                if success:
-                    return f"Opening {application}."
-                else:
-                    return f"Failed to open {application}: {message}"
-
-            # Handle YouTube search
-            youtube_query = extracted_info.get('youtube_query')
-            if youtube_query:
-                success, message = self.system_skill.play_youtube_video(youtube_query)
-                if success:
-                    return f"Playing '{youtube_query}' on YouTube."
-                else:
-                    return f"Failed to play YouTube video: {message}"
-
-            # Handle video requests (for "play videos in youtube" commands)
-            video_query = extracted_info.get('video_query')
-            if video_query:
-                success, message = self.system_skill.play_video_on_youtube(video_query)
-                if success:
-                    return f"Playing '{video_query}' on YouTube."
-                else:
-                    return f"Failed to play video: {message}"
-
-            # Handle song playing
-            song_name = extracted_info.get('song_name')
-            if song_name:
-                success, message = self.system_skill.play_song(song_name)
-                if success:
-                    return f"Playing {song_name}."
-                else:
-                    return f"Failed to play song: {message}"
-
-            # Handle web search
-            search_query = extracted_info.get('search_query')
-            if search_query:
-                success, message = self.system_skill.search_web(search_query)
-                if success:
-                    return f"Searching for '{search_query}'."
-                else:
-                    return f"Failed to search: {message}"
-
-            return "I can help you open applications, play YouTube videos, play songs, or search the web. What would you like me to do?"
-
-        except Exception as e:
-            logger.error(f"Error in system handling: {e}")
-            return "Sorry, I encountered an error while processing the system command."
-
-    def _handle_greeting_intent(self, original_text):
-      
         try:
-            # Determine the greeting type from the original text
-            text_lower = original_text.lower()
-
-            if 'good morning' in text_lower:
-                greeting_type = 'good_morning'
-            elif 'good afternoon' in text_lower:
-                greeting_type = 'good_afternoon'
-            elif 'good evening' in text_lower:
-                greeting_type = 'good_evening'
-            elif 'good night' in text_lower:
-                greeting_type = 'good_night'
-            elif 'hello' in text_lower:
-                greeting_type = 'hello'
-            elif 'hi' in text_lower:
-                greeting_type = 'hi'
-            elif 'hey' in text_lower:
-                greeting_type = 'hey'
-            elif 'howdy' in text_lower:
-                greeting_type = 'howdy'
-            elif 'greetings' in text_lower:
-                greeting_type = 'greetings'
-            elif 'namaste' in text_lower:
-                greeting_type = 'namaste'
-            elif 'sup' in text_lower or 'what\'s up' in text_lower:
-                greeting_type = 'sup'
-            else:
-                greeting_type = 'hello'  # Default fallback
+            return source_queue.get(timeout=QUEUE_POLL_SECONDS)
+        except queue.Empty:
+            return None
+
+    def _capture_stage(self, audio_queue):
+
+        sequence = 0
+        while self.is_running:
+            try:
+                self._log_first_listen()
+                print("\n🎤 Listening... (say something)")
+                audio = self.recognizer.listen_for_audio(timeout=5, phrase_time_limit=10)
+            except Exception as e:
+                logger.error("Error capturing audio: %s", e)
+                time.sleep(QUEUE_POLL_SECONDS)
+                continue
+
+            # Sequence numbers are only handed out to real captures, so a
+            # listen timeout never leaves a gap for the reorder buffers
+            if audio is not None and self._put(audio_queue, (sequence, audio)):
+                sequence += 1
+
+    def _recognition_stage(self, audio_queue, transcript_queue):
+
+        while self.is_running:
+            item = self._get(audio_queue)
+            if item is None:
+                continue
+
+            sequence, audio = item
+            try:
+                text = self.recognizer.recognize_speech(audio)
+            except Exception as e:
+                logger.error("Error recognizing command %s: %s", sequence, e)
+                text = None
+            self._put(transcript_queue, (sequence, text))
+
+    def _handler_stage(self, transcript_queue, response_queue, transcript_order, transcript_order_lock):
+
+        while self.is_running:
+            item = self._get(transcript_queue)
+            if item is None:
+                continue
+
+            # Commands are handled in the order they were spoken, whichever
+            # recognition worker finished first
+            with transcript_order_lock:
+                ready = transcript_order.push(*item)
+
+            for sequence, text in ready:
+                response = None
+                if text and not self._is_echo(text):
+                    print(f"👤 You said: '{text}'")
+                    try:
+                        response = self._respond(text, command_id=sequence,
+                                                 interim=lambda message: response_queue.put((None, message)))
+                    except Exception as e:
+                        logger.error("Error processing voice command: %s", e)
+                        response = "Sorry, I encountered an error. Please try again."
+                # Put even when there is nothing to say so the speech stage's
+                # reorder buffer can move past this command
+                response_queue.put((sequence, response))
+
+    def _speech_stage(self, response_queue, handlers):
+
+        response_order = ReorderBuffer()
+        while self.is_running or any(handler.is_alive() for handler in handlers) or not response_queue.empty():
+            item = self._get(response_queue)
+            if item is None:
+                continue
+
+            # Interim acknowledgements carry no sequence number and are
+            # spoken straight away, ahead of the answer they stand in for
+            if item[0] is None:
+                self._recent_responses.append(item[1].lower())
+                self._speak(item[1])
+                continue
+
+            for sequence, response in response_order.push(*item):
+                if response:
+                    self._recent_responses.append(response.lower())
+                    self._speak(response, command_id=sequence)
+
+    def _is_echo(self, text):
+
+        # With the microphone open during replies it can pick up the assistant itself
+        text = text.lower().strip()
+        return len(text.split()) >= 2 and any(text in response for response in self._recent_responses)
+
+    def run_text_commands(self, lines, out=sys.stdout, quiet=False):
+
+        # Typed commands take the same path as recognized speech, minus the
+        # microphone and recognizer; replies go to self.tts and are printed
+        self.is_running = True
+        timings = []
+        run_start = time.perf_counter()
+
+        for line in lines:
+            text = line.strip()
+            if not text or text.startswith('#'):
+                continue
+
+            with self.tracer.command() as command:
+                start = time.perf_counter()
+                try:
+                    response = self._respond(text, command, interim=self.tts.speak)
+                except Exception as e:
+                    command.set(outcome='error')
+                    logger.error("Error processing text command: %s", e)
+                    response = "Sorry, I encountered an error. Please try again."
+                if response:
+                    self.tts.speak(response)
+                elapsed = time.perf_counter() - start
+
+            timings.append(elapsed)
+            if not quiet:
+                out.write(f"{elapsed * 1000:9.2f} ms  {text} -> {response}\n")
+
+            # An exit command stops the run like it stops the voice loop
+            if not self.is_running:
+                out.write(f"Stopped by exit command: {text}\n")
+                break
+
+        total = time.perf_counter() - run_start
+        timings.sort()
+        stats = {
+            'commands': len(timings),
+            'seconds': total,
+            'commands_per_second': len(timings) / total if total else 0.0,
+            'p50_ms': timings[len(timings) // 2] * 1000 if timings else 0.0,
+            'p99_ms': timings[int(0.99 * (len(timings) - 1))] * 1000 if timings else 0.0,
+            'max_ms': timings[-1] * 1000 if timings else 0.0
+        }
+        out.write(f"{stats['commands']} commands in {total:.2f}s: {stats['commands_per_second']:.0f} commands/s, "
+                  f"p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms, max {stats['max_ms']:.2f} ms\n")
+        if self.tracer.enabled:
+            out.write(self.tracer.format_summary() + "\n")
+        return stats
 
-            success, response = self.greeting_skill.get_greeting_response(greeting_type, original_text)
+    def _handle_intent(self, intent, extracted_info, original_text):
+        
+        return self.skills.dispatch(intent, extracted_info, original_text)
 
-            if success:
-                return response
-            else:
-                return "Hello! How can I help you today?"
+    def _handle_exit(self, extracted_info, original_text):
 
-        except Exception as e:
-            logger.error(f"Error in greeting handling: {e}")
-            return "Hello! How can I help you today?"
+        self.stop()
+        return "Goodbye! Vishnu is shutting down."
 
 def main():
    
+    parser = argparse.ArgumentParser(description="Vishnu voice assistant")
+    parser.add_argument('--text', nargs='?', const='-', metavar='FILE',
+                        help="read commands from FILE (or stdin), one per line, instead of the microphone")
+    parser.add_argument('--quiet', action='store_true', help="with --text, print only the summary")
+    parser.add_argument('--verbose', action='store_true', help="with --text, keep per-command INFO logging")
+    args = parser.parse_args()
+
     try:
+        if args.text:
+            run_text_mode(args.text, quiet=args.quiet, verbose=args.verbose)
+            return
+
         assistant = VoiceAssistant()
         assistant.start()
     except KeyboardInterrupt:
         logger.info("Application terminated by user")
     except Exception as e:
-        logger.error(f"Fatal error: {e}")
+        logger.error("Fatal error: %s", e)
         print(f"Fatal error: {e}")
         sys.exit(1)
 
+def run_text_mode(path, quiet=False, verbose=False):
+
+    # INFO logs for every command would cost more than the commands do
+    if not verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    assistant = VoiceAssistant(tts=NullTextToSpeech())
+    try:
+        if path == '-':
+            assistant.run_text_commands(sys.stdin, quiet=quiet)
+        else:
+            with open(path, encoding='utf-8') as command_file:
+                assistant.run_text_commands(command_file, quiet=quiet)
+    finally:
+        assistant.stop()
+
 if __name__ == "__main__":
     main()
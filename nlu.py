@@ -1,12 +1,736 @@
 import re
 import logging
+import itertools
+import os
+import threading
+import time
+import zlib
+from array import array
+from collections import deque, OrderedDict
+from domain_lexicon import DomainLexicon, DEFAULT_LEXICON_PATH
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'intent_model.npz')
+
+# Only the statistical engine needs numpy, and importing it costs more than
+# the rest of this module, so it is loaded on first use
+np = None
+
+def _require_numpy():
+
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("StatisticalIntentEngine requires numpy (pip install numpy)")
+        np = numpy
+    return np
 
 logger = logging.getLogger(__name__)
 
+# Classifier owned by each classify_batch worker process
+_batch_classifier = None
+
+def _init_batch_worker(intent_patterns, domain_lexicon_path, engine, model_path):
+
+    global _batch_classifier
+
+    # Per-utterance INFO logs would dominate the cost of a replay
+    logger.setLevel(logging.WARNING)
+
+    _batch_classifier = IntentClassifier(domain_lexicon_path=domain_lexicon_path, engine=engine, model_path=model_path)
+    _batch_classifier.intent_patterns = intent_patterns
+    _batch_classifier._compile_patterns()
+
+def _classify_chunk(chunk):
+
+    return [_batch_classifier.classify_intent(text) for text in chunk]
+
+def _classify_chunk_compact(chunk):
+
+    # Chunk arrives as one newline-joined string; results go back as an intent
+    # table, one code byte and one float per utterance and sparse infos.
+    texts = chunk.split('\n') if isinstance(chunk, str) else chunk
+    intents = []
+    codes = bytearray()
+    confidences = array('d')
+    infos = {}
+
+    for i, text in enumerate(texts):
+        intent, confidence, extracted_info = _batch_classifier.classify_intent(text)
+        if intent not in intents:
+            intents.append(intent)
+        codes.append(intents.index(intent))
+        confidences.append(confidence)
+        if extracted_info:
+            infos[i] = extracted_info
+
+    return intents, bytes(codes), confidences.tobytes(), infos
+
+def _expand_compact(result):
+
+    intents, codes, confidence_bytes, infos = result
+    confidences = array('d')
+    confidences.frombytes(confidence_bytes)
+
+    for i, code in enumerate(codes):
+        yield intents[code], confidences[i], infos.get(i, {})
+
+class IntentMatcher:
+    """Keyword-gated matcher: one word scan, then only the candidate regexes."""
+
+    _token_pattern = re.compile(r'\w+')
+    _anchor_pattern = re.compile(r'\\b([a-z]+)(\?)?')
+    # Pattern text that forces the anchor word to end on a word boundary
+    _boundary_followers = ('\\b', '\\s', '\\W', ' ', "'")
+
+    def __init__(self, compiled_patterns):
+
+        # [(intent, [(anchors or None, pattern), ...]), ...] in dict order
+        self.entries = []
+        for intent, patterns in compiled_patterns.items():
+            entries = [(self._anchors(pattern.pattern), pattern) for pattern in patterns]
+            self.entries.append((intent, entries))
+
+    def _anchors(self, pattern_text):
+
+        match = self._anchor_pattern.match(pattern_text)
+        if not match:
+            return None
+
+        word, optional = match.group(1), match.group(2)
+        rest = pattern_text[match.end():]
+
+        # Escaped punctuation such as "\\'" also ends the word
+        ends_word = rest.startswith(self._boundary_followers) or (
+            len(rest) > 1 and rest[0] == '\\' and not rest[1].isalnum() and rest[1] != '_'
+        )
+        if not ends_word:
+            # Can't gate this pattern safely, always run it
+            return None
+
+        if optional:
+            return frozenset((word, word[:-1]))
+        return frozenset((word,))
+
+    def _tokens(self, text):
+
+        # Non-ASCII text can hit IGNORECASE equivalences (e.g. 'ſ' ~ 's') that a
+        # plain token comparison would miss, so we skip gating for it entirely.
+        if not text.isascii():
+            return None
+        return set(self._token_pattern.findall(text.lower()))
+
+    def match(self, text, first_only=False, tokens=None):
+
+        # Callers that already tokenized the text (incremental NLU) pass tokens
+        if tokens is None:
+            tokens = self._tokens(text)
+        matches = []
+
+        for intent, entries in self.entries:
+            for anchors, pattern in entries:
+                if tokens is not None and anchors is not None and tokens.isdisjoint(anchors):
+                    continue
+                match = pattern.search(text)
+                if match:
+                    matches.append((intent, match))
+                    break
+
+            if first_only and matches:
+                break
+
+        return matches
+
+    def first_match(self, text):
+
+        matches = self.match(text, first_only=True)
+        return matches[0] if matches else (None, None)
+
+class ExtractionRule:
+    """One entry of the extraction table, compiled once with its own counters.
+
+    Pattern rules take the first pattern that matches (later patterns are not
+    tried even if the captured value turns out empty); handler rules call a
+    classifier method instead. ``stop`` ends evaluation for the intent once the
+    rule has produced a value.
+    """
+
+    def __init__(self, name, key=None, patterns=(), keywords=(), group=1, value=None,
+                 strip=None, min_length=0, handler=None, only_if_missing=False, stop=False):
+
+        self.name = name
+        self.key = key
+        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+        if keywords:
+            # Plain substring checks, folded into one alternation
+            self.patterns.append(re.compile('|'.join(re.escape(k) for k in keywords), re.IGNORECASE))
+        self.group = group
+        self.value = value
+        self.strip = strip
+        self.min_length = min_length
+        self.handler = handler
+        self.only_if_missing = only_if_missing
+        self.stop = stop
+
+        self.calls = 0
+        self.hits = 0
+        self.total_time = 0.0
+
+    def apply(self, text, info):
+
+        if self.only_if_missing and self.key in info:
+            return False
+
+        start = time.perf_counter()
+        self.calls += 1
+        result = self._evaluate(text)
+        self.total_time += time.perf_counter() - start
+
+        if result is None:
+            return False
+
+        self.hits += 1
+        if self.key is None:
+            # Handler filled several keys at once
+            info.update(result)
+        else:
+            info[self.key] = result
+        return self.stop
+
+    def _evaluate(self, text):
+
+        if not self.patterns:
+            return self.handler(text)
+
+        for pattern in self.patterns:
+            match = pattern.search(text)
+            if not match:
+                continue
+
+            if self.handler:
+                return self.handler(match)
+            if self.value is not None:
+                return self.value
+
+            result = match.group(self.group).strip(self.strip)
+            if result and len(result) > self.min_length:
+                return result
+            return None
+
+        return None
+
+    def reset_stats(self):
+
+        self.calls = 0
+        self.hits = 0
+        self.total_time = 0.0
+
+class SpokenEmailParser:
+    """Rebuild an email address from a misrecognized utterance in one pass.
+
+    The text is tokenized once. Every separator word ("at", "add", "and",
+    "et", "@") proposes a (username, separator, domain) candidate from the
+    words around it, a known domain name right after a word proposes one
+    without a separator, and the best scoring candidate wins.
+    """
+
+    _token_pattern = re.compile(r'[a-z0-9._%+@-]+')
+    _label_pattern = re.compile(r'^[a-z0-9-]+(?:\.[a-z0-9-]+)*$')
+    _username_clean_pattern = re.compile(r'[^\w.+-]')
+
+    separator_scores = {'@': 3, 'at': 3, 'add': 2, 'et': 2, 'and': 1}
+    spoken_symbols = {'dot': '.', 'underscore': '_', 'dash': '-', 'hyphen': '-'}
+    username_stop_words = {
+        'email', 'send', 'compose', 'write', 'mail', 'message', 'to', 'a', 'an', 'the',
+        'my', 'please', 'about', 'regarding', 'subject', 'with'
+    }
+    # Only unambiguous TLDs may follow a name without a spoken "dot"
+    implicit_tlds = {'com', 'org', 'net', 'edu', 'gov', 'io'}
+    max_username_words = 3
+
+    def __init__(self, lexicon):
+
+        self.lexicon = lexicon
+
+    def _tokenize(self, text):
+
+        tokens = []
+        for token in self._token_pattern.findall(text.lower()):
+            token = token.strip('.')
+            if '@' in token:
+                # "john@gmail" -> john @ gmail
+                parts = token.split('@')
+                for i, part in enumerate(parts):
+                    if i:
+                        tokens.append('@')
+                    if part:
+                        tokens.append(part)
+            elif token:
+                tokens.append(token)
+        return tokens
+
+    def _parse_username(self, tokens, end):
+
+        parts = []
+        words = 0
+        i = end - 1
+
+        while i >= 0 and words < self.max_username_words:
+            token = tokens[i]
+            if token in self.spoken_symbols:
+                parts.append(self.spoken_symbols[token])
+            elif token in self.username_stop_words or token in self.separator_scores:
+                break
+            else:
+                parts.append(token)
+                words += 1
+            i -= 1
+
+        # "john dot doe" -> john.doe, "john doe" -> johndoe
+        username = ''.join(reversed(parts))
+        username = self._username_clean_pattern.sub('', username).strip('.-_')
+        return username if len(username) > 1 else None
+
+    def _parse_domain(self, tokens, start):
+
+        i = start
+        if i >= len(tokens):
+            return None
+
+        # Names split by the recognizer ("out look") are joined while the
+        # pieces still spell the start of a known name
+        label = tokens[i]
+        joined = label
+        end = i + 1
+        while end < len(tokens) and end - i < 3 and self.lexicon.has_name_prefix(joined + tokens[end]):
+            joined += tokens[end]
+            end += 1
+            if self.lexicon.has_name(joined):
+                label = joined
+                i = end - 1
+        i += 1
+
+        if not self._label_pattern.match(label):
+            return None
+        labels = label.split('.')
+
+        while i < len(tokens):
+            token = tokens[i]
+            if token == 'dot' and i + 1 < len(tokens) and self._label_pattern.match(tokens[i + 1]):
+                labels.extend(tokens[i + 1].split('.'))
+                i += 2
+            elif len(labels) == 1 and (token in self.implicit_tlds or ('.' in token and self._label_pattern.match(token))):
+                labels.extend(token.split('.'))
+                i += 1
+            else:
+                break
+
+        domain = '.'.join(labels)
+
+        # Known domain, bare provider name ("gmail") or a close misspelling
+        known = self.lexicon.resolve(domain)
+        if known:
+            return known, True
+
+        tld = labels[-1]
+        if len(labels) == 1 or not (tld.isalpha() and len(tld) >= 2):
+            return None
+
+        return domain, False
+
+    def candidates(self, text):
+
+        tokens = self._tokenize(text)
+        candidates = []
+
+        for i, token in enumerate(tokens):
+            if token in self.separator_scores:
+                domain_start = i + 1
+                # "at the rate (of)" is a common way of saying @
+                if token == 'at' and tokens[i + 1:i + 3] == ['the', 'rate']:
+                    domain_start = i + 4 if tokens[i + 3:i + 4] == ['of'] else i + 3
+                separator_score = self.separator_scores[token]
+                username = self._parse_username(tokens, i)
+            elif i > 0 and (self.lexicon.has_name(token) or '.' in token):
+                # Missing @: "john gmail dot com"
+                domain_start = i
+                separator_score = 0
+                previous = tokens[i - 1]
+                if previous in self.username_stop_words or previous in self.separator_scores:
+                    continue
+                username = self._parse_username(tokens, i) if previous not in self.spoken_symbols else None
+            else:
+                continue
+
+            if not username:
+                continue
+
+            domain = self._parse_domain(tokens, domain_start)
+            if not domain:
+                continue
+
+            domain, known = domain
+            score = separator_score + (3 if known else 2)
+            candidates.append((score, username, token, domain))
+
+        return candidates
+
+    def parse(self, text):
+
+        best = None
+        for candidate in self.candidates(text):
+            # Ties keep the earliest candidate
+            if best is None or candidate[0] > best[0]:
+                best = candidate
+
+        if not best:
+            return None
+
+        score, username, separator, domain = best
+        return f"{username}@{domain}"
+
+class StatisticalIntentEngine:
+    """Multinomial naive Bayes over hashed word and character n-grams.
+
+    Utterances are hashed into ``n_features`` buckets (crc32, so models are
+    portable between processes) and a batch is scored against the
+    (n_features x intents) log-probability matrix in one vectorized sparse
+    product. Probabilities are calibrated with a softmax temperature fitted
+    on held-out data, since raw naive Bayes scores are far too confident.
+    """
+
+    _word_pattern = re.compile(r"[a-z0-9']+")
+
+    def __init__(self, intents=(), n_features=2 ** 15):
+
+        _require_numpy()
+
+        self.intents = list(intents)
+        self.n_features = n_features
+        self.weights = None
+        self.bias = None
+        self.temperature = 1.0
+
+    def _features(self, text):
+
+        words = self._word_pattern.findall(text.lower())
+        features = ['w:' + word for word in words]
+        features += [f"b:{first} {second}" for first, second in zip(words, words[1:])]
+        for word in words:
+            padded = f"<{word}>"
+            features += ['c:' + padded[i:i + 3] for i in range(len(padded) - 2)]
+
+        return [zlib.crc32(feature.encode('utf-8')) % self.n_features for feature in features]
+
+    def _featurize(self, texts):
+
+        # CSR-style: flat feature indices plus the row each one belongs to
+        indices = []
+        rows = []
+        for row, text in enumerate(texts):
+            features = self._features(text or '')
+            indices.extend(features)
+            rows.extend([row] * len(features))
+
+        return np.asarray(indices, dtype=np.int64), np.asarray(rows, dtype=np.int64)
+
+    def _scores(self, texts):
+
+        # Sparse (texts x features) @ (features x intents), one bincount per intent
+        indices, rows = self._featurize(texts)
+        gathered = self.weights[indices]
+        scores = np.empty((len(texts), len(self.intents)), dtype=np.float64)
+        for column in range(len(self.intents)):
+            scores[:, column] = np.bincount(rows, weights=gathered[:, column], minlength=len(texts))
+        return scores + self.bias
+
+    @staticmethod
+    def _softmax(scores):
+
+        scores = scores - scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def fit(self, texts, labels, alpha=0.1, calibration_fraction=0.1, groups=None):
+
+        if not self.intents:
+            self.intents = sorted(set(labels))
+        label_ids = np.asarray([self.intents.index(label) for label in labels], dtype=np.int64)
+
+        # Hold out every n-th example to fit the temperature. With groups
+        # (e.g. the template each example was made from) whole groups are
+        # held out instead, fold by fold until every group has been scored
+        # by counts that never saw it, so the temperature reflects new
+        # phrasings rather than memorised ones
+        step = max(2, int(round(1 / calibration_fraction))) if calibration_fraction else 0
+        if step and groups is not None:
+            unique_groups = sorted(set(groups))
+            folds = [set(unique_groups[fold::step]) for fold in range(min(step, len(unique_groups)))]
+        elif step:
+            folds = [None]
+        else:
+            folds = []
+
+        scores, held_labels = [], []
+        for fold in folds:
+            if fold is None:
+                held_out = np.zeros(len(texts), dtype=bool)
+                held_out[::step] = True
+            else:
+                held_out = np.asarray([group in fold for group in groups], dtype=bool)
+            if held_out.all():
+                continue
+            self._fit_counts([t for t, h in zip(texts, held_out) if not h], label_ids[~held_out], alpha)
+            scores.append(self._scores([t for t, h in zip(texts, held_out) if h]))
+            held_labels.append(label_ids[held_out])
+        if scores:
+            self.temperature = self._fit_temperature(np.vstack(scores), np.concatenate(held_labels))
+
+        # Final model uses every example
+        self._fit_counts(texts, label_ids, alpha)
+        return self
+
+    def _fit_counts(self, texts, label_ids, alpha):
+
+        indices, rows = self._featurize(texts)
+        counts = np.zeros((self.n_features, len(self.intents)), dtype=np.float64)
+        np.add.at(counts, (indices, label_ids[rows]), 1.0)
+
+        smoothed = counts + alpha
+        self.weights = (np.log(smoothed) - np.log(smoothed.sum(axis=0))).astype(np.float32)
+
+        priors = np.bincount(label_ids, minlength=len(self.intents)) + 1.0
+        self.bias = np.log(priors / priors.sum())
+
+    def _fit_temperature(self, scores, label_ids):
+
+        best_temperature, best_loss = 1.0, None
+        # Naive Bayes only ever needs softening, so T >= 1
+        for temperature in np.geomspace(1, 100, 41):
+            probabilities = self._softmax(scores / temperature)
+            loss = -np.log(probabilities[np.arange(len(label_ids)), label_ids] + 1e-12).mean()
+            if best_loss is None or loss < best_loss:
+                best_temperature, best_loss = float(temperature), loss
+        return best_temperature
+
+    def predict_proba(self, texts):
+
+        return self._softmax(self._scores(texts) / self.temperature)
+
+    def predict(self, texts):
+
+        probabilities = self.predict_proba(texts)
+        best = probabilities.argmax(axis=1)
+        return [(self.intents[i], float(probabilities[row, i])) for row, i in enumerate(best)]
+
+    def save(self, path):
+
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=self.bias,
+            intents=np.asarray(self.intents),
+            n_features=self.n_features,
+            temperature=self.temperature
+        )
+
+    @classmethod
+    def load(cls, path):
+
+        with _require_numpy().load(path) as data:
+            engine = cls(intents=[str(intent) for intent in data['intents']], n_features=int(data['n_features']))
+            engine.weights = data['weights']
+            engine.bias = data['bias']
+            engine.temperature = float(data['temperature'])
+        return engine
+
+class IncrementalIntentTracker:
+    """Early intent guesses from the growing partial transcripts of one utterance.
+
+    Feed every partial hypothesis to update(); the word tokens of the part of
+    the text that didn't change are kept between updates, so only the new
+    tail is tokenized before the gated regex check. on_guess is called with a
+    guess dict whenever the intent or its extracted info changes, and
+    finalize() reports how long before the final transcript the intent
+    settled on its final value.
+    """
+
+    def __init__(self, classifier, stable_updates=2, on_guess=None, clock=time.monotonic):
+
+        self.classifier = classifier
+        self.stable_updates = stable_updates
+        self.on_guess = on_guess
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+
+        self._text = ''
+        self._tokens = []  # [(token, end offset)] of self._text
+        self._history = []  # [(timestamp, intent)] per update
+        self.guess = None
+
+    def _update_tokens(self, text):
+
+        # Tokens ending before the shared prefix ends are complete and unchanged
+        shared = len(os.path.commonprefix([self._text, text]))
+        kept = [(token, end) for token, end in self._tokens if end < shared]
+        start = kept[-1][1] if kept else 0
+
+        new_tokens = [(match.group(), match.end()) for match in IntentMatcher._token_pattern.finditer(text, start)]
+        self._tokens = kept + new_tokens
+        self._text = text
+
+        if not text.isascii():
+            return None
+        return {token for token, end in self._tokens}
+
+    def _classify(self, text):
+
+        classifier = self.classifier
+        if classifier.statistical_engine is not None:
+            self._text = text
+            intent, confidence, extracted_info = classifier._classify_statistical([text])[0]
+            return intent, confidence, extracted_info
+
+        tokens = self._update_tokens(text)
+        matches = classifier.matcher.match(text, first_only=True, tokens=tokens)
+        if not matches:
+            return 'qa', 0.5, {}
+
+        intent = matches[0][0]
+        return intent, 1.0, classifier._apply_extraction_rules(intent, text)
+
+    def update(self, partial_text, timestamp=None):
+
+        timestamp = self.clock() if timestamp is None else timestamp
+        text = (partial_text or '').lower()
+        if not text.strip():
+            return self.guess
+
+        intent, confidence, extracted_info = self._classify(text)
+        self._history.append((timestamp, intent))
+
+        recent = [seen for _, seen in self._history[-self.stable_updates:]]
+        stable = len(recent) == self.stable_updates and all(seen == intent for seen in recent)
+
+        previous = self.guess
+        self.guess = {
+            'intent': intent,
+            'confidence': confidence,
+            'extracted_info': extracted_info,
+            'stable': stable,
+            'text': text,
+            'timestamp': timestamp
+        }
+
+        changed = (previous is None or previous['intent'] != intent
+                   or previous['extracted_info'] != extracted_info or previous['stable'] != stable)
+        if changed and self.on_guess:
+            try:
+                self.on_guess(dict(self.guess))
+            except Exception as e:
+                logger.error("Error in early intent callback: %s", e)
+
+        return self.guess
+
+    def finalize(self, final_text, timestamp=None):
+
+        timestamp = self.clock() if timestamp is None else timestamp
+        intent, confidence, extracted_info = self.classifier.classify_intent(final_text)
+
+        # Earliest update after which every guess already equalled the final intent
+        stable_since = None
+        for seen_at, seen in reversed(self._history):
+            if seen != intent:
+                break
+            stable_since = seen_at
+
+        lead_ms = (timestamp - stable_since) * 1000 if stable_since is not None else 0.0
+        report = {
+            'intent': intent,
+            'confidence': confidence,
+            'extracted_info': extracted_info,
+            'updates': len(self._history),
+            'stable_since': stable_since,
+            'lead_ms': lead_ms
+        }
+
+        logger.info("Intent '%s' was stable %.0f ms before the final transcript", intent, lead_ms)
+        self.reset()
+        return report
+
+class LRUCache:
+    """Bounded least-recently-used cache with hit, miss and eviction counters.
+
+    Safe to share between threads; one classifier can serve many sessions.
+    """
+
+    def __init__(self, capacity):
+
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+
+        return len(self._entries)
+
+    def get(self, key, default=None):
+
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+
+        return {
+            'capacity': self.capacity,
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
 class IntentClassifier:
    
-    def __init__(self):
+    def __init__(self, domain_lexicon_path=None, cache_size=0, engine='regex', model_path=None):
        
+        # Optional memoization of classify_intent / is_wake_word_only
+        self.cache = LRUCache(cache_size) if cache_size and cache_size > 0 else None
+
+        # 'regex' (first matching pattern) or 'statistical' (StatisticalIntentEngine)
+        self.engine = engine
+        self.model_path = model_path or DEFAULT_MODEL_PATH
+        self.statistical_engine = None
+        if engine == 'statistical':
+            self.statistical_engine = self._load_statistical_engine(self.model_path)
+
         self.wake_words = ["vishnu", "hey vishnu", "assistant"]
         self.intent_patterns = {
             'reminder': [
@@ -70,11 +794,179 @@ class IntentClassifier:
             'qa': []  # Default fallback for any other queries
         }
 
+        # Common email domains that might be mentioned separately, used when
+        # the domain lexicon file can't be loaded
+        self.common_domains = [
+            'gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'aol.com',
+            'icloud.com', 'protonmail.com', 'mail.com', 'yandex.com', 'zoho.com',
+            'inbox.com', 'live.com', 'msn.com', 'me.com', 'mac.com'
+        ]
+        self.domain_lexicon_path = domain_lexicon_path or DEFAULT_LEXICON_PATH
+        self.domain_lexicon = self._load_domain_lexicon(self.domain_lexicon_path)
+        self.email_parser = SpokenEmailParser(self.domain_lexicon)
+
+        self.email_pattern = r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b'
+        self.compiled_email_pattern = re.compile(self.email_pattern)
+        self.reminder_time_phrase_pattern = re.compile(r'\b(?:in|at|from)\s+[^,]*', re.IGNORECASE)
+        self.reminder_duration_pattern = re.compile(r'\d+\s*(?:minutes?|mins?|hours?|hrs?)', re.IGNORECASE)
+
+        # Extraction rules per intent, evaluated in order (see ExtractionRule)
+        self.extraction_rules = {
+            'system': [
+                {'name': 'exit', 'key': 'exit', 'value': True, 'stop': True,
+                 'keywords': ['exit', 'quit', 'stop', 'shutdown', 'bye', 'goodbye', 'close', 'turn off', 'shut down']},
+                {'name': 'application', 'key': 'application', 'stop': True, 'patterns': [
+                    r'\bopen\s+([a-zA-Z\s]+)',
+                    r'\blaunch\s+([a-zA-Z\s]+)',
+                    r'\bstart\s+([a-zA-Z\s]+)',
+                    r'\brun\s+([a-zA-Z\s]+)'
+                ]},
+                {'name': 'youtube_query', 'key': 'youtube_query', 'stop': True, 'patterns': [
+                    r'\bplay\s+(?:youtube\s+)?(.+)',
+                    r'\bwatch\s+(?:youtube\s+)?(.+)',
+                    r'\bplay\s+videos?\s+(?:in\s+)?(?:youtube\s+)?(.+)',
+                    r'\bplay\s+(?:in\s+)?youtube\s+(.+)'
+                ]},
+                # For "play videos in youtube" commands
+                {'name': 'video_query', 'key': 'video_query', 'stop': True, 'patterns': [
+                    r'\bplay\s+videos?\s+(?:in\s+)?(?:youtube\s+)?(.+)',
+                    r'\bplay\s+(?:in\s+)?youtube\s+(.+)',
+                    r'\bwatch\s+videos?\s+(?:in\s+)?(?:youtube\s+)?(.+)'
+                ]},
+                {'name': 'song_name', 'key': 'song_name', 'stop': True, 'patterns': [
+                    r'\bplay\s+song\s+(.+)',
+                    r'\bplay\s+(.+?)\s+song',
+                    r'\blisten\s+to\s+(.+)'
+                ]},
+                {'name': 'search_query', 'key': 'search_query', 'stop': True, 'patterns': [
+                    r'\bsearch\s+(?:for\s+)?(.+)',
+                    r'\bgoogle\s+(.+)',
+                    r'\blook\s+up\s+(.+)'
+                ]}
+            ],
+            'email': [
+                # Complete email addresses with @ symbol first
+                {'name': 'recipient', 'key': 'recipient', 'group': 0, 'patterns': [self.email_pattern]},
+                # Speech recognition errors where @ might be missing or replaced
+                {'name': 'recipient_from_speech', 'key': 'recipient', 'only_if_missing': True,
+                 'handler': '_reconstruct_email_from_speech'},
+                {'name': 'subject', 'key': 'subject', 'min_length': 2, 'patterns': [
+                    r'(?:about|regarding|subject)\s*[:\-]?\s*([^\.,;!?]+)',
+                    r'subject\s*[:\-]?\s*([^\.,;!?]+)',
+                    r'with\s+subject\s*[:\-]?\s*([^\.,;!?]+)'
+                ]},
+                {'name': 'body', 'key': 'body', 'handler': '_extract_email_body'}
+            ],
+            'reminder': [
+                {'name': 'time', 'handler': '_extract_reminder_time', 'patterns': [
+                    r'in\s+(\d+)\s*(minutes?|mins?|hours?|hrs?)',
+                    r'(\d+)\s*(minutes?|mins?|hours?|hrs?)\s+from\s+now',
+                    r'at\s+(\d+):?(\d+)?\s*(am|pm)?'
+                ]},
+                {'name': 'text', 'key': 'text', 'handler': '_extract_reminder_text'}
+            ],
+            'weather': [
+                {'name': 'city', 'key': 'city', 'strip': ' ,.', 'min_length': 1, 'stop': True, 'patterns': [
+                    r'in\s+([A-Za-z\s,]+)',
+                    r'at\s+([A-Za-z\s,]+)',
+                    r'for\s+([A-Za-z\s,]+)'
+                ]},
+                # If no location found, try to extract any place names
+                {'name': 'city_from_names', 'key': 'city', 'only_if_missing': True,
+                 'handler': '_extract_place_name'}
+            ]
+        }
+
+        self._compile_patterns()
+        self._compile_extraction_rules()
+
+    def _load_statistical_engine(self, path):
+
+        try:
+            engine = StatisticalIntentEngine.load(path)
+            logger.info("Loaded statistical intent model from %s", path)
+            return engine
+        except Exception as e:
+            logger.error("Failed to load intent model from %s, using regex engine: %s", path, e)
+            self.engine = 'regex'
+            return None
+
+    def _load_domain_lexicon(self, path):
+
+        try:
+            return DomainLexicon.load(path)
+        except Exception as e:
+            logger.error("Failed to load domain lexicon from %s: %s", path, e)
+            return DomainLexicon(self.common_domains)
+
+    def _compile_patterns(self):
+
         # Compile regex patterns for better performance
         self.compiled_patterns = {}
         for intent, patterns in self.intent_patterns.items():
             self.compiled_patterns[intent] = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
 
+        self.matcher = IntentMatcher(self.compiled_patterns)
+        self.invalidate_cache()
+
+    def _compile_extraction_rules(self):
+
+        self.compiled_extraction_rules = {}
+        for intent, specs in self.extraction_rules.items():
+            rules = []
+            for spec in specs:
+                spec = dict(spec)
+                if 'handler' in spec:
+                    spec['handler'] = getattr(self, spec['handler'])
+                rules.append(ExtractionRule(**spec))
+            self.compiled_extraction_rules[intent] = rules
+
+        self.invalidate_cache()
+
+    def reload_patterns(self):
+
+        # Call after editing intent_patterns or extraction_rules
+        self._compile_patterns()
+        self._compile_extraction_rules()
+
+    def invalidate_cache(self):
+
+        if self.cache is not None:
+            self.cache.clear()
+
+    def get_cache_stats(self):
+
+        return self.cache.stats() if self.cache is not None else None
+
+    def get_extraction_stats(self):
+
+        # Most expensive rules first
+        stats = []
+        for intent, rules in self.compiled_extraction_rules.items():
+            for rule in rules:
+                stats.append({
+                    'intent': intent,
+                    'rule': rule.name,
+                    'calls': rule.calls,
+                    'hits': rule.hits,
+                    'total_ms': rule.total_time * 1000,
+                    'avg_us': (rule.total_time / rule.calls * 1e6) if rule.calls else 0.0
+                })
+        return sorted(stats, key=lambda stat: stat['total_ms'], reverse=True)
+
+    def reset_extraction_stats(self):
+
+        for rules in self.compiled_extraction_rules.values():
+            for rule in rules:
+                rule.reset_stats()
+
+    def match_intents(self, text):
+
+        if not text or not text.strip():
+            return []
+
+        return [intent for intent, match in self.matcher.match(text.lower())]
+
     def has_wake_word(self, text):
       
         if not text:
@@ -107,6 +999,19 @@ class IntentClassifier:
         if not text:
             return False
 
+        if self.cache is None:
+            return self._is_wake_word_only(text)
+
+        # Both methods only ever look at text.lower(), so that's the cache key
+        key = ('wake', text.lower())
+        result = self.cache.get(key)
+        if result is None:
+            result = self._is_wake_word_only(text)
+            self.cache.put(key, result)
+        return result
+
+    def _is_wake_word_only(self, text):
+
         # Remove all wake words from the text
         clean_text = self.remove_wake_word(text)
 
@@ -118,177 +1023,138 @@ class IntentClassifier:
         if not text or not text.strip():
             return 'qa', 0.0, {}
 
-        text_lower = text.lower()
+        if self.cache is None:
+            return self._classify_intent(text)
 
-        # Check each intent pattern
-        for intent, patterns in self.compiled_patterns.items():
-            for pattern in patterns:
-                match = pattern.search(text_lower)
-                if match:
-                    # Extract relevant information based on intent
-                    extracted_info = self._extract_info(intent, text_lower, match)
-                    logger.info(f"Classified as '{intent}' with confidence 1.0")
-                    return intent, 1.0, extracted_info
-
-        # Default to Q&A if no specific intent matches
-        logger.info("No specific intent matched, defaulting to 'qa'")
-        return 'qa', 0.5, {}
+        key = ('intent', text.lower())
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = self._classify_intent(text)
+            self.cache.put(key, cached)
 
-    def _extract_info(self, intent, text, match):
-        
-        info = {}
+        # Hand out copies so callers can't modify the cached extracted_info
+        intent, confidence, extracted_info = cached
+        return intent, confidence, dict(extracted_info)
 
-        if intent == 'email':
-            # Extract email components
-            info = self._extract_email_info(text)
+    def _classify_intent(self, text):
 
-        elif intent == 'reminder':
-            # Extract reminder components
-            info = self._extract_reminder_info(text)
-
-        elif intent == 'weather':
-            # Extract location for weather
-            info = self._extract_weather_info(text)
-
-        elif intent == 'system':
-            # Extract system command information
-            info = self._extract_system_info(text)
-
-        return info
-
-    def _extract_system_info(self, text):
-       
-        info = {}
+        if self.statistical_engine is not None:
+            return self._classify_statistical([text])[0]
 
-        # Check for exit commands first
-        exit_commands = ['exit', 'quit', 'stop', 'shutdown', 'bye', 'goodbye', 'close', 'turn off', 'shut down']
         text_lower = text.lower()
-        for exit_cmd in exit_commands:
-            if exit_cmd in text_lower:
-                info['exit'] = True
-                break
 
-        # Extract application name
-        app_patterns = [
-            r'\bopen\s+([a-zA-Z\s]+)',
-            r'\blaunch\s+([a-zA-Z\s]+)',
-            r'\bstart\s+([a-zA-Z\s]+)',
-            r'\brun\s+([a-zA-Z\s]+)'
-        ]
+        # First intent (in pattern order) with a matching pattern wins
+        intent, match = self.matcher.first_match(text_lower)
+        if match:
+            # Extract relevant information based on intent
+            extracted_info = self._extract_info(intent, text_lower, match)
+            logger.info("Classified as '%s' with confidence 1.0", intent)
+            return intent, 1.0, extracted_info
 
-        for pattern in app_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                app_name = match.group(1).strip()
-                if app_name:
-                    info['application'] = app_name
-                break
+        # Default to Q&A if no specific intent matches
+        logger.info("No specific intent matched, defaulting to 'qa'")
+        return 'qa', 0.5, {}
 
-        # Extract YouTube query
-        youtube_patterns = [
-            r'\bplay\s+(?:youtube\s+)?(.+)',
-            r'\bwatch\s+(?:youtube\s+)?(.+)',
-            r'\bplay\s+videos?\s+(?:in\s+)?(?:youtube\s+)?(.+)',
-            r'\bplay\s+(?:in\s+)?youtube\s+(.+)'
-        ]
+    def _classify_statistical(self, texts):
+
+        # Whole batch scored in one call, then extraction per utterance
+        texts_lower = [text.lower() for text in texts]
+        results = []
+        for text_lower, (intent, confidence) in zip(texts_lower, self.statistical_engine.predict(texts_lower)):
+            extracted_info = self._apply_extraction_rules(intent, text_lower)
+            logger.info("Classified as '%s' with confidence %.2f", intent, confidence)
+            results.append((intent, confidence, extracted_info))
+        return results
+
+    def classify_batch(self, texts, workers=None, chunk_size=1000, compact=False):
+
+        # Generator: yields (intent, confidence, extracted_info) in input order
+        if not workers or workers <= 1:
+            if self.statistical_engine is None:
+                for text in texts:
+                    yield self.classify_intent(text)
+                return
+
+            iterator = iter(texts)
+            while True:
+                chunk = list(itertools.islice(iterator, chunk_size))
+                if not chunk:
+                    return
+                scored = iter(self._classify_statistical([text for text in chunk if text and text.strip()]))
+                for text in chunk:
+                    yield next(scored) if text and text.strip() else ('qa', 0.0, {})
+
+        worker_func = _classify_chunk_compact if compact else _classify_chunk
+        chunks = self._iter_batch_chunks(texts, chunk_size, compact)
+
+        # multiprocessing is only imported by the batch path
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                 initargs=(self.intent_patterns, self.domain_lexicon_path,
+                                           self.engine, self.model_path)) as executor:
+            # Keep a bounded window in flight so huge corpora stream through
+            pending = deque()
+            for chunk in itertools.islice(chunks, workers * 2):
+                pending.append(executor.submit(worker_func, chunk))
+
+            while pending:
+                results = pending.popleft().result()
+                for chunk in itertools.islice(chunks, 1):
+                    pending.append(executor.submit(worker_func, chunk))
+
+                if compact:
+                    yield from _expand_compact(results)
+                else:
+                    yield from results
+
+    def _iter_batch_chunks(self, texts, chunk_size, compact):
+
+        iterator = iter(texts)
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size))
+            if not chunk:
+                return
+
+            # A single string pickles much faster than a list of small ones
+            if compact and all(isinstance(text, str) and '\n' not in text for text in chunk):
+                yield '\n'.join(chunk)
+            else:
+                yield chunk
 
-        for pattern in youtube_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                query = match.group(1).strip()
-                if query:
-                    info['youtube_query'] = query
-                break
+    def _extract_info(self, intent, text, match):
 
-        # Extract video query (for "play videos in youtube" commands)
-        video_patterns = [
-            r'\bplay\s+videos?\s+(?:in\s+)?(?:youtube\s+)?(.+)',
-            r'\bplay\s+(?:in\s+)?youtube\s+(.+)',
-            r'\bwatch\s+videos?\s+(?:in\s+)?(?:youtube\s+)?(.+)'
-        ]
+        return self._apply_extraction_rules(intent, text)
 
-        for pattern in video_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                video_query = match.group(1).strip()
-                if video_query:
-                    info['video_query'] = video_query
-                break
+    def _apply_extraction_rules(self, intent, text):
 
-        # Extract song name
-        song_patterns = [
-            r'\bplay\s+song\s+(.+)',
-            r'\bplay\s+(.+?)\s+song',
-            r'\blisten\s+to\s+(.+)'
-        ]
+        info = {}
 
-        for pattern in song_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                song_name = match.group(1).strip()
-                if song_name:
-                    info['song_name'] = song_name
+        for rule in self.compiled_extraction_rules.get(intent, ()):
+            if rule.apply(text, info):
                 break
 
-        # Extract search query
-        search_patterns = [
-            r'\bsearch\s+(?:for\s+)?(.+)',
-            r'\bgoogle\s+(.+)',
-            r'\blook\s+up\s+(.+)'
-        ]
+        return info
 
-        for pattern in search_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                search_query = match.group(1).strip()
-                if search_query:
-                    info['search_query'] = search_query
-                break
+    def _extract_system_info(self, text):
 
-        return info
+        return self._apply_extraction_rules('system', text)
 
     def _extract_email_info(self, text):
-        
-        info = {}
 
-        # First try to find complete email addresses with @ symbol
-        email_pattern = r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-
-        if emails:
-            info['recipient'] = emails[0]  # Take first email found
-            logger.info(f"Found complete email address: {emails[0]}")
-
-        # Handle speech recognition errors where @ might be missing or replaced
-        if 'recipient' not in info:
-            reconstructed_email = self._reconstruct_email_from_speech(text)
-            if reconstructed_email:
-                info['recipient'] = reconstructed_email
-                logger.info(f"Reconstructed email from speech: {reconstructed_email}")
-
-        # Look for subject (after "about", "regarding", etc.)
-        subject_patterns = [
-            r'(?:about|regarding|subject)\s*[:\-]?\s*([^\.,;!?]+)',
-            r'subject\s*[:\-]?\s*([^\.,;!?]+)',
-            r'with\s+subject\s*[:\-]?\s*([^\.,;!?]+)'
-        ]
+        return self._apply_extraction_rules('email', text)
 
-        for pattern in subject_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                subject = match.group(1).strip()
-                if subject and len(subject) > 2:
-                    info['subject'] = subject
-                    logger.info(f"Found email subject: {subject}")
-                break
+    def _extract_email_body(self, text):
+
+        text_lower = text.lower()
 
         # Extract body (everything after common separators)
         body_separators = ['about', 'regarding', 'subject', 'message', 'body', 'content']
         body_text = text
 
         for separator in body_separators:
-            if separator in text.lower():
-                parts = text.lower().split(separator, 1)
+            if separator in text_lower:
+                parts = text_lower.split(separator, 1)
                 if len(parts) > 1:
                     body_text = parts[1].strip(' :-.')
                     break
@@ -296,398 +1162,105 @@ class IntentClassifier:
         # Clean up the body text
         if body_text and len(body_text) > 5:
             # Remove email addresses from body if present
-            body_text = re.sub(email_pattern, '', body_text)
+            body_text = self.compiled_email_pattern.sub('', body_text)
             body_text = body_text.strip(' :-.!?')
             if body_text:
-                info['body'] = body_text
-                logger.info(f"Found email body: {body_text}")
+                return body_text
 
         # If no body found, use the entire text as body
-        if 'body' not in info and text.strip():
-            clean_text = re.sub(email_pattern, '', text).strip(' :-.!?')
+        if text.strip():
+            clean_text = self.compiled_email_pattern.sub('', text).strip(' :-.!?')
             if clean_text and len(clean_text) > 5:
-                info['body'] = clean_text
-                logger.info(f"Using full text as email body: {clean_text}")
+                return clean_text
 
-        return info
+        return None
 
     def _reconstruct_email_from_speech(self, text):
-       
-        text_lower = text.lower()
-        logger.info(f"Attempting to reconstruct email from: '{text}'")
-
-        # Common speech recognition errors for @ symbol
-        at_replacements = [' at ', ' add ', ' and ', ' et ', ' @ ', ' at', ' add', ' and', ' et', ' @']
 
-        # Common email domains that might be mentioned separately
-        common_domains = [
-            'gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'aol.com',
-            'icloud.com', 'protonmail.com', 'mail.com', 'yandex.com', 'zoho.com',
-            'inbox.com', 'live.com', 'msn.com', 'me.com', 'mac.com'
-        ]
-
-        # Method 1: Handle "username at domain" patterns
-        for replacement in at_replacements:
-            if replacement in text_lower:
-                parts = text_lower.split(replacement, 1)
-                if len(parts) == 2:
-                    username_part = parts[0].strip()
-                    domain_part = parts[1].strip()
-
-                    # Extract username from the end of the first part (most likely the actual username)
-                    username_words = username_part.split()
-                    if username_words:
-                        # Skip command words and take the last meaningful word as username
-                        command_words = ['email', 'send', 'compose', 'write', 'mail', 'message', 'to']
-                        meaningful_words = [word for word in username_words if word not in command_words]
-
-                        if meaningful_words:
-                            # Take the last meaningful word as the username
-                            potential_username = meaningful_words[-1]
-                            # Clean up the username
-                            username = re.sub(r'[^\w.]', '', potential_username).strip('.')
-
-                            # Try to extract domain from domain part
-                            domain = self._extract_domain_from_text(domain_part, common_domains)
-
-                            if username and domain:
-                                reconstructed = f"{username}@{domain}"
-                                logger.info(f"Reconstructed email: {username}@{domain} from '{username_part}' + '{replacement}' + '{domain_part}'")
-                                return reconstructed
-
-                        # If no meaningful words found, try to reconstruct from the entire username part
-                        # This handles cases like "john doe" where we need to combine words
-                        if len(username_words) >= 2:
-                            # Look for patterns like "firstname lastname" and combine them
-                            # Skip command words and combine the remaining words
-                            non_command_words = [word for word in username_words if word not in command_words]
-                            if len(non_command_words) >= 2:
-                                # Combine the last two non-command words (e.g., "john doe" -> "johndoe")
-                                combined_username = ''.join(non_command_words[-2:])
-                                username = re.sub(r'[^\w.]', '', combined_username).strip('.')
-
-                                domain = self._extract_domain_from_text(domain_part, common_domains)
-
-                                if username and domain:
-                                    reconstructed = f"{username}@{domain}"
-                                    logger.info(f"Reconstructed email from combined words: {username}@{domain}")
-                                    return reconstructed
-
-        # Method 2: Handle "username domain" patterns (missing @)
-        words = text_lower.split()
-        for i, word in enumerate(words):
-            # Look for potential username followed by domain parts
-            if i < len(words) - 1:
-                # Skip common email command words
-                skip_words = ['email', 'send', 'compose', 'write', 'mail', 'message', 'to']
-                if word in skip_words:
-                    continue
-
-                potential_username = re.sub(r'[^\w.]', '', word).strip('.')
-                remaining_text = ' '.join(words[i+1:])
-
-                # Check if remaining text contains domain-like words
-                for domain in common_domains:
-                    domain_parts = domain.split('.')
-                    if len(domain_parts) >= 2:
-                        # Check if domain parts appear in remaining text
-                        domain_found = True
-                        for part in domain_parts:
-                            if part not in remaining_text:
-                                domain_found = False
-                                break
-
-                        if domain_found and potential_username:
-                            reconstructed = f"{potential_username}@{domain}"
-                            logger.info(f"Reconstructed email from word pattern: {reconstructed}")
-                            return reconstructed
-
-        # Method 3: Handle cases where domain appears before username
-        # Look for domain patterns first, then find username before it
-        for domain in common_domains:
-            domain_parts = domain.split('.')
-            if len(domain_parts) >= 2:
-                # Check if domain parts appear in the text
-                domain_found = True
-                for part in domain_parts:
-                    if part not in text_lower:
-                        domain_found = False
-                        break
-
-                if domain_found:
-                    # Find the word before the domain
-                    domain_pos = text_lower.find(domain_parts[0])
-                    if domain_pos > 0:
-                        # Get text before domain
-                        before_domain = text_lower[:domain_pos].strip()
-                        before_words = before_domain.split()
-
-                        if before_words:
-                            # Take the last word before domain as username
-                            potential_username = before_words[-1]
-                            username = re.sub(r'[^\w.]', '', potential_username).strip('.')
-
-                            if username:
-                                reconstructed = f"{username}@{domain}"
-                                logger.info(f"Reconstructed email from domain-first pattern: {reconstructed}")
-                                return reconstructed
-
-        # Method 4: Enhanced pattern matching for complex cases
-        # Look for patterns like "to X at Y" where X is the username
-        patterns = [
-            r'\bto\s+([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+at\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-            r'\bto\s+([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+add\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-            r'\bto\s+([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+and\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text_lower, re.IGNORECASE)
-            if match:
-                username_part = match.group(1).strip()
-                domain_part = match.group(2).strip()
-
-                # Clean username (remove spaces and special chars)
-                username = re.sub(r'[^\w.]', '', username_part.replace(' ', '')).strip('.')
-
-                # Check if domain is in our common domains list
-                domain = None
-                for common_domain in common_domains:
-                    if common_domain in domain_part:
-                        domain = common_domain
-                        break
-
-                if not domain:
-                    domain = domain_part  # Use as-is if not in common list
-
-                if username and domain:
-                    reconstructed = f"{username}@{domain}"
-                    logger.info(f"Reconstructed email from enhanced pattern: {reconstructed}")
-                    return reconstructed
-
-        # Method 5: More flexible pattern matching for edge cases
-        # Handle cases where the command words are interfering
-        flexible_patterns = [
-            r'\b([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+at\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-            r'\b([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+add\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-            r'\b([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+and\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
-        ]
-
-        for pattern in flexible_patterns:
-            match = re.search(pattern, text_lower, re.IGNORECASE)
-            if match:
-                username_part = match.group(1).strip()
-                domain_part = match.group(2).strip()
-
-                # Skip if this looks like a command word
-                command_indicators = ['email', 'send', 'compose', 'write', 'mail', 'message']
-                if username_part in command_indicators:
-                    continue
-
-                # Clean username (remove spaces and special chars)
-                username = re.sub(r'[^\w.]', '', username_part.replace(' ', '')).strip('.')
-
-                # Check if domain is in our common domains list
-                domain = None
-                for common_domain in common_domains:
-                    if common_domain in domain_part:
-                        domain = common_domain
-                        break
-
-                if not domain:
-                    domain = domain_part  # Use as-is if not in common list
-
-                if username and domain and len(username) > 1:
-                    reconstructed = f"{username}@{domain}"
-                    logger.info(f"Reconstructed email from flexible pattern: {reconstructed}")
-                    return reconstructed
-
-        # Method 6: Last resort - try to find any word + domain pattern
-        # This is a fallback for cases where other methods fail
-        logger.info("Trying last resort method...")
-        words = text_lower.split()
-        for i, word in enumerate(words):
-            # Skip command words
-            if word in ['email', 'send', 'compose', 'write', 'mail', 'message', 'to']:
-                continue
+        reconstructed = self.email_parser.parse(text)
+        if reconstructed:
+            logger.info("Reconstructed email from speech: %s", reconstructed)
+        return reconstructed
 
-            # Check if this word could be a username (not a domain part)
-            if not any(domain_part in word for domain_part in ['.com', '.org', '.net', '.edu', '.gov']):
-                # Look ahead for domain-like words
-                for j in range(i + 1, min(i + 3, len(words))):  # Look at next 2 words
-                    potential_domain = words[j]
-                    # Check if it looks like a domain
-                    if '.' in potential_domain and len(potential_domain) > 3:
-                        # Check if domain is in our common domains list
-                        domain = None
-                        for common_domain in common_domains:
-                            if common_domain in potential_domain:
-                                domain = common_domain
-                                break
-
-                        if not domain:
-                            domain = potential_domain  # Use as-is if not in common list
-
-                        if domain:
-                            username = re.sub(r'[^\w.]', '', word).strip('.')
-                            if username and len(username) > 1:
-                                reconstructed = f"{username}@{domain}"
-                                logger.info(f"Reconstructed email from last resort pattern: {reconstructed}")
-                                return reconstructed
-
-        # Method 7: Ultimate fallback - look for any pattern that might work
-        logger.info("Trying ultimate fallback method...")
-        # Try to find patterns like "X at Y" or "X add Y" anywhere in the text
-        ultimate_patterns = [
-            r'(\w+)\s+at\s+(\w+\.\w+)',
-            r'(\w+)\s+add\s+(\w+\.\w+)',
-            r'(\w+)\s+and\s+(\w+\.\w+)'
-        ]
-
-        for pattern in ultimate_patterns:
-            match = re.search(pattern, text_lower, re.IGNORECASE)
-            if match:
-                username = match.group(1).strip()
-                domain = match.group(2).strip()
-
-                # Skip if username looks like a command word
-                if username not in ['email', 'send', 'compose', 'write', 'mail', 'message', 'to']:
-                    # Check if domain is in our common domains list
-                    actual_domain = None
-                    for common_domain in common_domains:
-                        if common_domain in domain:
-                            actual_domain = common_domain
-                            break
-
-                    if not actual_domain:
-                        actual_domain = domain  # Use as-is if not in common list
-
-                    if username and actual_domain and len(username) > 1:
-                        reconstructed = f"{username}@{actual_domain}"
-                        logger.info(f"Reconstructed email from ultimate fallback: {reconstructed}")
-                        return reconstructed
-
-        # Method 8: Debug the specific failing cases
-        logger.info("Trying debug method for specific failing cases...")
-        # For "send email to john doe at company.com" - the issue is "john doe" should become "johndoe"
-        # Let's try a more specific approach for multi-word usernames
-        debug_patterns = [
-            r'\bto\s+([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+at\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-            r'\bto\s+([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+add\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-            r'\bto\s+([a-zA-Z0-9]+(?:\s+[a-zA-Z0-9]+)*?)\s+and\s+([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
-        ]
-
-        for pattern in debug_patterns:
-            match = re.search(pattern, text_lower, re.IGNORECASE)
-            if match:
-                username_part = match.group(1).strip()
-                domain_part = match.group(2).strip()
-
-                logger.info(f"Debug pattern matched: username_part='{username_part}', domain_part='{domain_part}'")
-
-                # Clean username (remove spaces and special chars)
-                username = re.sub(r'[^\w.]', '', username_part.replace(' ', '')).strip('.')
-
-                # Check if domain is in our common domains list
-                domain = None
-                for common_domain in common_domains:
-                    if common_domain in domain_part:
-                        domain = common_domain
-                        break
-
-                if not domain:
-                    domain = domain_part  # Use as-is if not in common list
-
-                if username and domain and len(username) > 1:
-                    reconstructed = f"{username}@{domain}"
-                    logger.info(f"Reconstructed email from debug pattern: {reconstructed}")
-                    return reconstructed
-
-        return None
-
-    def _extract_domain_from_text(self, text, common_domains):
-    
-        text_lower = text.lower()
-
-        # First try exact matches
-        for domain in common_domains:
-            if domain in text_lower:
-                return domain
-
-        # Try partial matches (e.g., "gmail" -> "gmail.com")
-        domain_starters = {}
-        for domain in common_domains:
-            main_part = domain.split('.')[0]
-            if main_part in domain_starters:
-                domain_starters[main_part].append(domain)
-            else:
-                domain_starters[main_part] = [domain]
+    def _extract_reminder_info(self, text):
 
-        for starter, domains in domain_starters.items():
-            if starter in text_lower:
-                # Return the most common domain for this starter
-                return domains[0]  # Usually gmail.com, yahoo.com, etc.
+        return self._apply_extraction_rules('reminder', text)
 
-        return None
+    def _extract_reminder_time(self, match):
 
-    def _extract_reminder_info(self, text):
-       
-        info = {}
+        # "at 5 pm" matches but carries no relative time
+        pattern = match.re.pattern
+        if 'minute' not in pattern and 'hour' not in pattern:
+            return None
 
-        # Extract time information
-        time_patterns = [
-            r'in\s+(\d+)\s*(minutes?|mins?|hours?|hrs?)',
-            r'(\d+)\s*(minutes?|mins?|hours?|hrs?)\s+from\s+now',
-            r'at\s+(\d+):?(\d+)?\s*(am|pm)?'
-        ]
+        amount = int(match.group(1))
+        unit = match.group(2).lower()
+        if 'hour' in unit:
+            return {'hours': amount}
+        return {'minutes': amount}
 
-        for pattern in time_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                if 'minute' in pattern or 'hour' in pattern:
-                    amount = int(match.group(1))
-                    unit = match.group(2).lower()
-                    if 'hour' in unit:
-                        info['hours'] = amount
-                    else:
-                        info['minutes'] = amount
-                break
+    def _extract_reminder_text(self, text):
 
         # Extract reminder text (everything else)
         # Remove time-related parts
-        clean_text = re.sub(r'\b(?:in|at|from)\s+[^,]*', '', text, flags=re.IGNORECASE)
-        clean_text = re.sub(r'\d+\s*(?:minutes?|mins?|hours?|hrs?)', '', clean_text, flags=re.IGNORECASE)
+        clean_text = self.reminder_time_phrase_pattern.sub('', text)
+        clean_text = self.reminder_duration_pattern.sub('', clean_text)
         clean_text = clean_text.strip(' ,.to')
 
-        if clean_text:
-            info['text'] = clean_text
-
-        return info
+        return clean_text or None
 
     def _extract_weather_info(self, text):
         """Extract location for weather query."""
-        info = {}
+        return self._apply_extraction_rules('weather', text)
 
-        # Common location patterns
-        location_patterns = [
-            r'in\s+([A-Za-z\s,]+)',
-            r'at\s+([A-Za-z\s,]+)',
-            r'for\s+([A-Za-z\s,]+)'
-        ]
+    def _extract_place_name(self, text):
 
-        for pattern in location_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                location = match.group(1).strip(' ,.')
-                if location and len(location) > 1:
-                    info['city'] = location
-                break
+        words = text.split()
+        # Look for capitalized words that might be place names
+        potential_cities = [word.strip('.,') for word in words if word.istitle() and len(word) > 2]
+        if potential_cities:
+            return potential_cities[0]
 
-        # If no location found, try to extract any place names
-        if 'city' not in info:
-            words = text.split()
-            # Look for capitalized words that might be place names
-            potential_cities = [word.strip('.,') for word in words if word.istitle() and len(word) > 2]
-            if potential_cities:
-                info['city'] = potential_cities[0]
+        return None
 
-        return info
+
+def _train_main(argv=None):
+
+    # python -m nlu train: fits StatisticalIntentEngine and saves it where
+    # NLU_ENGINE=statistical looks for it (NLU_MODEL_PATH, else
+    # data/intent_model.npz). Trains on a tab-separated "text<TAB>intent"
+    # file, or by default on the template corpus in benchmarks/corpus.py,
+    # calibrating on templates held out of the counts
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m nlu', description="Train the statistical intent model")
+    commands = parser.add_subparsers(dest='command', required=True)
+    train = commands.add_parser('train', help='fit and save a StatisticalIntentEngine model')
+    train.add_argument('--out', default=os.getenv('NLU_MODEL_PATH') or DEFAULT_MODEL_PATH)
+    train.add_argument('--data', metavar='TSV', help='labelled utterances, one "text<TAB>intent" per line')
+    train.add_argument('--per-intent', type=int, default=1000, help='corpus utterances per intent (no --data)')
+    train.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    groups = None
+    if args.data:
+        with open(args.data, encoding='utf-8') as data_file:
+            rows = [line.rstrip('\n').split('\t') for line in data_file if line.strip()]
+        texts = [row[0].lower() for row in rows]
+        labels = [row[1] for row in rows]
+    else:
+        import sys
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+        from corpus import generate_split
+        corpus, _ = generate_split(args.per_intent, seed=args.seed, test_fraction=0)
+        texts = [text for text, _, _ in corpus]
+        labels = [intent for _, intent, _ in corpus]
+        groups = [template for _, _, template in corpus]
+
+    engine = StatisticalIntentEngine().fit(texts, labels, groups=groups)
+    engine.save(args.out)
+    print(f"Trained on {len(texts)} utterances ({len(engine.intents)} intents, T={engine.temperature:.2f}), "
+          f"saved to {args.out}")
+
+if __name__ == '__main__':
+    _train_main()
@@ -1,52 +1,1001 @@
-import speech_recognition as sr
+import io
+import json
 import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from audio_processing import AudioPreprocessor, Endpointer, VoiceActivityDetector
+from lazy import Lazy
+from tracing import NULL_TRACER
 
 logger = logging.getLogger(__name__)
 
+# speech_recognition (and PyAudio behind it) is imported on first use, which
+# the assistant arranges to happen on its warm-up thread
+sr = None
+
+def _require_speech_recognition():
+
+    global sr
+    if sr is None:
+        import speech_recognition
+        sr = speech_recognition
+    return sr
+
+# Only the offline backend needs vosk; it is imported when its model loads
+vosk = None
+
+# A backend has a name, lazy_models() for warm_up, close(), and
+# transcribe(audio, cancelled=None) -> (text, confidence), where confidence is
+# 0-1 or None when the backend doesn't give one. It raises sr.UnknownValueError
+# when nothing was recognized and may stop early once cancelled is set
+
+class GoogleBackend:
+    """Google's web speech API, through speech_recognition (the default).
+
+    Uses the VoiceRecognizer's own sr.Recognizer, so there is nothing to load.
+    A request in flight can't be withdrawn, so cancelled is not checked;
+    timeout (seconds, None to wait forever) bounds how long one can hang.
+    """
+
+    name = 'google'
+    cancellable = False
+
+    def __init__(self, voice_recognizer, timeout=None):
+
+        self.voice_recognizer = voice_recognizer
+        self.timeout = timeout
+
+    def lazy_models(self):
+
+        return []
+
+    def transcribe(self, audio, cancelled=None):
+
+        # show_all returns the raw response, which carries the confidence.
+        # sr applies operation_timeout to the request and raises a
+        # RequestError when it runs out
+        recognizer = self.voice_recognizer.recognizer
+        recognizer.operation_timeout = self.timeout
+        result = recognizer.recognize_google(audio, show_all=True)
+        alternatives = result.get('alternative') if isinstance(result, dict) else None
+        if not alternatives:
+            raise sr.UnknownValueError()
+        # The one Google scored, as recognize_google itself picks it
+        best = next((alternative for alternative in alternatives if 'confidence' in alternative), alternatives[0])
+        return best['transcript'], best.get('confidence')
+
+    def close(self):
+
+        pass
+
+class VoskBackend:
+    """Offline Kaldi decoding on the CPU with a Vosk model.
+
+    The model is loaded once, on first use or from the warm-up thread, and
+    stays resident; it is shared by every decode. Each utterance gets its own
+    KaldiRecognizer and is decoded on the backend's worker threads, so the
+    caller only waits for the result and a decode never runs on the capture
+    or event-loop thread. Failures are raised as speech_recognition errors,
+    so callers handle both backends alike.
+    """
+
+    name = 'vosk'
+    cancellable = True
+    sample_rate = 16000
+
+    # Audio is fed to the decoder in quarter-second pieces, as it would be live
+    feed_bytes = sample_rate // 4 * 2
+
+    def __init__(self, model_path, workers=1):
+
+        self.model_path = model_path
+        self.model = Lazy(self._load_model, name='speech model')
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='speech-decode')
+
+    def _load_model(self):
+
+        global vosk
+        if vosk is None:
+            try:
+                import vosk as vosk_module
+            except ImportError:
+                raise ImportError("The vosk speech backend requires vosk (pip install vosk)")
+            vosk = vosk_module
+            vosk.SetLogLevel(-1)
+        if not self.model_path or not os.path.isdir(self.model_path):
+            raise FileNotFoundError(f"Vosk model directory not found: {self.model_path}")
+        return vosk.Model(self.model_path)
+
+    def lazy_models(self):
+
+        return [self.model]
+
+    def transcribe(self, audio, cancelled=None):
+
+        try:
+            model = self.model.get()
+        except Exception as e:
+            raise sr.RequestError(f"speech model unavailable: {e}")
+        pcm = memoryview(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        return self._executor.submit(self._decode, model, pcm, cancelled).result()
+
+    def _decode(self, model, pcm, cancelled):
+
+        decoder = vosk.KaldiRecognizer(model, self.sample_rate)
+        decoder.SetWords(True)
+        for offset in range(0, len(pcm), self.feed_bytes):
+            if cancelled is not None and cancelled.is_set():
+                raise CancelledError()
+            # The decoder wants bytes, so only each piece is copied
+            decoder.AcceptWaveform(bytes(pcm[offset:offset + self.feed_bytes]))
+        result = json.loads(decoder.FinalResult())
+        text = result.get('text', '')
+        if not text:
+            raise sr.UnknownValueError()
+        # Mean of the per-word confidences
+        words = result.get('result') or []
+        confidence = sum(word.get('conf', 0.0) for word in words) / len(words) if words else None
+        return text, confidence
+
+    def close(self):
+
+        self._executor.shutdown(wait=False)
+
+class HedgedBackend:
+    """Sends each utterance to several backends; the first confident answer wins.
+
+    With hedge_percentile 0 every backend gets the audio at once. Otherwise
+    the first backend goes alone, and the others join only once it has taken
+    longer than that percentile of its recent latencies, has failed, or has
+    answered with low confidence. The extra requests then go only to the
+    slow tail. Only successful calls count towards that percentile, so an
+    outage that ends in timeouts doesn't raise it. Each backend runs on
+    threads of its own, so requests stuck in one never hold up another. A result is accepted when its confidence reaches
+    min_confidence or when the backend gives none. If no result qualifies,
+    the most confident one is used once all have answered. The losers are
+    cancelled: a queued request never starts, and a Vosk decode stops at
+    its next piece. A web request in flight can't be withdrawn; it is
+    abandoned, and its answer is ignored once it arrives.
+    """
+
+    # Latencies of the first backend needed before its percentile is trusted,
+    # and the seconds it runs alone until then
+    min_samples = 20
+    initial_hedge_after = 1.5
+
+    def __init__(self, backends, min_confidence=0.6, hedge_percentile=90, initial_hedge_after=None, window=200):
+
+        _require_speech_recognition()
+        self.backends = backends
+        self.name = '+'.join(backend.name for backend in backends)
+        self.min_confidence = min_confidence
+        self.hedge_percentile = hedge_percentile
+        if initial_hedge_after is not None:
+            self.initial_hedge_after = initial_hedge_after
+        self._executors = {backend.name: ThreadPoolExecutor(max_workers=4, thread_name_prefix=f'speech-{backend.name}')
+                           for backend in backends}
+        self._primary_latencies = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self._stats = {'recognitions': 0, 'hedged': 0, 'low_confidence': 0, 'failed': 0, 'saved_seconds': 0.0,
+                       'saved_count': 0, 'backends': {backend.name: {'requests': 0, 'wins': 0, 'errors': 0,
+                                                                     'cancelled': 0, 'abandoned': 0}
+                                                   for backend in backends}}
+        self._stats_lock = threading.Lock()
+
+    def lazy_models(self):
+
+        return [model for backend in self.backends for model in backend.lazy_models()]
+
+    def hedge_after(self):
+
+        # Seconds the first backend runs alone
+        with self._stats_lock:
+            latencies = sorted(self._primary_latencies)
+        if len(latencies) < self.min_samples:
+            return self.initial_hedge_after
+        return latencies[min(len(latencies) - 1, int(len(latencies) * self.hedge_percentile / 100))]
+
+    def _call(self, backend, audio, race):
+
+        start = time.monotonic()
+        try:
+            result = backend.transcribe(audio, cancelled=race['cancelled'])
+        except CancelledError:
+            # Stopped early, so its time says nothing about its latency
+            raise
+        except Exception:
+            self._finished(backend, start, race, succeeded=False)
+            raise
+        self._finished(backend, start, race, succeeded=True)
+        return result
+
+    def _finished(self, backend, start, race, succeeded):
+
+        if backend is not self.backends[0]:
+            return
+        with self._stats_lock:
+            if succeeded:
+                self._primary_latencies.append(time.monotonic() - start)
+            # The first backend finishing after a hedge won shows what the hedge saved
+            if race['winner'] not in (None, backend.name):
+                self._stats['saved_seconds'] += time.monotonic() - race['start'] - race['winner_seconds']
+                self._stats['saved_count'] += 1
+
+    def transcribe(self, audio, cancelled=None):
+
+        race = {'start': time.monotonic(), 'cancelled': threading.Event(), 'winner': None, 'winner_seconds': None}
+        finished = queue.Queue()
+        futures = {}
+
+        def launch(backends):
+            for backend in backends:
+                future = self._executors[backend.name].submit(self._call, backend, audio, race)
+                future.add_done_callback(lambda future, backend=backend: finished.put((backend, future)))
+                futures[backend.name] = future
+            with self._stats_lock:
+                for backend in backends:
+                    self._stats['backends'][backend.name]['requests'] += 1
+
+        waiting = [] if self.hedge_percentile <= 0 else list(self.backends[1:])
+        launch(self.backends if not waiting else self.backends[:1])
+        hedge_at = race['start'] + self.hedge_after()
+        outstanding = len(futures)
+        best = None
+        errors = []
+        hedged = not waiting
+        try:
+            while outstanding:
+                try:
+                    timeout = max(0.0, hedge_at - time.monotonic()) if waiting else None
+                    backend, future = finished.get(timeout=timeout)
+                except queue.Empty:
+                    launch(waiting)
+                    outstanding += len(waiting)
+                    waiting, hedged = [], True
+                    continue
+                outstanding -= 1
+
+                try:
+                    text, confidence = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    with self._stats_lock:
+                        self._stats['backends'][backend.name]['errors'] += 1
+                else:
+                    if confidence is None or confidence >= self.min_confidence:
+                        best = (backend, text, confidence)
+                        break
+                    if best is None or confidence > best[2]:
+                        best = (backend, text, confidence)
+
+                # No usable answer yet: don't wait for the hedge deadline
+                if waiting:
+                    launch(waiting)
+                    outstanding += len(waiting)
+                    waiting, hedged = [], True
+        finally:
+            race['cancelled'].set()
+            with self._stats_lock:
+                if best is not None:
+                    race['winner'] = best[0].name
+                    race['winner_seconds'] = time.monotonic() - race['start']
+                for backend in self.backends:
+                    future = futures.get(backend.name)
+                    if future is None or future.done():
+                        continue
+                    # Still queued, or running on a backend that stops when
+                    # told to; otherwise the request runs on regardless
+                    if future.cancel() or getattr(backend, 'cancellable', False):
+                        self._stats['backends'][backend.name]['cancelled'] += 1
+                    else:
+                        self._stats['backends'][backend.name]['abandoned'] += 1
+
+        with self._stats_lock:
+            self._stats['recognitions'] += 1
+            self._stats['hedged'] += hedged
+            if best is None:
+                self._stats['failed'] += 1
+            else:
+                self._stats['backends'][best[0].name]['wins'] += 1
+                self._stats['low_confidence'] += best[2] is not None and best[2] < self.min_confidence
+                self._latencies.append(race['winner_seconds'])
+
+        if best is None:
+            # Prefer "nothing was said" over a service error when any backend heard the audio
+            raise next((e for e in errors if isinstance(e, sr.UnknownValueError)), errors[0])
+        logger.debug("%s won the recognition race in %.0f ms (confidence %s)", best[0].name,
+                     race['winner_seconds'] * 1000, best[2])
+        return best[1], best[2]
+
+    def stats(self):
+
+        with self._stats_lock:
+            stats = dict(self._stats, backends={name: dict(counts) for name, counts in self._stats['backends'].items()})
+            primary = sorted(self._primary_latencies)
+            hedged = sorted(self._latencies)
+        for key, latencies in (('primary', primary), ('hedged', hedged)):
+            if latencies:
+                stats[f'{key}_p50'] = latencies[len(latencies) // 2]
+                stats[f'{key}_p95'] = latencies[int(0.95 * (len(latencies) - 1))]
+        return stats
+
+    def format_stats(self):
+
+        stats = self.stats()
+        if not stats['recognitions']:
+            return "No hedged recognitions yet"
+        lines = [f"{stats['recognitions']} recognitions, {stats['hedged']} hedged, "
+                 f"{stats['low_confidence']} below confidence, {stats['failed']} failed"]
+        for name, counts in stats['backends'].items():
+            lines.append(f"{name}: {counts['requests']} requests, {counts['wins']} wins, "
+                         f"{counts['cancelled']} cancelled, {counts['abandoned']} abandoned, {counts['errors']} errors")
+        if 'hedged_p95' in stats and 'primary_p95' in stats:
+            lines.append(f"latency p50/p95: {self.backends[0].name} alone {stats['primary_p50'] * 1000:.0f}/"
+                         f"{stats['primary_p95'] * 1000:.0f} ms, hedged {stats['hedged_p50'] * 1000:.0f}/"
+                         f"{stats['hedged_p95'] * 1000:.0f} ms")
+        if stats['saved_count']:
+            lines.append(f"{stats['saved_count']} hedge wins saved {stats['saved_seconds']:.1f} s in total")
+        return "\n".join(lines)
+
+    def close(self):
+
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
+        for backend in self.backends:
+            backend.close()
+
+SPEECH_BACKENDS = {'google': GoogleBackend, 'vosk': VoskBackend}
+
+def _put_dropping_oldest(bounded_queue, item):
+
+    # Returns True when the queue was full and its oldest item made way
+    try:
+        bounded_queue.put_nowait(item)
+        return False
+    except queue.Full:
+        try:
+            bounded_queue.get_nowait()
+        except queue.Empty:
+            pass
+        bounded_queue.put_nowait(item)
+        return True
+
+class AudioRingBuffer:
+    """Fixed-size buffer for always-on capture, written in place.
+
+    Keeps the last capacity bytes of the stream in one bytearray allocated
+    up front, so memory stays flat however long the microphone is open.
+    Every write lands twice, at its offset and again capacity bytes later,
+    which makes any span of up to capacity bytes a single contiguous
+    memoryview: utterances and frames are handed out as views, never
+    copied. A view is only good until capacity more bytes have been
+    written; overwritten() tells a reader whether that has happened.
+    Positions count bytes written since the buffer was made. One thread
+    writes; any thread may read.
+    """
+
+    def __init__(self, capacity):
+
+        self.capacity = capacity
+        self._buffer = bytearray(2 * capacity)
+        self._view = memoryview(self._buffer)
+        self.position = 0
+
+    def write(self, data):
+
+        # Returns the position the data starts at
+        data = memoryview(data).cast('B')
+        if len(data) > self.capacity:
+            self.position += len(data) - self.capacity
+            data = data[-self.capacity:]
+        start = self.position
+        offset = start % self.capacity
+        head = min(len(data), self.capacity - offset)
+        for base in (0, self.capacity):
+            self._view[base + offset:base + offset + head] = data[:head]
+            self._view[base:base + len(data) - head] = data[head:]
+        self.position += len(data)
+        return start
+
+    def view(self, start, end):
+
+        # Read-only view of bytes [start, end), which must still be held
+        if end > self.position or self.overwritten(start) or end - start > self.capacity:
+            raise ValueError(f"bytes {start}-{end} are not in the ring buffer (at {self.position})")
+        offset = start % self.capacity
+        return self._view[offset:offset + end - start].toreadonly()
+
+    def overwritten(self, start):
+
+        return self.position - start > self.capacity
+
 class VoiceRecognizer:
   
 
-    def __init__(self):
+    # Keep the adapted threshold within sane bounds so a loud burst (or a long
+    # silence) between utterances can't make the microphone deaf or trigger-happy
+    min_energy_threshold = 50
+    max_energy_threshold = 4000
+
+    # Streaming capture reads the microphone in VAD-frame sized chunks
+    stream_sample_rate = 16000
+    stream_frame_ms = 20
+
+    def __init__(self, tracer=None, calibration_path=None, adaptive=True, adapt_interval=2.0,
+                 adapt_duration=0.25, save_interval=60.0, streaming=False, endpoint_silence=0.2,
+                 max_utterance=30.0, mute_while_paused=True, backend='google', model_path=None, decode_workers=1,
+                 preprocess=False, preprocess_rate=16000, preprocess_flac=False, min_confidence=0.6,
+                 hedge_percentile=90, ring_seconds=60.0, speech_timeout=None):
       
-        self.recognizer = sr.Recognizer()
+        self.recognizer = None
+        self.tracer = tracer or NULL_TRACER
+
+        # Speech-to-text: 'google' sends each utterance to Google's web API,
+        # 'vosk' decodes it locally with a resident model (see SPEECH_BACKENDS).
+        # Several, e.g. 'google,vosk', race each other (see HedgedBackend)
+        names = [name.strip() for name in backend.split(',')] if isinstance(backend, str) else list(backend)
+        backends = []
+        for name in names:
+            if name not in SPEECH_BACKENDS:
+                raise ValueError(f"Unknown speech backend '{name}', expected one of: {', '.join(SPEECH_BACKENDS)}")
+            if name == 'google':
+                backends.append(GoogleBackend(self, timeout=speech_timeout))
+            else:
+                backends.append(SPEECH_BACKENDS[name](model_path, workers=decode_workers))
+        if len(backends) == 1:
+            self.backend = backends[0]
+        else:
+            self.backend = HedgedBackend(backends, min_confidence=min_confidence, hedge_percentile=hedge_percentile)
+
+        # Optional clean-up between capture and recognition (see _preprocess)
+        self.preprocessor = AudioPreprocessor(target_rate=preprocess_rate) if preprocess else None
+        self.preprocess_flac = preprocess_flac
+
+        # One microphone session for the life of the recognizer, calibrated once
+        self.calibration_path = calibration_path
+        self.adaptive = adaptive
+        self.adapt_interval = adapt_interval
+        self.adapt_duration = adapt_duration
+        self.save_interval = save_interval
+        self._microphone = None
+        self._source = None
+        self._calibrated = False
+        self._mic_lock = threading.Lock()
+        self._adaptation_paused = threading.Event()
+        self._closed = threading.Event()
+        self._adapter_thread = None
+
+        # Streaming capture (see _stream_loop): a reader thread runs the
+        # voice-activity detector over the open stream and queues finished
+        # utterances, so speech is heard even while an earlier command is
+        # being recognized or handled. mute_while_paused drops what the
+        # microphone hears while the assistant talks, for callers that don't
+        # listen during replies.
+        # Audio goes into a ring buffer of ring_seconds, and utterances are
+        # views of it. It holds at least two whole utterances, one being
+        # recognized while the next is captured; a transcript whose audio
+        # was overwritten while it was recognized is still thrown away
+        self.streaming = streaming
+        self.endpoint_silence = endpoint_silence
+        self.max_utterance = max_utterance
+        self.mute_while_paused = mute_while_paused
+        self.ring_seconds = max(ring_seconds, 2 * max_utterance)
+        self._detector = None
+        self._endpointer = None
+        self._ring = None
+        self._utterances = queue.Queue(maxsize=8)
+        self._stream_thread = None
+
+        # listen_and_recognize() in streaming mode recognizes on a worker
+        # thread of its own (see _recognition_loop), which takes utterances
+        # off the queue as they come and queues their transcripts
+        self._transcripts = queue.Queue(maxsize=8)
+        self._recognition_thread = None
+
+        # Utterances that have ended but aren't yet taken by a listen or
+        # recognized by the worker. Changed under _stats_lock together with
+        # the endpointer, so a listen never sees a command between the end
+        # of its speech and its transcript as silence and times out
+        self._pending = 0
+
+        # Capture metrics (see capture_stats): queue depth, drops, and the
+        # delay from the end of speech to its hand-off and to its transcript
+        self._capture_stats = {'utterances': 0, 'max_depth': 0, 'dropped_full': 0, 'dropped_overwritten': 0,
+                               'dropped_transcripts': 0}
+        self._handoff_delays = deque(maxlen=500)
+        self._transcript_delays = deque(maxlen=500)
+        self._stats_lock = threading.Lock()
+
+    def open(self, calibrate=True):
+
+        with self._mic_lock:
+            try:
+                self._open_locked(calibrate)
+            except Exception as e:
+                # listen_for_audio retries, as it did when it opened the device itself
+                logger.error("Error opening microphone: %s", e)
+                self._close_source_locked()
+
+    def _ensure_recognizer(self):
+
+        if self.recognizer is None:
+            self.recognizer = _require_speech_recognition().Recognizer()
+        return self.recognizer
+
+    def _open_locked(self, calibrate=True):
+
+        if self._source is None:
+            self._ensure_recognizer()
+            if self.streaming:
+                frame_length = int(self.stream_sample_rate * self.stream_frame_ms / 1000)
+                self._microphone = sr.Microphone(sample_rate=self.stream_sample_rate, chunk_size=frame_length)
+            else:
+                self._microphone = sr.Microphone()
+            self._source = self._microphone.__enter__()
+            logger.info("Microphone opened")
+            if not self._calibrated:
+                self._calibrated = self._load_threshold()
+
+        # The detector keeps its own noise floor, so there is nothing to
+        # calibrate up front and no adaptation thread
+        if self.streaming:
+            self._start_stream_locked()
+            return
+
+        # Calibration can be left to the first listen, e.g. when the device
+        # is opened while the assistant is talking
+        if calibrate and not self._calibrated:
+            with self.tracer.span('calibration'):
+                self.recognizer.adjust_for_ambient_noise(self._source, duration=1)
+            logger.info("Calibrated energy threshold: %.0f", self.recognizer.energy_threshold)
+            self._calibrated = True
+            self._save_threshold()
+
+        if self.adaptive and self._adapter_thread is None:
+            self._closed.clear()
+            self._adapter_thread = threading.Thread(target=self._adapt_loop, name='noise-adaptation', daemon=True)
+            self._adapter_thread.start()
+
+    def _close_source_locked(self):
+
+        if self._source is None:
+            return
+
+        try:
+            self._microphone.__exit__(None, None, None)
+        except Exception as e:
+            logger.error("Error closing microphone: %s", e)
+        self._microphone = None
+        self._source = None
+
+    def close(self):
+
+        self._closed.set()
+        if self._adapter_thread is not None:
+            self._adapter_thread.join(timeout=self.adapt_duration + 1)
+            self._adapter_thread = None
+        if self._stream_thread is not None:
+            self._stream_thread.join(timeout=1)
+            self._stream_thread = None
+        if self._recognition_thread is not None:
+            self._recognition_thread.join(timeout=1)
+            self._recognition_thread = None
+        self.backend.close()
+
+        with self._mic_lock:
+            if self._source is not None:
+                if self._detector is not None and self._detector.noise_floor:
+                    # Saved in the same units the non-streaming listen uses
+                    ratio = getattr(self.recognizer, 'dynamic_energy_ratio', 1.5)
+                    self.recognizer.energy_threshold = self._clamp(self._detector.noise_floor * ratio)
+                self._save_threshold()
+            self._close_source_locked()
+
+    def _load_threshold(self):
+
+        if not self.calibration_path or not os.path.exists(self.calibration_path):
+            return False
+
+        try:
+            with open(self.calibration_path, encoding='utf-8') as calibration_file:
+                threshold = float(json.load(calibration_file)['energy_threshold'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring unreadable microphone calibration %s: %s", self.calibration_path, e)
+            return False
+
+        self.recognizer.energy_threshold = self._clamp(threshold)
+        logger.info("Restored energy threshold %.0f from %s", self.recognizer.energy_threshold, self.calibration_path)
+        return True
+
+    def _save_threshold(self):
+
+        if not self.calibration_path:
+            return
+
+        try:
+            with open(self.calibration_path, 'w', encoding='utf-8') as calibration_file:
+                json.dump({'energy_threshold': self.recognizer.energy_threshold, 'saved_at': time.time()}, calibration_file)
+        except OSError as e:
+            logger.warning("Could not save microphone calibration to %s: %s", self.calibration_path, e)
+
+    def _clamp(self, threshold):
+
+        return max(self.min_energy_threshold, min(self.max_energy_threshold, threshold))
+
+    @contextmanager
+    def adaptation_paused(self):
+
+        # Used while the assistant is talking, so its own voice isn't
+        # mistaken for the room's noise floor (nor, when streaming with
+        # mute_while_paused, for a command)
+        self._adaptation_paused.set()
+        try:
+            yield
+        finally:
+            self._adaptation_paused.clear()
+
+    def _adapt_loop(self):
+
+        last_saved = time.monotonic()
+        while not self._closed.wait(self.adapt_interval):
+            if self._adaptation_paused.is_set():
+                continue
+
+            # Only sample while nobody is listening; a command never waits
+            # longer than one short sample for the microphone
+            if not self._mic_lock.acquire(blocking=False):
+                continue
+            try:
+                if self._source is None:
+                    continue
+                self.recognizer.adjust_for_ambient_noise(self._source, duration=self.adapt_duration)
+                self.recognizer.energy_threshold = self._clamp(self.recognizer.energy_threshold)
+                logger.debug("Adapted energy threshold to %.0f", self.recognizer.energy_threshold)
+                if time.monotonic() - last_saved >= self.save_interval:
+                    self._save_threshold()
+                    last_saved = time.monotonic()
+            except Exception as e:
+                logger.warning("Noise floor adaptation failed: %s", e)
+            finally:
+                self._mic_lock.release()
+
+    def _start_stream_locked(self):
+
+        if self._stream_thread is not None:
+            return
+
+        # A saved calibration seeds the noise floor; sr's threshold is the
+        # floor times dynamic_energy_ratio
+        noise_floor = None
+        if self._calibrated:
+            noise_floor = self.recognizer.energy_threshold / getattr(self.recognizer, 'dynamic_energy_ratio', 1.5)
+        self._detector = VoiceActivityDetector(sample_rate=self._source.SAMPLE_RATE, frame_ms=self.stream_frame_ms,
+                                               noise_floor=noise_floor)
+        self._endpointer = Endpointer(frame_ms=self.stream_frame_ms, min_silence=self.endpoint_silence,
+                                      max_utterance=self.max_utterance)
+        self._ring = AudioRingBuffer(int(self.ring_seconds * self._source.SAMPLE_RATE) * self._source.SAMPLE_WIDTH)
+        # Anything queued from an earlier stream points into its old ring
+        while True:
+            try:
+                self._utterances.get_nowait()
+            except queue.Empty:
+                break
+            self._release_utterance()
+        self._closed.clear()
+        self._stream_thread = threading.Thread(target=self._stream_loop, name='audio-stream', daemon=True)
+        self._stream_thread.start()
+
+    def _stream_loop(self):
+
+        # The endpointer's frame numbers count the frames written to the ring,
+        # so frame n starts at byte n * frame_bytes of it
+        frame_bytes = self._detector.frame_length * 2
+        while not self._closed.is_set():
+            with self._mic_lock:
+                try:
+                    if self._source is None:
+                        self._open_locked(calibrate=False)
+                    chunk = self._source.stream.read(self._source.CHUNK)
+                    sample_rate, sample_width = self._source.SAMPLE_RATE, self._source.SAMPLE_WIDTH
+                except Exception as e:
+                    # Reopened on the next pass, like a failed listen
+                    logger.error("Error reading audio stream: %s", e)
+                    self._close_source_locked()
+                    chunk = None
+            if chunk is None:
+                self._closed.wait(0.5)
+                continue
+
+            paused = self._adaptation_paused.is_set()
+            if paused and self.mute_while_paused:
+                self._endpointer.reset()
+                continue
+
+            # Whole frames only, so frame numbers and ring positions stay aligned
+            chunk = chunk[:len(chunk) - len(chunk) % frame_bytes]
+            start = self._ring.write(chunk)
+            decisions = self._detector.classify(self._ring.view(start, start + len(chunk)), learn=not paused,
+                                                in_speech=self._endpointer.in_speech)
+            for speech in decisions:
+                with self._stats_lock:
+                    utterance = self._endpointer.push(speech)
+                    if utterance is not None:
+                        self._pending += 1
+                if utterance is not None:
+                    first, end = utterance[0] * frame_bytes, utterance[1] * frame_bytes
+                    self._queue_utterance(sr.AudioData(self._ring.view(first, end), sample_rate, sample_width), first)
+
+    def _queue_utterance(self, audio, position):
+
+        # Nobody is listening while the queue is full; the oldest utterance goes
+        dropped = _put_dropping_oldest(self._utterances, (audio, time.monotonic(), position))
+        with self._stats_lock:
+            self._capture_stats['utterances'] += 1
+            self._capture_stats['dropped_full'] += dropped
+            self._pending -= dropped
+            self._capture_stats['max_depth'] = max(self._capture_stats['max_depth'], self._utterances.qsize())
+        if dropped:
+            logger.warning("Dropped an unheard utterance")
+
+    def _release_utterance(self):
+
+        with self._stats_lock:
+            self._pending -= 1
+
+    def _idle(self):
+
+        # No speech under way and nothing captured left to hand over
+        with self._stats_lock:
+            return not self._endpointer.in_speech and not self._pending
+
+    def _take_utterance(self, timeout):
+
+        # The next utterance whose audio is still in the ring, or None. It
+        # stays pending until the caller calls _release_utterance
+        try:
+            audio, ended, position = self._utterances.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        # Its audio is a view of the ring, which may have moved on past it
+        if self._ring.overwritten(position):
+            with self._stats_lock:
+                self._capture_stats['dropped_overwritten'] += 1
+                self._pending -= 1
+            logger.warning("Dropped an utterance the capture buffer has already overwritten")
+            return None
+        with self._stats_lock:
+            self._handoff_delays.append(time.monotonic() - ended)
+        return audio, ended, position
+
+    def _listen_streaming(self, timeout):
+
+        with self._mic_lock:
+            try:
+                self._open_locked()
+            except Exception as e:
+                logger.error("Error opening microphone: %s", e)
+                self._close_source_locked()
+                return None
+
+        # The timeout only applies until speech starts; an utterance that
+        # is under way when it runs out is waited for, however long it is.
+        # Utterances that finished before this listen (say, while the last
+        # command was recognized) are still commands and come first
+        deadline = time.monotonic() + timeout
+        logger.info("Listening for audio...")
+        with self.tracer.span('capture') as span:
+            while not self._closed.is_set():
+                taken = self._take_utterance(timeout=0.05)
+                if taken is not None:
+                    self._release_utterance()
+                    # Copied out of the ring: the caller may hold on to it
+                    # for any length of time before it is recognized
+                    audio = taken[0]
+                    return sr.AudioData(bytes(audio.frame_data), audio.sample_rate, audio.sample_width)
+                if time.monotonic() >= deadline and self._idle():
+                    span.set(outcome='timeout')
+                    logger.warning("No speech detected within timeout period")
+                    return None
+        return None
+
+    def _start_recognition_locked(self):
+
+        if self._recognition_thread is None:
+            self._recognition_thread = threading.Thread(target=self._recognition_loop, name='recognition',
+                                                        daemon=True)
+            self._recognition_thread.start()
+
+    def _recognition_loop(self):
+
+        while not self._closed.is_set():
+            taken = self._take_utterance(timeout=0.1)
+            if taken is None:
+                continue
+            audio, ended, position = taken
+            try:
+                text = self.recognize_speech(audio)
+                # The backend read the audio in place; if capture has since
+                # overwritten it, the transcript may be of the wrong audio
+                if self._ring.overwritten(position):
+                    with self._stats_lock:
+                        self._capture_stats['dropped_overwritten'] += 1
+                    logger.warning("Dropped a transcript of audio overwritten while it was recognized")
+                    continue
+                if not text:
+                    continue
+                with self._stats_lock:
+                    self._transcript_delays.append(time.monotonic() - ended)
+                # Queued before the utterance is released, so a listen always
+                # sees one or the other
+                if _put_dropping_oldest(self._transcripts, text):
+                    with self._stats_lock:
+                        self._capture_stats['dropped_transcripts'] += 1
+                    logger.warning("Dropped an unhandled transcript")
+            finally:
+                self._release_utterance()
+
+    def _listen_and_recognize_streaming(self, timeout):
+
+        with self._mic_lock:
+            try:
+                self._open_locked()
+                self._start_recognition_locked()
+            except Exception as e:
+                logger.error("Error opening microphone: %s", e)
+                self._close_source_locked()
+                return None
+
+        # As _listen_streaming, but also waits for speech already captured
+        # and still being recognized (pending until its transcript is queued)
+        deadline = time.monotonic() + timeout
+        logger.info("Listening for audio...")
+        with self.tracer.span('capture') as span:
+            while not self._closed.is_set():
+                try:
+                    return self._transcripts.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+                if time.monotonic() >= deadline and self._idle() and self._transcripts.empty():
+                    span.set(outcome='timeout')
+                    logger.warning("No speech detected within timeout period")
+                    return None
+        return None
+
+    def capture_stats(self):
+
+        # Streaming capture: utterances queued, current and highest queue
+        # depth, utterances pending (queued or being recognized), drops, and
+        # end-of-speech delays (seconds, p50/p95) to the
+        # hand-off and, for listen_and_recognize, to the transcript
+        with self._stats_lock:
+            stats = dict(self._capture_stats, depth=self._utterances.qsize(), pending=self._pending)
+            delays = {'handoff': sorted(self._handoff_delays), 'transcript': sorted(self._transcript_delays)}
+        for name, values in delays.items():
+            if values:
+                stats[f'{name}_p50'] = values[len(values) // 2]
+                stats[f'{name}_p95'] = values[int(0.95 * (len(values) - 1))]
+        return stats
 
     def listen_for_audio(self, timeout=5, phrase_time_limit=10):
         
-        with sr.Microphone() as source:
-            logger.info("Listening for audio...")
+        # Streaming capture ends utterances by voice activity instead, and
+        # doesn't cut them at phrase_time_limit
+        if self.streaming:
+            self._ensure_recognizer()
+            return self._listen_streaming(timeout)
+
+        self._ensure_recognizer()
+        with self._mic_lock:
             try:
-                # Adjust for ambient noise
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
-                audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+                self._open_locked()
+                logger.info("Listening for audio...")
+                with self.tracer.span('capture') as span:
+                    try:
+                        audio = self.recognizer.listen(self._source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+                    except sr.WaitTimeoutError:
+                        span.set(outcome='timeout')
+                        raise
                 return audio
             except sr.WaitTimeoutError:
                 logger.warning("No speech detected within timeout period")
                 return None
             except Exception as e:
-                logger.error(f"Error listening for audio: {e}")
+                # Reopen the device on the next listen in case it went away
+                logger.error("Error listening for audio: %s", e)
+                self._close_source_locked()
                 return None
 
+    def audio_from_wav(self, wav_data):
+
+        # WAV (or AIFF/FLAC) bytes from a client or a file, instead of the microphone
+        with _require_speech_recognition().AudioFile(io.BytesIO(wav_data)) as source:
+            return self._ensure_recognizer().record(source)
+
     def recognize_speech(self, audio):
        
         if audio is None:
             return None
 
+        self._ensure_recognizer()
+        if self.preprocessor is not None:
+            audio = self._preprocess(audio)
         try:
             logger.info("Recognizing speech...")
-            text = self.recognizer.recognize_google(audio)
-            logger.info(f"Recognized: '{text}'")
+            with self.tracer.span('recognition') as span:
+                try:
+                    text, _ = self.backend.transcribe(audio)
+                except sr.UnknownValueError:
+                    span.set(outcome='no_match')
+                    raise
+            logger.info("Recognized: '%s'", text)
             return text.lower()  # Convert to lowercase for easier processing
         except sr.UnknownValueError:
             logger.warning("Could not understand audio")
             return None
         except sr.RequestError as e:
-            logger.error(f"Speech recognition service error: {e}")
+            logger.error("Speech recognition service error: %s", e)
             return None
         except Exception as e:
-            logger.error(f"Unexpected error during speech recognition: {e}")
+            logger.error("Unexpected error during speech recognition: %s", e)
             return None
 
+    def _preprocess(self, audio):
+
+        # Trimmed, normalized 16 kHz mono; the captured audio is used as is if
+        # that fails. With preprocess_flac the result is also FLAC-encoded,
+        # to count what the Google backend would upload
+        with self.tracer.span('preprocess') as span:
+            try:
+                pcm, sample_rate = self.preprocessor.process(audio.frame_data, audio.sample_rate, audio.sample_width)
+                processed = sr.AudioData(pcm, sample_rate, 2)
+                if self.preprocess_flac:
+                    start = time.perf_counter()
+                    flac_data = processed.get_flac_data()
+                    self.preprocessor.count_encoded(len(flac_data), time.perf_counter() - start)
+                return processed
+            except Exception as e:
+                span.set(outcome='error')
+                logger.warning("Audio preprocessing failed, recognizing the captured audio: %s", e)
+                return audio
+
+    def format_stats(self):
+
+        # Capture, preprocessing and hedging totals, for whichever are on
+        lines = []
+        if self.streaming:
+            stats = self.capture_stats()
+            line = (f"capture: {stats['utterances']} utterances, queue depth {stats['depth']} "
+                    f"(max {stats['max_depth']}), dropped {stats['dropped_full']} (queue full), "
+                    f"{stats['dropped_overwritten']} (overwritten), {stats['dropped_transcripts']} (transcript unread)")
+            for name, label in (('handoff', 'taken'), ('transcript', 'transcribed')):
+                if f'{name}_p50' in stats:
+                    line += (f"; end of speech to {label} p50 {stats[f'{name}_p50'] * 1000:.0f} ms, "
+                             f"p95 {stats[f'{name}_p95'] * 1000:.0f} ms")
+            lines.append(line)
+        if self.preprocessor is not None:
+            lines.append(f"preprocessing: {self.preprocessor.format_stats()}")
+        if isinstance(self.backend, HedgedBackend):
+            lines.append(self.backend.format_stats())
+        return "\n".join(lines) or None
+
+    def lazy_models(self):
+
+        # For warm_up(): the speech model of an offline backend, if any
+        return self.backend.lazy_models()
+
     def listen_and_recognize(self, timeout=5, phrase_time_limit=10):
        
+        # Streaming capture recognizes on its own worker; don't mix this with
+        # listen_for_audio on the same recognizer, they take from one queue
+        if self.streaming:
+            self._ensure_recognizer()
+            return self._listen_and_recognize_streaming(timeout)
+
         audio = self.listen_for_audio(timeout, phrase_time_limit)
         return self.recognize_speech(audio)
@@ -0,0 +1,326 @@
+"""Serve many assistant sessions from one process over a local socket.
+
+Clients connect over TCP or a Unix socket and exchange JSON lines. Each
+request is one object on one line:
+
+    {"id": 1, "text": "what's the weather in paris"}
+    {"id": 2, "audio": "<base64 WAV>"}
+    {"id": 3, "type": "session"}      # this session's state
+    {"id": 4, "type": "stats"}        # server counters
+
+and gets exactly one reply line carrying the same id, e.g.
+
+    {"id": 1, "session": 7, "intent": "weather", "confidence": 1.0,
+     "response": "...", "latency_ms": 4.2}
+
+Every connection is a session with its own history. All sessions share one
+IntentClassifier and one instance of each skill; commands run on a thread
+pool so a slow skill never blocks the event loop. An exit command closes
+the session, not the server.
+
+Usage: python server.py [--host 127.0.0.1] [--port 8765] [--unix PATH]
+"""
+import argparse
+import asyncio
+import base64
+import binascii
+import itertools
+import json
+import logging
+import os
+import stat
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (validate_config, DOMAIN_LEXICON_PATH, NLU_CACHE_SIZE, NLU_ENGINE, NLU_MODEL_PATH,
+                    SKILL_WORKERS, SKILL_DEADLINE, SKILL_INTERIM_AFTER, SERVER_HOST, SERVER_PORT, SERVER_MAX_SESSIONS,
+                    SERVER_WORKERS, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_JSON, LOG_SAMPLING, SPEECH_BACKEND,
+                    SPEECH_MODEL_PATH, SPEECH_DECODE_WORKERS, AUDIO_PREPROCESS, AUDIO_TARGET_RATE, AUDIO_FLAC,
+                    SPEECH_HEDGE_PERCENTILE, SPEECH_MIN_CONFIDENCE, SPEECH_TIMEOUT)
+from logging_setup import configure_logging
+from nlu import IntentClassifier
+from recognizer import VoiceRecognizer
+from skills.registry import SkillRegistry
+
+logger = logging.getLogger(__name__)
+
+# Longest request line accepted, base64 audio included
+MAX_REQUEST_BYTES = 8 * 1024 * 1024
+
+class Session:
+    """State kept for one client connection."""
+
+    def __init__(self, session_id, peer):
+
+        self.id = session_id
+        self.peer = peer
+        self.started = time.time()
+        self.commands = 0
+        self.last_intent = None
+        self.history = deque(maxlen=20)
+        self.closing = False
+
+    def as_dict(self):
+
+        return {
+            'session': self.id,
+            'peer': self.peer,
+            'started': self.started,
+            'commands': self.commands,
+            'last_intent': self.last_intent,
+            'history': [{'text': text, 'intent': intent, 'response': response}
+                        for text, intent, response in self.history]
+        }
+
+class AssistantServer:
+
+    def __init__(self, max_sessions=SERVER_MAX_SESSIONS, workers=SERVER_WORKERS):
+
+        self.max_sessions = max_sessions
+        self.classifier = IntentClassifier(
+            domain_lexicon_path=DOMAIN_LEXICON_PATH,
+            cache_size=NLU_CACHE_SIZE,
+            engine=NLU_ENGINE,
+            model_path=NLU_MODEL_PATH
+        )
+
+        # One instance of each skill for every session. Exit is handled here
+        # since it ends the session rather than stopping the process
+        self.skills = SkillRegistry(max_workers=SKILL_WORKERS, default_deadline=SKILL_DEADLINE,
+                                    interim_after=SKILL_INTERIM_AFTER)
+        self.skills.register('system', self._handle_exit, name='session', entity_key='exit')
+        self.skills.load_plugins()
+        self.skills.apply_patterns(self.classifier)
+
+        # Only used to transcribe uploaded audio; the server never opens a microphone
+        self.recognizer = VoiceRecognizer(adaptive=False, backend=SPEECH_BACKEND, model_path=SPEECH_MODEL_PATH,
+                                          decode_workers=SPEECH_DECODE_WORKERS, preprocess=AUDIO_PREPROCESS,
+                                          preprocess_rate=AUDIO_TARGET_RATE, preprocess_flac=AUDIO_FLAC,
+                                          min_confidence=SPEECH_MIN_CONFIDENCE,
+                                          hedge_percentile=SPEECH_HEDGE_PERCENTILE,
+                                          speech_timeout=SPEECH_TIMEOUT or None)
+
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='session')
+        self.sessions = {}
+        self._session_ids = itertools.count(1)
+        self.started = time.time()
+        self.total_sessions = 0
+        self.requests = 0
+        self.errors = 0
+
+    def _handle_exit(self, extracted_info, original_text):
+
+        return "Goodbye! Closing this session."
+
+    def stats(self):
+
+        return {
+            'uptime': time.time() - self.started,
+            'active_sessions': len(self.sessions),
+            'total_sessions': self.total_sessions,
+            'requests': self.requests,
+            'errors': self.errors,
+            'cache': self.classifier.get_cache_stats(),
+            'skills': self.skills.stats(),
+            'preprocessing': self.recognizer.preprocessor.stats() if self.recognizer.preprocessor else None,
+            'recognition': self.recognizer.backend.stats() if hasattr(self.recognizer.backend, 'stats') else None
+        }
+
+    async def handle_connection(self, reader, writer):
+
+        peer = writer.get_extra_info('peername')
+        peer = f"{peer[0]}:{peer[1]}" if isinstance(peer, tuple) else str(peer or 'local')
+
+        if len(self.sessions) >= self.max_sessions:
+            logger.warning("Refusing %s: %s sessions already open", peer, self.max_sessions)
+            await self._send(writer, {'error': 'server is at its session limit, try again later'})
+            await self._close(writer)
+            return
+
+        session = Session(next(self._session_ids), peer)
+        self.sessions[session.id] = session
+        self.total_sessions += 1
+        logger.info("Session %s opened from %s", session.id, peer)
+
+        try:
+            await self._send(writer, {'type': 'welcome', 'session': session.id})
+            while not session.closing:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    await self._send(writer, {'error': f'request longer than {MAX_REQUEST_BYTES} bytes'})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as e:
+                    self.errors += 1
+                    await self._send(writer, {'session': session.id, 'error': f'invalid request: {e}'})
+                    continue
+
+                await self._send(writer, await self.handle_request(session, request))
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self.sessions[session.id]
+            logger.info("Session %s closed after %s commands", session.id, session.commands)
+            await self._close(writer)
+
+    async def handle_request(self, session, request):
+
+        start = time.perf_counter()
+        self.requests += 1
+        reply = {'id': request.get('id'), 'session': session.id}
+        kind = request.get('type', 'command')
+        loop = asyncio.get_running_loop()
+
+        try:
+            if kind == 'session':
+                reply.update(session.as_dict())
+                return reply
+            if kind == 'stats':
+                reply.update(self.stats())
+                return reply
+            if kind != 'command':
+                raise ValueError(f"unknown request type '{kind}'")
+
+            text = request.get('text')
+            if text is None and 'audio' in request:
+                try:
+                    audio = base64.b64decode(request['audio'], validate=True)
+                except (binascii.Error, TypeError) as e:
+                    raise ValueError(f"audio is not valid base64: {e}")
+                text = await loop.run_in_executor(self.executor, self._transcribe, audio)
+                reply['transcript'] = text
+                if not text:
+                    reply['response'] = "Sorry, I couldn't understand the audio."
+                    return reply
+
+            if not isinstance(text, str) or not text.strip():
+                raise ValueError("request needs a non-empty 'text' or 'audio'")
+
+            intent, confidence, response = await loop.run_in_executor(self.executor, self._respond, session, text)
+            reply.update({'intent': intent, 'confidence': confidence, 'response': response})
+            if session.closing:
+                reply['closing'] = True
+
+        except ValueError as e:
+            self.errors += 1
+            reply['error'] = str(e)
+        except Exception as e:
+            self.errors += 1
+            logger.error("Error handling request in session %s: %s", session.id, e)
+            reply['error'] = "internal error"
+        finally:
+            reply['latency_ms'] = round((time.perf_counter() - start) * 1000, 3)
+
+        return reply
+
+    def _transcribe(self, audio_bytes):
+
+        try:
+            return self.recognizer.recognize_speech(self.recognizer.audio_from_wav(audio_bytes))
+        except Exception as e:
+            raise ValueError(f"could not read audio: {e}")
+
+    def _respond(self, session, text):
+
+        # Runs on the worker pool: same wake word -> classify -> skill path as
+        # VoiceAssistant._respond, with the session in place of the assistant
+        session.commands += 1
+
+        if self.classifier.is_wake_word_only(text):
+            intent, confidence = 'wake_word', 1.0
+            response = "Yes, I'm hearing. What can I do for you?"
+        else:
+            intent, confidence, extracted_info = self.classifier.classify_intent(text)
+            handler = self.skills.resolve(intent, extracted_info)
+            response = self.skills.dispatch(intent, extracted_info, text, entry=handler)
+            if handler is not None and handler.name == 'session':
+                session.closing = True
+
+        session.last_intent = intent
+        session.history.append((text, intent, response))
+        return intent, confidence, response
+
+    async def _send(self, writer, message):
+
+        writer.write(json.dumps(message).encode('utf-8') + b'\n')
+        await writer.drain()
+
+    async def _close(self, writer):
+
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+    async def serve(self, host=SERVER_HOST, port=SERVER_PORT, unix_path=None):
+
+        if unix_path:
+            # A socket file left by a previous run would make bind fail
+            if os.path.exists(unix_path) and stat.S_ISSOCK(os.stat(unix_path).st_mode):
+                os.unlink(unix_path)
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_path, limit=MAX_REQUEST_BYTES)
+            logger.info("Assistant server listening on %s", unix_path)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_REQUEST_BYTES,
+                                                backlog=self.max_sessions)
+            logger.info("Assistant server listening on %s:%s", host, port)
+
+        async with server:
+            await server.serve_forever()
+
+    def shutdown(self):
+
+        self.skills.shutdown()
+        self.recognizer.close()
+        self.executor.shutdown(wait=False)
+        logger.info("Server stopped after %s sessions and %s requests", self.total_sessions, self.requests)
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--unix', metavar='PATH', help='listen on a Unix socket instead of TCP')
+    parser.add_argument('--max-sessions', type=int, default=SERVER_MAX_SESSIONS)
+    parser.add_argument('--workers', type=int, default=SERVER_WORKERS, help='threads running commands')
+    parser.add_argument('--log-level', default='INFO')
+    parser.add_argument('--log-file', help='also log to this file, rotated like the assistant\'s')
+    args = parser.parse_args()
+
+    configure_logging(
+        path=args.log_file,
+        level=args.log_level,
+        max_bytes=LOG_MAX_BYTES,
+        backup_count=LOG_BACKUP_COUNT,
+        json_lines=LOG_JSON,
+        sampling=LOG_SAMPLING
+    )
+
+    # Sessions can still use the skills that are configured
+    try:
+        validate_config()
+    except ValueError as e:
+        logger.warning("Configuration incomplete, some skills will fail: %s", e)
+
+    server = AssistantServer(max_sessions=args.max_sessions, workers=args.workers)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        logger.info("Server terminated by user")
+    finally:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,42 @@
-import smtplib
 import logging
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
 from config import SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS
 
 logger = logging.getLogger(__name__)
 
+# Imported when the skill is first built, so registering it stays cheap
+smtplib = None
+MIMEText = None
+MIMEMultipart = None
+
 class EmailSkill:
 
 
+    # One instance may serve many sessions at once (see server.py); cap how
+    # many SMTP connections it opens, as providers throttle parallel logins
+    max_connections = 4
+
+    # Seconds any one SMTP socket operation may block, well inside the
+    # handler's deadline so a hung server frees its worker thread
+    smtp_timeout = 10
+
     def __init__(self):
        
+        global smtplib, MIMEText, MIMEMultipart
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+
         self.smtp_host = SMTP_HOST
         self.smtp_port = SMTP_PORT
         self.smtp_user = SMTP_USER
         self.smtp_pass = SMTP_PASS
+        self._connection_slots = threading.BoundedSemaphore(self.max_connections)
+
+    def _connect(self):
+
+        # The one place a connection is made, so a replay can point it at a fake server
+        return smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=self.smtp_timeout)
 
     def send_email(self, recipient, subject, body):
        
@@ -34,17 +56,16 @@ class EmailSkill:
             # Add body to email
             msg.attach(MIMEText(body, 'plain'))
 
-            # Create SMTP connection
-            server = smtplib.SMTP(self.smtp_host, self.smtp_port)
-            server.starttls()  # Secure the connection
-            server.login(self.smtp_user, self.smtp_pass)
-
-            # Send email
+            # Create SMTP connection (closed even if sending fails)
             text = msg.as_string()
-            server.sendmail(self.smtp_user, recipient, text)
-            server.quit()
+            with self._connection_slots, self._connect() as server:
+                server.starttls()  # Secure the connection
+                server.login(self.smtp_user, self.smtp_pass)
 
-            logger.info(f"Email sent successfully to {recipient}")
+                # Send email
+                server.sendmail(self.smtp_user, recipient, text)
+
+            logger.info("Email sent successfully to %s", recipient)
             return True, f"Email sent successfully to {recipient}"
 
         except smtplib.SMTPAuthenticationError:
@@ -52,11 +73,11 @@ class EmailSkill:
             return False, "Authentication failed. Please check your email credentials in the .env file."
 
         except smtplib.SMTPConnectError:
-            logger.error(f"Failed to connect to SMTP server {self.smtp_host}:{self.smtp_port}")
+            logger.error("Failed to connect to SMTP server %s:%s", self.smtp_host, self.smtp_port)
             return False, f"Failed to connect to email server. Please check your SMTP settings."
 
         except smtplib.SMTPRecipientsRefused:
-            logger.error(f"Email recipient {recipient} was refused by the server")
+            logger.error("Email recipient %s was refused by the server", recipient)
             return False, f"Email address {recipient} was rejected by the server."
 
         except smtplib.SMTPServerDisconnected:
@@ -64,7 +85,7 @@ class EmailSkill:
             return False, "Email server disconnected. Please try again."
 
         except Exception as e:
-            logger.error(f"Unexpected error sending email: {e}")
+            logger.error("Unexpected error sending email: %s", e)
             return False, f"An unexpected error occurred while sending email: {str(e)}"
 
     def _validate_email(self, email):
@@ -76,10 +97,37 @@ class EmailSkill:
     def test_connection(self):
        
         try:
-            server = smtplib.SMTP(self.smtp_host, self.smtp_port)
+            server = self._connect()
             server.starttls()
             server.login(self.smtp_user, self.smtp_pass)
             server.quit()
             return True, "SMTP connection test successful"
         except Exception as e:
             return False, f"SMTP connection test failed: {str(e)}"
+
+    def handle_intent(self, extracted_info, original_text=""):
+       
+        try:
+            recipient = extracted_info.get('recipient')
+            subject = extracted_info.get('subject', 'Voice Assistant Message')
+            body = extracted_info.get('body', 'This message was sent via voice assistant.')
+
+            if not recipient:
+                return "I couldn't find an email address in your message. Please include the recipient's email address."
+
+            success, message = self.send_email(recipient, subject, body)
+
+            if success:
+                return f"Email sent successfully to {recipient}."
+            else:
+                return f"Failed to send email: {message}"
+
+        except Exception as e:
+            logger.error("Error in email handling: %s", e)
+            return "Sorry, I encountered an error while sending the email."
+
+def register(registry):
+   
+    registry.add_skill('email_skill', EmailSkill)
+    registry.register('email', 'handle_intent', skill='email_skill', blocking=True, deadline=20,
+                      timeout_response="The mail server is taking too long. Your email may not have been sent.")
@@ -100,11 +100,11 @@ class GreetingSkill:
             # Select a random response
             response = random.choice(responses)
 
-            logger.info(f"Generated greeting response for '{greeting_type}': {response}")
+            logger.info("Generated greeting response for '%s': %s", greeting_type, response)
             return True, response
 
         except Exception as e:
-            logger.error(f"Error generating greeting response: {e}")
+            logger.error("Error generating greeting response: %s", e)
             return False, "Hello! How can I help you today?"
 
     def detect_time_based_greeting(self):
@@ -121,7 +121,7 @@ class GreetingSkill:
             return 'hello'  # Default fallback
 
         except Exception as e:
-            logger.error(f"Error detecting time-based greeting: {e}")
+            logger.error("Error detecting time-based greeting: %s", e)
             return 'hello'
 
     def get_personalized_greeting(self, user_name=None):
@@ -145,11 +145,11 @@ class GreetingSkill:
                 success, response = self.get_greeting_response(f"good_{time_greeting}")
                 return success, response
 
-            logger.info(f"Generated personalized greeting: {response}")
+            logger.info("Generated personalized greeting: %s", response)
             return True, response
 
         except Exception as e:
-            logger.error(f"Error generating personalized greeting: {e}")
+            logger.error("Error generating personalized greeting: %s", e)
             return False, "Hello! How can I help you today?"
 
     def is_goodbye_greeting(self, text):
@@ -185,9 +185,56 @@ class GreetingSkill:
             ]
 
             response = random.choice(goodbye_responses)
-            logger.info(f"Generated goodbye response: {response}")
+            logger.info("Generated goodbye response: %s", response)
             return True, response
 
         except Exception as e:
-            logger.error(f"Error generating goodbye response: {e}")
+            logger.error("Error generating goodbye response: %s", e)
             return False, "Goodbye!"
+
+    def handle_intent(self, extracted_info, original_text=""):
+      
+        try:
+            # Determine the greeting type from the original text
+            text_lower = original_text.lower()
+
+            if 'good morning' in text_lower:
+                greeting_type = 'good_morning'
+            elif 'good afternoon' in text_lower:
+                greeting_type = 'good_afternoon'
+            elif 'good evening' in text_lower:
+                greeting_type = 'good_evening'
+            elif 'good night' in text_lower:
+                greeting_type = 'good_night'
+            elif 'hello' in text_lower:
+                greeting_type = 'hello'
+            elif 'hi' in text_lower:
+                greeting_type = 'hi'
+            elif 'hey' in text_lower:
+                greeting_type = 'hey'
+            elif 'howdy' in text_lower:
+                greeting_type = 'howdy'
+            elif 'greetings' in text_lower:
+                greeting_type = 'greetings'
+            elif 'namaste' in text_lower:
+                greeting_type = 'namaste'
+            elif 'sup' in text_lower or 'what\'s up' in text_lower:
+                greeting_type = 'sup'
+            else:
+                greeting_type = 'hello'  # Default fallback
+
+            success, response = self.get_greeting_response(greeting_type, original_text)
+
+            if success:
+                return response
+            else:
+                return "Hello! How can I help you today?"
+
+        except Exception as e:
+            logger.error("Error in greeting handling: %s", e)
+            return "Hello! How can I help you today?"
+
+def register(registry):
+   
+    registry.add_skill('greeting_skill', GreetingSkill)
+    registry.register('greeting', 'handle_intent', skill='greeting_skill')
@@ -1,20 +1,28 @@
-import wikipedia
 import logging
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Imported when the skill is first built, so registering it stays cheap
+wikipedia = None
+
 class QASkill:
    
 
     def __init__(self):
         
+        # A stand-in installed before the skill is built (benchmarks/bench_replay.py
+        # does this to stay offline) is kept
+        global wikipedia
+        if wikipedia is None:
+            import wikipedia
+
         try:
             # Set Wikipedia language to English
             wikipedia.set_lang("en")
             logger.info("Wikipedia API initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize Wikipedia API: {e}")
+            logger.error("Failed to initialize Wikipedia API: %s", e)
 
     def answer_question(self, query):
        
@@ -22,7 +30,7 @@ class QASkill:
             return False, "Please provide a question or search query"
 
         try:
-            logger.info(f"Searching Wikipedia for: '{query}'")
+            logger.info("Searching Wikipedia for: '%s'", query)
 
             # Search for the query
             search_results = wikipedia.search(query, results=3)
@@ -40,7 +48,7 @@ class QASkill:
                 # Clean up the summary
                 clean_answer = self._clean_wikipedia_text(summary)
 
-                logger.info(f"Found answer for '{query}': {clean_answer[:100]}...")
+                logger.info("Found answer for '%s': %s...", query, clean_answer[:100])
                 return True, clean_answer
 
             except wikipedia.exceptions.DisambiguationError as e:
@@ -62,11 +70,11 @@ class QASkill:
                 return False, f"Could not find information for '{query}'."
 
         except wikipedia.exceptions.WikipediaException as e:
-            logger.error(f"Wikipedia API error: {e}")
+            logger.error("Wikipedia API error: %s", e)
             return False, "Wikipedia service is currently unavailable. Please try again later."
 
         except Exception as e:
-            logger.error(f"Unexpected error in Q&A: {e}")
+            logger.error("Unexpected error in Q&A: %s", e)
             return False, f"An unexpected error occurred while searching: {str(e)}"
 
     def _clean_wikipedia_text(self, text):
@@ -96,7 +104,7 @@ class QASkill:
             suggestions = wikipedia.search(query, results=5)
             return suggestions
         except Exception as e:
-            logger.error(f"Error getting suggestions: {e}")
+            logger.error("Error getting suggestions: %s", e)
             return []
 
     def get_random_fact(self):
@@ -112,7 +120,7 @@ class QASkill:
             return True, f"Did you know? {clean_fact}"
 
         except Exception as e:
-            logger.error(f"Error getting random fact: {e}")
+            logger.error("Error getting random fact: %s", e)
             return False, "Unable to fetch a random fact right now."
 
     def search_and_summarize(self, query, max_sentences=3):
@@ -133,7 +141,7 @@ class QASkill:
             return True, clean_summary
 
         except Exception as e:
-            logger.error(f"Error in detailed search: {e}")
+            logger.error("Error in detailed search: %s", e)
             return False, f"Unable to get detailed information for '{query}'"
 
     def _is_identity_question(self, query):
@@ -196,7 +204,7 @@ class QASkill:
             return True, f"Today is {current_date}. The current time is {current_time}."
 
         except Exception as e:
-            logger.error(f"Error getting current time: {e}")
+            logger.error("Error getting current time: %s", e)
             return False, "Sorry, I couldn't get the current time right now."
 
     def answer_special_questions(self, query):
@@ -210,3 +218,36 @@ class QASkill:
             return success, answer, True
 
         return False, "", False
+
+    def handle_intent(self, extracted_info, original_text=""):
+      
+        query = original_text
+        try:
+            # First check for special questions (identity, time/date)
+            success, answer, is_special = self.answer_special_questions(query)
+
+            if is_special:
+                if success:
+                    return answer
+                else:
+                    return f"Sorry, I encountered an error: {answer}"
+
+            # Fall back to Wikipedia search for other questions
+            success, answer = self.answer_question(query)
+
+            if success:
+                return answer
+            else:
+                return f"I couldn't find information about that. {answer}"
+
+        except Exception as e:
+            logger.error("Error in Q&A handling: %s", e)
+            return "Sorry, I encountered an error while searching for information."
+
+def register(registry):
+   
+    registry.add_skill('qa_skill', QASkill)
+    # wikipedia's requests carry no timeout, so a hung call holds its thread
+    # for good; two threads of its own keep that from starving other skills
+    registry.register('qa', 'handle_intent', skill='qa_skill', blocking=True, deadline=12, workers=2,
+                      timeout_response="Wikipedia is taking too long to respond. Please try again later.")
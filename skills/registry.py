@@ -0,0 +1,288 @@
+import importlib
+import logging
+import os
+import pkgutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from lazy import Lazy
+
+logger = logging.getLogger(__name__)
+
+SKILLS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class SkillHandler:
+    """One registered way of answering an intent.
+
+    entity_key narrows the handler to commands whose extracted info has that
+    key set (e.g. the system intent's 'application' or 'song_name'); a handler
+    without one is the intent's fallback. Blocking handlers run on the
+    registry's shared executor, or on a pool of their own of workers threads
+    when that is given, so a dependency that hangs only ever ties up the
+    handler's own threads; past interim_after seconds the caller is told
+    the answer is on its way, and past the deadline it gets the
+    timeout_response instead. A handler
+    given as a method name is looked up on its skill when first called, so
+    the skill isn't built until it is needed.
+    """
+
+    __slots__ = ('name', 'intent', 'handler', 'skill', 'entity_key', 'blocking', 'deadline', 'timeout_response',
+                 'interim_after', 'interim_response', 'executor')
+
+    def __init__(self, name, intent, handler, skill=None, entity_key=None, blocking=False, deadline=None,
+                 timeout_response=None, interim_after=None, interim_response=None, workers=None):
+
+        self.name = name
+        self.intent = intent
+        self.handler = handler
+        self.skill = skill
+        self.entity_key = entity_key
+        self.blocking = blocking
+        self.deadline = deadline
+        self.timeout_response = timeout_response
+        self.interim_after = interim_after
+        self.interim_response = interim_response
+        self.executor = None
+        if workers:
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'skill-{name}')
+
+class SkillRegistry:
+    """Maps intents to skill handlers and runs them.
+
+    Skill modules in the skills package expose register(registry), which
+    adds the skill's factory and declares its handlers (and optionally extra
+    intent patterns), so adding a skill needs no change to main.py. Skills are
+    built on first use, or earlier by warm-up.
+    """
+
+    unknown_intent_response = ("I'm not sure how to help with that. You can ask me to send emails, set reminders, "
+                               "check weather, open applications, search, or ask questions.")
+    timeout_response = "Sorry, that is taking too long. Please try again later."
+    interim_response = "Working on it, one moment."
+
+    def __init__(self, max_workers=4, default_deadline=15.0, interim_after=3.0):
+
+        self.default_deadline = default_deadline
+        self.interim_after = interim_after
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        self._skills = {}
+        self.patterns = {}
+        self._default_handlers = {}
+        self._entity_handlers = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='skill')
+
+    def add_skill(self, name, factory):
+
+        # factory is usually the skill class; it runs on first use
+        self._skills[name] = Lazy(factory, name=name)
+
+    def get_skill(self, name):
+
+        return self._skills[name].get()
+
+    @property
+    def skills(self):
+
+        # Only the skills built so far
+        return {name: lazy.get() for name, lazy in self._skills.items() if lazy.built}
+
+    def lazy_skills(self, names=None):
+
+        # For warm_up(); all skills when names is None
+        names = self._skills if names is None else names
+        return [self._skills[name] for name in names if name in self._skills]
+
+    def register(self, intent, handler, name=None, skill=None, entity_key=None, blocking=False, deadline=None,
+                 timeout_response=None, interim_after=None, interim_response=None, workers=None):
+
+        if isinstance(handler, str) and skill not in self._skills:
+            raise ValueError(f"Handler '{handler}' for intent '{intent}' needs a skill added with add_skill()")
+
+        entry = SkillHandler(
+            name or skill or getattr(handler, '__qualname__', repr(handler)),
+            intent,
+            handler,
+            skill=skill,
+            entity_key=entity_key,
+            blocking=blocking,
+            deadline=deadline,
+            timeout_response=timeout_response,
+            interim_after=interim_after,
+            interim_response=interim_response,
+            workers=workers
+        )
+
+        if entity_key is None:
+            if intent in self._default_handlers:
+                logger.warning("Replacing the '%s' handler %s with %s",
+                               intent, self._default_handlers[intent].name, entry.name)
+            self._default_handlers[intent] = entry
+        else:
+            # Checked in registration order, so earlier keys win when a
+            # command carries several (dicts keep insertion order)
+            keyed = self._entity_handlers.setdefault(intent, {})
+            if entity_key in keyed:
+                logger.warning("Replacing the '%s/%s' handler %s with %s",
+                               intent, entity_key, keyed[entity_key].name, entry.name)
+            keyed[entity_key] = entry
+
+        return entry
+
+    def add_patterns(self, intent, patterns):
+
+        self.patterns.setdefault(intent, []).extend(patterns)
+
+    def apply_patterns(self, classifier):
+
+        # Appended after the built-in patterns, so they never take precedence
+        if not self.patterns:
+            return
+
+        for intent, patterns in self.patterns.items():
+            existing = classifier.intent_patterns.setdefault(intent, [])
+            existing.extend(pattern for pattern in patterns if pattern not in existing)
+        classifier.reload_patterns()
+        logger.info("Added skill patterns for intents: %s", ', '.join(sorted(self.patterns)))
+
+    def load_plugins(self, package='skills', path=SKILLS_DIR):
+
+        loaded = []
+        for module_info in sorted(pkgutil.iter_modules([path]), key=lambda info: info.name):
+            if module_info.name == 'registry':
+                continue
+
+            try:
+                module = importlib.import_module(f"{package}.{module_info.name}")
+            except Exception as e:
+                logger.error("Failed to import skill module %s: %s", module_info.name, e)
+                continue
+
+            register = getattr(module, 'register', None)
+            if not callable(register):
+                continue
+
+            try:
+                register(self)
+                loaded.append(module_info.name)
+            except Exception as e:
+                logger.error("Failed to register skill module %s: %s", module_info.name, e)
+
+        logger.info("Loaded skill modules: %s", ', '.join(loaded) or 'none')
+        return loaded
+
+    def intents(self):
+
+        return set(self._default_handlers) | set(self._entity_handlers)
+
+    def resolve(self, intent, extracted_info):
+
+        for entity_key, entry in self._entity_handlers.get(intent, {}).items():
+            if extracted_info.get(entity_key):
+                return entry
+        return self._default_handlers.get(intent)
+
+    def _call(self, entry, extracted_info, original_text):
+
+        handler = entry.handler
+        if isinstance(handler, str):
+            handler = getattr(self.get_skill(entry.skill), handler)
+        return handler(extracted_info, original_text)
+
+    def dispatch(self, intent, extracted_info, original_text, entry=None, interim=None):
+
+        # interim, if given, is called with a short acknowledgement when a
+        # blocking skill is still running after its interim_after seconds
+        entry = entry or self.resolve(intent, extracted_info)
+        if entry is None:
+            return self.unknown_intent_response
+
+        start = time.perf_counter()
+        outcome = 'ok'
+        interim_sent = False
+        try:
+            if not entry.blocking:
+                return self._call(entry, extracted_info, original_text)
+
+            # A skill's first use builds it on the executor too, within its deadline
+            future = (entry.executor or self._executor).submit(self._call, entry, extracted_info, original_text)
+            deadline = entry.deadline or self.default_deadline
+            interim_after = entry.interim_after if entry.interim_after is not None else self.interim_after
+            try:
+                if interim is not None and interim_after is not None and interim_after < deadline:
+                    try:
+                        return future.result(timeout=interim_after)
+                    except FutureTimeoutError:
+                        interim_sent = True
+                        self._notify(interim, entry.interim_response or self.interim_response)
+                return future.result(timeout=max(0.0, deadline - (time.perf_counter() - start)))
+            except FutureTimeoutError:
+                # Only a call still queued can be cancelled; a running worker
+                # thread can't be interrupted, so it finishes in the background
+                # and its result is dropped
+                future.cancel()
+                outcome = 'timeout'
+                logger.warning("Skill %s missed its %ss deadline", entry.name, deadline)
+                return entry.timeout_response or self.timeout_response
+
+        except Exception as e:
+            outcome = 'error'
+            logger.error("Error handling intent '%s': %s", intent, e)
+            return f"Sorry, I encountered an error while processing your request: {str(e)}"
+        finally:
+            self._record(entry.name, outcome, interim_sent, time.perf_counter() - start)
+
+    def _notify(self, interim, message):
+
+        try:
+            interim(message)
+        except Exception as e:
+            logger.error("Error delivering interim response: %s", e)
+
+    def _record(self, name, outcome, interim_sent, seconds):
+
+        # Dispatch runs on several threads in the pipeline and the server
+        with self._stats_lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = {'calls': 0, 'interims': 0, 'timeouts': 0, 'errors': 0, 'max_seconds': 0.0}
+            stats['calls'] += 1
+            stats['interims'] += interim_sent
+            if outcome == 'timeout':
+                stats['timeouts'] += 1
+            elif outcome == 'error':
+                stats['errors'] += 1
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+    def stats(self):
+
+        # Per handler name: calls, interim responses, deadline misses, errors
+        with self._stats_lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def format_stats(self):
+
+        lines = []
+        for name, stats in sorted(self.stats().items()):
+            lines.append(f"{name}: {stats['calls']} calls, {stats['interims']} interim, "
+                         f"{stats['timeouts']} timed out, {stats['errors']} errors, "
+                         f"slowest {stats['max_seconds'] * 1000:.0f} ms")
+        return "\n".join(lines) or "No skill calls yet"
+
+    def shutdown(self):
+
+        for name, skill in self.skills.items():
+            shutdown = getattr(skill, 'shutdown', None)
+            if callable(shutdown):
+                try:
+                    shutdown()
+                except Exception as e:
+                    logger.error("Error shutting down skill %s: %s", name, e)
+
+        entries = list(self._default_handlers.values())
+        entries += [entry for keyed in self._entity_handlers.values() for entry in keyed.values()]
+        for entry in entries:
+            if entry.executor is not None:
+                entry.executor.shutdown(wait=False)
+        self._executor.shutdown(wait=False)
@@ -2,16 +2,15 @@ import sqlite3
 import logging
 import re
 from datetime import datetime, timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.jobstores.memory import MemoryJobStore
-from apscheduler.executors.asyncio import AsyncIOExecutor
-from apscheduler.triggers.interval import IntervalTrigger
 import os
 
 logger = logging.getLogger(__name__)
 
 class ReminderSkill:
    
+    # Seconds a connection waits for another thread's write to finish
+    db_timeout = 10
+
     def __init__(self):
         """Initialize the reminder skill."""
         self.db_path = 'reminders.db'
@@ -19,12 +18,22 @@ class ReminderSkill:
         self._init_db()
         self._init_scheduler()
 
+    def _connect(self):
+
+        # A connection per call, so concurrent sessions (see server.py) never
+        # share one; sqlite serializes their writes and the busy timeout
+        # makes a writer wait for the lock instead of failing
+        return sqlite3.connect(self.db_path, timeout=self.db_timeout)
+
     def _init_db(self):
        
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
+            # Readers don't block the writer (and vice versa) in WAL mode
+            cursor.execute('PRAGMA journal_mode=WAL')
+
             # Create reminders table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS reminders (
@@ -40,11 +49,16 @@ class ReminderSkill:
             conn.close()
             logger.info("Reminder database initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize reminder database: {e}")
+            logger.error("Failed to initialize reminder database: %s", e)
 
     def _init_scheduler(self):
        
         try:
+            # APScheduler is imported here, when the skill is first built
+            from apscheduler.schedulers.background import BackgroundScheduler
+            from apscheduler.jobstores.memory import MemoryJobStore
+            from apscheduler.executors.asyncio import AsyncIOExecutor
+
             # Configure job stores
             jobstores = {
                 'default': MemoryJobStore()
@@ -70,7 +84,7 @@ class ReminderSkill:
             # Note: APScheduler 3.10.4 starts automatically when instantiated
             logger.info("Reminder scheduler initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize scheduler: {e}")
+            logger.error("Failed to initialize scheduler: %s", e)
 
     def set_reminder(self, text, minutes=None, hours=None):
       
@@ -88,7 +102,7 @@ class ReminderSkill:
                 return False, "Please specify either minutes or hours for the reminder", None
 
             # Store reminder in database
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             cursor.execute('''
@@ -110,20 +124,20 @@ class ReminderSkill:
                 replace_existing=True
             )
 
-            logger.info(f"Reminder set for {reminder_time}: {text}")
+            logger.info("Reminder set for %s: %s", reminder_time, text)
             return True, f"Reminder set for {reminder_time.strftime('%I:%M %p')}: {text}", reminder_id
 
         except Exception as e:
-            logger.error(f"Failed to set reminder: {e}")
+            logger.error("Failed to set reminder: %s", e)
             return False, f"Failed to set reminder: {str(e)}", None
 
     def _trigger_reminder(self, reminder_id, text):
        
         try:
-            logger.info(f"Reminder triggered: {text}")
+            logger.info("Reminder triggered: %s", text)
 
             # Update reminder status in database
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute('UPDATE reminders SET status = ? WHERE id = ?', ('triggered', reminder_id))
             conn.commit()
@@ -134,12 +148,12 @@ class ReminderSkill:
             print(f"\n🔔 REMINDER: {text}\n")
 
         except Exception as e:
-            logger.error(f"Failed to trigger reminder {reminder_id}: {e}")
+            logger.error("Failed to trigger reminder %s: %s", reminder_id, e)
 
     def list_reminders(self):
       
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             cursor.execute('''
@@ -163,7 +177,7 @@ class ReminderSkill:
             return reminders
 
         except Exception as e:
-            logger.error(f"Failed to list reminders: {e}")
+            logger.error("Failed to list reminders: %s", e)
             return []
 
     def cancel_reminder(self, reminder_id):
@@ -174,17 +188,17 @@ class ReminderSkill:
                 self.scheduler.remove_job(str(reminder_id))
 
             # Update status in database
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             cursor.execute('UPDATE reminders SET status = ? WHERE id = ?', ('cancelled', reminder_id))
             conn.commit()
             conn.close()
 
-            logger.info(f"Reminder {reminder_id} cancelled")
+            logger.info("Reminder %s cancelled", reminder_id)
             return True, f"Reminder {reminder_id} cancelled successfully"
 
         except Exception as e:
-            logger.error(f"Failed to cancel reminder {reminder_id}: {e}")
+            logger.error("Failed to cancel reminder %s: %s", reminder_id, e)
             return False, f"Failed to cancel reminder: {str(e)}"
 
     def cleanup_old_reminders(self, days=7):
@@ -192,7 +206,7 @@ class ReminderSkill:
         try:
             cutoff_date = datetime.now() - timedelta(days=days)
 
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             cursor.execute('DELETE FROM reminders WHERE status != ? AND scheduled_time < ?',
@@ -203,10 +217,10 @@ class ReminderSkill:
             conn.close()
 
             if deleted_count > 0:
-                logger.info(f"Cleaned up {deleted_count} old reminders")
+                logger.info("Cleaned up %s old reminders", deleted_count)
 
         except Exception as e:
-            logger.error(f"Failed to cleanup old reminders: {e}")
+            logger.error("Failed to cleanup old reminders: %s", e)
 
     def shutdown(self):
        
@@ -274,7 +288,7 @@ class ReminderSkill:
             return None
 
         except Exception as e:
-            logger.error(f"Failed to parse time expression '{time_expr}': {e}")
+            logger.error("Failed to parse time expression '%s': %s", time_expr, e)
             return None
 
     def set_reminder_advanced(self, text, time_expr=None, minutes=None, hours=None, days=None, recurring=None):
@@ -301,7 +315,7 @@ class ReminderSkill:
                 return False, "Please specify when you want to be reminded", None
 
             # Store reminder in database
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             cursor.execute('''
@@ -315,6 +329,7 @@ class ReminderSkill:
 
             # Schedule the reminder
             if recurring:
+                from apscheduler.triggers.interval import IntervalTrigger
                 trigger = IntervalTrigger(**self._parse_recurring_interval(recurring))
                 self.scheduler.add_job(
                     func=self._trigger_reminder,
@@ -333,11 +348,11 @@ class ReminderSkill:
                     replace_existing=True
                 )
 
-            logger.info(f"Reminder set for {reminder_time}: {text}")
+            logger.info("Reminder set for %s: %s", reminder_time, text)
             return True, f"Reminder set for {reminder_time.strftime('%I:%M %p')}: {text}", reminder_id
 
         except Exception as e:
-            logger.error(f"Failed to set reminder: {e}")
+            logger.error("Failed to set reminder: %s", e)
             return False, f"Failed to set reminder: {str(e)}", None
 
     def _parse_recurring_interval(self, recurring):
@@ -369,7 +384,7 @@ class ReminderSkill:
     def cancel_reminder_by_text(self, text):
       
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             # Find matching reminders
@@ -393,19 +408,19 @@ class ReminderSkill:
             conn.close()
 
             if cancelled_count > 0:
-                logger.info(f"Cancelled {cancelled_count} reminders matching '{text}'")
+                logger.info("Cancelled %s reminders matching '%s'", cancelled_count, text)
                 return True, f"Cancelled {cancelled_count} reminders matching '{text}'", cancelled_count
             else:
                 return False, f"No active reminders found matching '{text}'", 0
 
         except Exception as e:
-            logger.error(f"Failed to cancel reminders by text: {e}")
+            logger.error("Failed to cancel reminders by text: %s", e)
             return False, f"Failed to cancel reminders: {str(e)}", 0
 
     def snooze_reminder(self, reminder_id, minutes=10):
       
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             # Get current reminder
@@ -442,9 +457,40 @@ class ReminderSkill:
             conn.commit()
             conn.close()
 
-            logger.info(f"Reminder {reminder_id} snoozed until {new_time}")
+            logger.info("Reminder %s snoozed until %s", reminder_id, new_time)
             return True, f"Reminder snoozed for {minutes} minutes until {new_time.strftime('%I:%M %p')}"
 
         except Exception as e:
-            logger.error(f"Failed to snooze reminder {reminder_id}: {e}")
+            logger.error("Failed to snooze reminder %s: %s", reminder_id, e)
             return False, f"Failed to snooze reminder: {str(e)}"
+
+    def handle_intent(self, extracted_info, original_text=""):
+       
+        try:
+            reminder_text = extracted_info.get('text')
+            minutes = extracted_info.get('minutes')
+            hours = extracted_info.get('hours')
+
+            if not reminder_text:
+                return "Please tell me what you want to be reminded about."
+
+            if not minutes and not hours:
+                return "Please specify when you want to be reminded (e.g., 'in 10 minutes' or 'in 2 hours')."
+
+            success, message, reminder_id = self.set_reminder(
+                reminder_text, minutes=minutes, hours=hours
+            )
+
+            if success:
+                return message
+            else:
+                return f"Failed to set reminder: {message}"
+
+        except Exception as e:
+            logger.error("Error in reminder handling: %s", e)
+            return "Sorry, I encountered an error while setting the reminder."
+
+def register(registry):
+   
+    registry.add_skill('reminder_skill', ReminderSkill)
+    registry.register('reminder', 'handle_intent', skill='reminder_skill')
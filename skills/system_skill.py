@@ -8,6 +8,9 @@ logger = logging.getLogger(__name__)
 
 class SystemSkill:
   
+    # Seconds the YouTube search page may take before falling back to the
+    # plain search URL
+    http_timeout = 5
 
     def __init__(self):
    
@@ -50,10 +53,10 @@ class SystemSkill:
             try:
                 command = self.application_commands[app_name]
                 subprocess.Popen(command, shell=True)
-                logger.info(f"Opened application: {app_name} with command: {command}")
+                logger.info("Opened application: %s with command: %s", app_name, command)
                 return True, f"Opening {app_name}"
             except Exception as e:
-                logger.error(f"Failed to open {app_name}: {e}")
+                logger.error("Failed to open %s: %s", app_name, e)
                 return False, f"Failed to open {app_name}"
 
         # Try partial matching
@@ -61,19 +64,19 @@ class SystemSkill:
             if app_name in key or key in app_name:
                 try:
                     subprocess.Popen(command, shell=True)
-                    logger.info(f"Opened application: {key} with command: {command}")
+                    logger.info("Opened application: %s with command: %s", key, command)
                     return True, f"Opening {key}"
                 except Exception as e:
-                    logger.error(f"Failed to open {key}: {e}")
+                    logger.error("Failed to open %s: %s", key, e)
                     continue
 
         # Try to open directly with shell as fallback
         try:
             subprocess.Popen(app_name, shell=True)
-            logger.info(f"Opened application via shell: {app_name}")
+            logger.info("Opened application via shell: %s", app_name)
             return True, f"Opening {app_name}"
         except Exception as e:
-            logger.error(f"Failed to open {app_name}: {e}")
+            logger.error("Failed to open %s: %s", app_name, e)
 
         return False, f"Application '{app_name}' not found or not supported"
 
@@ -101,7 +104,7 @@ class SystemSkill:
                 headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
 
                 req = urllib.request.Request(search_url, headers=headers)
-                with urllib.request.urlopen(req) as response:
+                with urllib.request.urlopen(req, timeout=self.http_timeout) as response:
                     html = response.read().decode('utf-8')
 
                 # Extract video ID from the search results page
@@ -113,23 +116,23 @@ class SystemSkill:
                     # Open the direct video URL
                     direct_url = f"https://www.youtube.com/watch?v={video_id}"
                     webbrowser.open(direct_url)
-                    logger.info(f"Playing YouTube video: {query} (ID: {video_id})")
+                    logger.info("Playing YouTube video: %s (ID: %s)", query, video_id)
                     return True, f"Playing '{query}' on YouTube"
                 else:
                     # Fallback to search results if we can't extract video ID
                     webbrowser.open(youtube_url)
-                    logger.info(f"Searching YouTube for: {query}")
+                    logger.info("Searching YouTube for: %s", query)
                     return True, f"Searching for '{query}' on YouTube"
 
             except Exception as api_error:
-                logger.warning(f"YouTube API search failed: {api_error}")
+                logger.warning("YouTube API search failed: %s", api_error)
                 # Fallback to direct search
                 webbrowser.open(youtube_url)
-                logger.info(f"Searching YouTube for: {query}")
+                logger.info("Searching YouTube for: %s", query)
                 return True, f"Searching for '{query}' on YouTube"
 
         except Exception as e:
-            logger.error(f"Failed to play YouTube video: {e}")
+            logger.error("Failed to play YouTube video: %s", e)
             return False, "Failed to play YouTube video"
 
     def play_song(self, song_name):
@@ -145,11 +148,11 @@ class SystemSkill:
             # Open YouTube in default browser
             webbrowser.open(youtube_url)
 
-            logger.info(f"Searching YouTube for song: {song_name}")
+            logger.info("Searching YouTube for song: %s", song_name)
             return True, f"Playing '{song_name}' on YouTube"
 
         except Exception as e:
-            logger.error(f"Failed to play song: {e}")
+            logger.error("Failed to play song: %s", e)
             return False, "Failed to play song on YouTube"
 
     def open_website(self, website):
@@ -170,11 +173,11 @@ class SystemSkill:
                     website = f"https://{website}"
 
             webbrowser.open(website)
-            logger.info(f"Opened website: {website}")
+            logger.info("Opened website: %s", website)
             return True, f"Opening {website}"
 
         except Exception as e:
-            logger.error(f"Failed to open website: {e}")
+            logger.error("Failed to open website: %s", e)
             return False, "Failed to open website"
 
     def search_web(self, query):
@@ -185,11 +188,11 @@ class SystemSkill:
         try:
             search_url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
             webbrowser.open(search_url)
-            logger.info(f"Searching web for: {query}")
+            logger.info("Searching web for: %s", query)
             return True, f"Searching for '{query}'"
 
         except Exception as e:
-            logger.error(f"Failed to search web: {e}")
+            logger.error("Failed to search web: %s", e)
             return False, "Failed to search web"
 
     def search_youtube(self, query):
@@ -217,7 +220,7 @@ class SystemSkill:
                 headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
 
                 req = urllib.request.Request(search_url, headers=headers)
-                with urllib.request.urlopen(req) as response:
+                with urllib.request.urlopen(req, timeout=self.http_timeout) as response:
                     html = response.read().decode('utf-8')
 
                 # Extract video ID from the search results page
@@ -228,23 +231,23 @@ class SystemSkill:
                     # Open the direct video URL
                     direct_url = f"https://www.youtube.com/watch?v={video_id}"
                     webbrowser.open(direct_url)
-                    logger.info(f"Playing YouTube video: {video_name} (ID: {video_id})")
+                    logger.info("Playing YouTube video: %s (ID: %s)", video_name, video_id)
                     return True, f"Playing '{video_name}' on YouTube"
                 else:
                     # Fallback to search results
                     webbrowser.open(youtube_url)
-                    logger.info(f"Searching YouTube for video: {video_name}")
+                    logger.info("Searching YouTube for video: %s", video_name)
                     return True, f"Searching for '{video_name}' on YouTube"
 
             except Exception as api_error:
-                logger.warning(f"YouTube video search failed: {api_error}")
+                logger.warning("YouTube video search failed: %s", api_error)
                 # Fallback to direct search
                 webbrowser.open(youtube_url)
-                logger.info(f"Searching YouTube for video: {video_name}")
+                logger.info("Searching YouTube for video: %s", video_name)
                 return True, f"Searching for '{video_name}' on YouTube"
 
         except Exception as e:
-            logger.error(f"Failed to play video on YouTube: {e}")
+            logger.error("Failed to play video on YouTube: %s", e)
             return False, "Failed to play video on YouTube"
 
     def is_exit_command(self, command):
@@ -254,3 +257,68 @@ class SystemSkill:
 
         command_lower = command.lower().strip()
         return any(exit_cmd in command_lower for exit_cmd in self.exit_commands)
+
+    def handle_application(self, extracted_info, original_text=""):
+       
+        application = extracted_info['application']
+        success, message = self.open_application(application)
+        if success:
+            return f"Opening {application}."
+        else:
+            return f"Failed to open {application}: {message}"
+
+    def handle_youtube_query(self, extracted_info, original_text=""):
+       
+        youtube_query = extracted_info['youtube_query']
+        success, message = self.play_youtube_video(youtube_query)
+        if success:
+            return f"Playing '{youtube_query}' on YouTube."
+        else:
+            return f"Failed to play YouTube video: {message}"
+
+    def handle_video_query(self, extracted_info, original_text=""):
+       
+        # For "play videos in youtube" commands
+        video_query = extracted_info['video_query']
+        success, message = self.play_video_on_youtube(video_query)
+        if success:
+            return f"Playing '{video_query}' on YouTube."
+        else:
+            return f"Failed to play video: {message}"
+
+    def handle_song(self, extracted_info, original_text=""):
+       
+        song_name = extracted_info['song_name']
+        success, message = self.play_song(song_name)
+        if success:
+            return f"Playing {song_name}."
+        else:
+            return f"Failed to play song: {message}"
+
+    def handle_search(self, extracted_info, original_text=""):
+       
+        search_query = extracted_info['search_query']
+        success, message = self.search_web(search_query)
+        if success:
+            return f"Searching for '{search_query}'."
+        else:
+            return f"Failed to search: {message}"
+
+    def handle_unknown(self, extracted_info, original_text=""):
+       
+        return "I can help you open applications, play YouTube videos, play songs, or search the web. What would you like me to do?"
+
+def register(registry):
+   
+    registry.add_skill('system_skill', SystemSkill)
+
+    # Same precedence as the entity checks they replace; the exit command is
+    # registered by the assistant itself since it stops the main loop
+    registry.register('system', 'handle_application', skill='system_skill', entity_key='application')
+    registry.register('system', 'handle_youtube_query', skill='system_skill', entity_key='youtube_query',
+                      blocking=True, deadline=10)
+    registry.register('system', 'handle_video_query', skill='system_skill', entity_key='video_query',
+                      blocking=True, deadline=10)
+    registry.register('system', 'handle_song', skill='system_skill', entity_key='song_name')
+    registry.register('system', 'handle_search', skill='system_skill', entity_key='search_query')
+    registry.register('system', 'handle_unknown', skill='system_skill')
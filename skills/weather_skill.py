@@ -1,17 +1,34 @@
-import requests
 import logging
+import threading
 from config import OPENWEATHER_API_KEY
 
 logger = logging.getLogger(__name__)
 
+# Imported when the skill is first built, so registering it stays cheap
+requests = None
+
 class WeatherSkill:
    
 
     def __init__(self):
       
+        global requests
+        import requests
+
         self.api_key = OPENWEATHER_API_KEY
         self.base_url = "http://api.openweathermap.org/data/2.5/weather"
 
+        # requests.Session isn't thread-safe, so each worker thread keeps its
+        # own; it still reuses the connection across that thread's calls
+        self._local = threading.local()
+
+    def _session(self):
+
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
     def get_weather(self, city):
        
         if not city or not city.strip():
@@ -28,8 +45,8 @@ class WeatherSkill:
                 'units': 'metric'  # Use Celsius
             }
 
-            logger.info(f"Fetching weather data for {city}")
-            response = requests.get(self.base_url, params=params, timeout=10)
+            logger.info("Fetching weather data for %s", city)
+            response = self._session().get(self.base_url, params=params, timeout=10)
             response.raise_for_status()
 
             data = response.json()
@@ -41,7 +58,7 @@ class WeatherSkill:
             # Extract weather information
             weather_info = self._parse_weather_data(data)
 
-            logger.info(f"Weather data retrieved for {city}: {weather_info}")
+            logger.info("Weather data retrieved for %s: %s", city, weather_info)
             return True, weather_info
 
         except requests.exceptions.Timeout:
@@ -53,11 +70,11 @@ class WeatherSkill:
             return False, "Unable to connect to weather service. Please check your internet connection."
 
         except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP error from weather API: {e}")
+            logger.error("HTTP error from weather API: %s", e)
             return False, "Weather service is currently unavailable. Please try again later."
 
         except Exception as e:
-            logger.error(f"Unexpected error fetching weather: {e}")
+            logger.error("Unexpected error fetching weather: %s", e)
             return False, f"An unexpected error occurred while fetching weather data: {str(e)}"
 
     def _parse_weather_data(self, data):
@@ -94,7 +111,7 @@ class WeatherSkill:
             return weather_info
 
         except Exception as e:
-            logger.error(f"Error parsing weather data: {e}")
+            logger.error("Error parsing weather data: %s", e)
             return "Unable to parse weather information"
 
     def get_weather_by_coordinates(self, lat, lon):
@@ -110,8 +127,8 @@ class WeatherSkill:
                 'units': 'metric'
             }
 
-            logger.info(f"Fetching weather data for coordinates ({lat}, {lon})")
-            response = requests.get(self.base_url, params=params, timeout=10)
+            logger.info("Fetching weather data for coordinates (%s, %s)", lat, lon)
+            response = self._session().get(self.base_url, params=params, timeout=10)
             response.raise_for_status()
 
             data = response.json()
@@ -120,7 +137,7 @@ class WeatherSkill:
             return True, weather_info
 
         except Exception as e:
-            logger.error(f"Error fetching weather by coordinates: {e}")
+            logger.error("Error fetching weather by coordinates: %s", e)
             return False, f"Unable to get weather for these coordinates: {str(e)}"
 
     def test_api_key(self):
@@ -136,7 +153,7 @@ class WeatherSkill:
                 'units': 'metric'
             }
 
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = self._session().get(self.base_url, params=params, timeout=10)
 
             if response.status_code == 401:
                 return False, "Invalid API key. Please check your OpenWeatherMap API key."
@@ -149,3 +166,28 @@ class WeatherSkill:
 
         except Exception as e:
             return False, f"API key test failed: {str(e)}"
+
+    def handle_intent(self, extracted_info, original_text=""):
+       
+        try:
+            city = extracted_info.get('city')
+
+            if not city:
+                return "Please specify a city name for the weather information."
+
+            success, message = self.get_weather(city)
+
+            if success:
+                return message
+            else:
+                return f"Unable to get weather information: {message}"
+
+        except Exception as e:
+            logger.error("Error in weather handling: %s", e)
+            return "Sorry, I encountered an error while fetching weather information."
+
+def register(registry):
+   
+    registry.add_skill('weather_skill', WeatherSkill)
+    registry.register('weather', 'handle_intent', skill='weather_skill', blocking=True, deadline=12,
+                      timeout_response="The weather service is taking too long to respond. Please try again later.")
@@ -0,0 +1,221 @@
+import bisect
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last one is open
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class Span:
+    """One timed stage of a command (capture, recognition, classify, ...)."""
+
+    __slots__ = ('stage', 'command_id', 'start', 'duration', 'intent', 'skill', 'outcome')
+
+    def __init__(self, stage, command_id, start):
+
+        self.stage = stage
+        self.command_id = command_id
+        self.start = start
+        self.duration = 0.0
+        self.intent = None
+        self.skill = None
+        self.outcome = 'ok'
+
+    def as_dict(self):
+
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+class _ActiveSpan:
+
+    __slots__ = ('tracer', 'span', '_started')
+
+    def __init__(self, tracer, span):
+
+        self.tracer = tracer
+        self.span = span
+        self._started = 0.0
+
+    def set(self, **attributes):
+
+        for name, value in attributes.items():
+            setattr(self.span, name, value)
+
+    def __enter__(self):
+
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+
+        self.span.duration = time.perf_counter() - self._started
+        if exc_type is not None and self.span.outcome == 'ok':
+            self.span.outcome = 'error'
+        self.tracer._record(self.span)
+        return False
+
+class _CommandTrace:
+
+    __slots__ = ('tracer', 'command_id', 'spans', 'intent', 'skill', 'outcome', 'start', '_started', '_previous')
+
+    def __init__(self, tracer, command_id):
+
+        self.tracer = tracer
+        self.command_id = command_id
+        self.spans = []
+        self.intent = None
+        self.skill = None
+        self.outcome = 'ok'
+        self.start = 0.0
+        self._started = 0.0
+        self._previous = None
+
+    def set(self, **attributes):
+
+        for name, value in attributes.items():
+            setattr(self, name, value)
+
+    def __enter__(self):
+
+        self._previous = self.tracer._current_command()
+        self.tracer._local.command = self
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+
+        if exc_type is not None and self.outcome == 'ok':
+            self.outcome = 'error'
+
+        # Intent and skill are only known half-way through the command, so
+        # the earlier stage spans are labelled once it finishes
+        for span in self.spans:
+            span.intent = span.intent or self.intent
+            span.skill = span.skill or self.skill
+
+        total = Span('command', self.command_id, self.start)
+        total.duration = time.perf_counter() - self._started
+        total.intent = self.intent
+        total.skill = self.skill
+        total.outcome = self.outcome
+        self.tracer._record(total)
+
+        self.tracer._local.command = self._previous
+        return False
+
+class _NullSpan:
+    """Shared no-op stand-in returned while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class Tracer:
+    """Per-stage timing spans kept in an in-process ring buffer.
+
+    While disabled, span() and command() return NULL_SPAN so instrumented
+    code pays one attribute check per stage and records nothing.
+    """
+
+    def __init__(self, enabled=True, capacity=2000):
+
+        self.enabled = enabled
+        self.spans = deque(maxlen=capacity)
+        self._command_ids = itertools.count(1)
+        self._local = threading.local()
+
+    def _current_command(self):
+
+        return getattr(self._local, 'command', None)
+
+    def _record(self, span):
+
+        # deque.append is atomic, so stages on other threads need no lock
+        self.spans.append(span)
+        command = self._current_command()
+        if command is not None and span.stage != 'command':
+            command.spans.append(span)
+
+    def command(self):
+
+        if not self.enabled:
+            return NULL_SPAN
+        return _CommandTrace(self, next(self._command_ids))
+
+    def span(self, stage, **attributes):
+
+        if not self.enabled:
+            return NULL_SPAN
+
+        command = self._current_command()
+        span = Span(stage, command.command_id if command else None, time.time())
+        for name, value in attributes.items():
+            setattr(span, name, value)
+        return _ActiveSpan(self, span)
+
+    def clear(self):
+
+        self.spans.clear()
+
+    def recent(self, limit=None):
+
+        spans = list(self.spans)
+        return [span.as_dict() for span in (spans[-limit:] if limit else spans)]
+
+    def summary(self):
+
+        durations = {}
+        for span in list(self.spans):
+            durations.setdefault(span.stage, []).append(span.duration * 1000)
+
+        summary = {}
+        for stage, values in durations.items():
+            values.sort()
+            histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+            for value in values:
+                histogram[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, value)] += 1
+            summary[stage] = {
+                'count': len(values),
+                'p50_ms': values[int(0.50 * (len(values) - 1))],
+                'p90_ms': values[int(0.90 * (len(values) - 1))],
+                'p99_ms': values[int(0.99 * (len(values) - 1))],
+                'max_ms': values[-1],
+                'histogram': histogram
+            }
+        return summary
+
+    def format_summary(self, width=30):
+
+        summary = self.summary()
+        if not summary:
+            return "No spans recorded" + ("" if self.enabled else " (tracing is disabled)")
+
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}ms"]
+        lines = []
+        stages = ['capture', 'calibration', 'preprocess', 'recognition', 'classify', 'skill', 'tts', 'command']
+        for stage in stages + sorted(set(summary) - set(stages)):
+            stats = summary.get(stage)
+            if not stats:
+                continue
+            lines.append(f"{stage}: {stats['count']} spans, p50 {stats['p50_ms']:.1f} ms, "
+                         f"p90 {stats['p90_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms, max {stats['max_ms']:.1f} ms")
+            peak = max(stats['histogram'])
+            for label, count in zip(labels, stats['histogram']):
+                if count:
+                    lines.append(f"  {label:>9} {'#' * max(1, round(width * count / peak)):{width}} {count}")
+        return "\n".join(lines)
+
+NULL_TRACER = Tracer(enabled=False, capacity=1)
@@ -1,4 +1,3 @@
-import pyttsx3
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,15 +7,27 @@ class TextToSpeech:
 
     def __init__(self):
        
-        try:
-            self.engine = pyttsx3.init()
-            # Configure voice properties
-            self.engine.setProperty('rate', 150)  # Speed of speech
-            self.engine.setProperty('volume', 0.9)  # Volume (0.0 to 1.0)
-            logger.info("TTS engine initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize TTS engine: {e}")
-            self.engine = None
+        # pyttsx3 is imported and its driver started on first use; some
+        # drivers must then always be used from that same thread
+        self._engine = None
+        self._initialized = False
+
+    @property
+    def engine(self):
+
+        if not self._initialized:
+            self._initialized = True
+            try:
+                import pyttsx3
+                self._engine = pyttsx3.init()
+                # Configure voice properties
+                self._engine.setProperty('rate', 150)  # Speed of speech
+                self._engine.setProperty('volume', 0.9)  # Volume (0.0 to 1.0)
+                logger.info("TTS engine initialized successfully")
+            except Exception as e:
+                logger.error("Failed to initialize TTS engine: %s", e)
+                self._engine = None
+        return self._engine
 
     def speak(self, text):
       
@@ -29,25 +40,25 @@ class TextToSpeech:
             return False
 
         try:
-            logger.info(f"Speaking: '{text}'")
+            logger.info("Speaking: '%s'", text)
             self.engine.say(text)
             self.engine.runAndWait()
             return True
         except Exception as e:
-            logger.error(f"Error during speech synthesis: {e}")
+            logger.error("Error during speech synthesis: %s", e)
             return False
 
     def set_voice_rate(self, rate):
         
         if self.engine:
             self.engine.setProperty('rate', rate)
-            logger.info(f"Speech rate set to {rate}")
+            logger.info("Speech rate set to %s", rate)
 
     def set_volume(self, volume):
      
         if self.engine:
             self.engine.setProperty('volume', max(0.0, min(1.0, volume)))
-            logger.info(f"Speech volume set to {volume}")
+            logger.info("Speech volume set to %s", volume)
 
     def get_available_voices(self):
        
@@ -56,7 +67,7 @@ class TextToSpeech:
                 voices = self.engine.getProperty('voices')
                 return voices
             except Exception as e:
-                logger.error(f"Error getting available voices: {e}")
+                logger.error("Error getting available voices: %s", e)
                 return []
         return []
 
@@ -65,9 +76,9 @@ class TextToSpeech:
         if self.engine:
             try:
                 self.engine.setProperty('voice', voice_id)
-                logger.info(f"Voice set to {voice_id}")
+                logger.info("Voice set to %s", voice_id)
             except Exception as e:
-                logger.error(f"Error setting voice: {e}")
+                logger.error("Error setting voice: %s", e)
 
     def stop_speaking(self):
       
@@ -76,4 +87,35 @@ class TextToSpeech:
                 self.engine.stop()
                 logger.info("Speech stopped")
             except Exception as e:
-                logger.error(f"Error stopping speech: {e}")
+                logger.error("Error stopping speech: %s", e)
+
+class NullTextToSpeech:
+    """Silent stand-in for TextToSpeech, for running without audio output."""
+
+    def __init__(self):
+
+        self.engine = None
+        self.spoken = 0
+
+    def speak(self, text):
+
+        if not text or not text.strip():
+            return False
+        self.spoken += 1
+        return True
+
+    def set_voice_rate(self, rate):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+    def get_available_voices(self):
+
+        return []
+
+    def set_voice(self, voice_id):
+        pass
+
+    def stop_speaking(self):
+        pass